@@ -1,5 +1,11 @@
 import midata
 from .midata import *
+from .trajdata import *
+from .stationcube import *
+from .csvreader import *
 
 __all__ = []
-__all__ += midata.__all__
\ No newline at end of file
+__all__ += midata.__all__
+__all__ += trajdata.__all__
+__all__ += stationcube.__all__
+__all__ += csvreader.__all__
\ No newline at end of file
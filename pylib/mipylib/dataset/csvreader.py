@@ -0,0 +1,418 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab parallel text table reader module
+# Note: Jython
+#-----------------------------------------------------
+
+import os
+import datetime
+
+from ucar.ma2 import Array, DataType
+from java.lang import Double, Integer, Long, System
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from mipylib.numeric.mitable import PyTableData
+
+__all__ = [
+    'itercsv','readcsv'
+    ]
+
+#Java array type code and ucar data type of the column types
+_JTYPES = {'int': ('i', DataType.INT), 'float': ('d', DataType.DOUBLE), 'date': ('l', DataType.LONG)}
+#Table column data type of the column types
+_TTYPES = {'int': 'int', 'float': 'double', 'str': 'string', 'date': 'date'}
+#Line number used to infer column types
+_NINFER = 200
+#Date formats tried to infer date columns
+_DATEFORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M', '%Y/%m/%d %H:%M:%S', '%Y/%m/%d %H:%M', '%Y/%m/%d']
+
+def _split(line, delimiter):
+    '''
+    Split a line into fields, the delimiters in double quoted fields are kept and a doubled quote
+    in a quoted field is a literal quote.
+    '''
+    if not '"' in line:
+        if delimiter is None:
+            fields = line.split()
+        else:
+            fields = line.split(delimiter)
+        return [f.strip() for f in fields]
+    fields = []
+    field = []
+    quoted = False
+    started = False
+    i = 0
+    n = len(line)
+    while i < n:
+        c = line[i]
+        if quoted:
+            if c == '"':
+                if i + 1 < n and line[i + 1] == '"':
+                    field.append(c)
+                    i += 1
+                else:
+                    quoted = False
+            else:
+                field.append(c)
+        elif c == '"':
+            quoted = True
+            started = True
+        elif (delimiter is None and c.isspace()) or c == delimiter:
+            if delimiter is None and not started:
+                i += 1
+                continue
+            fields.append(''.join(field).strip())
+            field = []
+            started = False
+        else:
+            field.append(c)
+            started = started or not c.isspace()
+        i += 1
+    if started or not delimiter is None:
+        fields.append(''.join(field).strip())
+    return fields
+
+def _isfloat(v):
+    try:
+        float(v)
+        return True
+    except ValueError:
+        return False
+
+def _isint(v):
+    try:
+        v = int(v)
+    except ValueError:
+        return False
+    return -2147483648 < v <= 2147483647
+
+def _datefmt(values):
+    '''
+    Get the first date format parsing all the values, ``None`` if there is no such format.
+    '''
+    for fmt in _DATEFORMATS:
+        try:
+            for v in values:
+                datetime.datetime.strptime(v, fmt)
+            return fmt
+        except ValueError:
+            pass
+    return None
+
+def _infer(rows, ncol):
+    '''
+    Infer column types from sample rows. A column is int if all the values are integers, float if
+    all the non-empty values are numbers, date if all the non-empty values have one of the common
+    date formats, otherwise string.
+    '''
+    types = []
+    for i in range(ncol):
+        values = [fields[i] if i < len(fields) else '' for fields in rows]
+        nonempty = [v for v in values if v != '']
+        if len(nonempty) == 0:
+            t = 'float'
+        elif len(nonempty) == len(values) and all([_isint(v) for v in values]):
+            t = 'int'
+        elif all([_isfloat(v) for v in nonempty]):
+            t = 'float'
+        else:
+            fmt = _datefmt(nonempty)
+            t = 'str' if fmt is None else 'date:' + fmt
+        types.append(t)
+    return types
+
+def _dtype(t):
+    '''
+    Split a column type into type name and date format, i.e. ``date:%Y-%m-%d``.
+    '''
+    if t.startswith('date'):
+        return 'date', t[5:] or '%Y-%m-%d %H:%M:%S'
+    if t in ('int', 'float', 'str'):
+        return t, None
+    raise ValueError('Not supported column type: ' + t)
+
+def _converter(t, fmt):
+    if t == 'float':
+        def conv(v):
+            try:
+                return float(v)
+            except ValueError:
+                return Double.NaN
+    elif t == 'int':
+        def conv(v):
+            try:
+                return int(v)
+            except ValueError:
+                return Integer.MIN_VALUE
+    elif t == 'date':
+        epoch = datetime.datetime(1970, 1, 1)
+        def conv(v):
+            try:
+                d = datetime.datetime.strptime(v, fmt) - epoch
+            except ValueError:
+                return Long.MIN_VALUE
+            return (d.days * 86400 + d.seconds) * 1000L + d.microseconds // 1000
+    else:
+        conv = unicode
+    return conv
+
+class _Spec(object):
+    '''
+    Layout of a text table file: data start offset, column names, used column indices and types.
+    '''
+    def __init__(self, filename, delimiter, headerlines, readvarnames, varnames, usecols, dtypes,
+        encoding):
+        if not os.path.exists(filename):
+            raise IOError('No such file: ' + filename)
+        self.filename = filename
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.size = os.path.getsize(filename)
+        f = open(filename, 'rb')
+        try:
+            for i in range(max(headerlines, 0)):
+                f.readline()
+            names = None
+            if readvarnames and headerlines >= 0:
+                names = _split(f.readline().decode(encoding).strip(), delimiter)
+            self.start = f.tell()
+            sample = []
+            while len(sample) < _NINFER:
+                line = f.readline()
+                if not line:
+                    break
+                line = line.decode(encoding).strip()
+                if line:
+                    sample.append(_split(line, delimiter))
+        finally:
+            f.close()
+        ncol = len(names) if not names is None else (len(sample[0]) if sample else 0)
+        if not varnames is None:
+            names = list(varnames)
+        if names is None:
+            names = ['Col_%i' % i for i in range(ncol)]
+        if usecols is None:
+            self.cols = range(len(names))
+        else:
+            self.cols = [names.index(c) if isinstance(c, basestring) else c for c in usecols]
+        self.names = [names[i] for i in self.cols]
+        inferred = _infer(sample, len(names))
+        types = []
+        for k, i in enumerate(self.cols):
+            if dtypes is None:
+                t = inferred[i]
+            elif isinstance(dtypes, dict):
+                t = dtypes.get(self.names[k], inferred[i])
+            else:
+                t = dtypes[k]
+            types.append(_dtype(t))
+        self.types = [t for t, fmt in types]
+        self.converters = [_converter(t, fmt) for t, fmt in types]
+
+    def ranges(self, blocksize):
+        '''
+        Split the data part of the file into byte ranges at line boundaries.
+        '''
+        bounds = [self.start]
+        f = open(self.filename, 'rb')
+        try:
+            pos = self.start + blocksize
+            while pos < self.size:
+                f.seek(pos)
+                f.readline()
+                pos = f.tell()
+                if pos >= self.size:
+                    break
+                bounds.append(pos)
+                pos += blocksize
+        finally:
+            f.close()
+        bounds.append(self.size)
+        return zip(bounds[:-1], bounds[1:])
+
+    def parse(self, se):
+        '''
+        Parse a byte range into typed column buffers.
+
+        :returns: (*tuple*) Row number and column buffers.
+        '''
+        f = open(self.filename, 'rb')
+        try:
+            f.seek(se[0])
+            text = f.read(se[1] - se[0]).decode(self.encoding)
+        finally:
+            f.close()
+        lines = text.splitlines()
+        cols = self.cols
+        convs = self.converters
+        buffers = []
+        for t in self.types:
+            if t in _JTYPES:
+                buffers.append(jarray.zeros(len(lines), _JTYPES[t][0]))
+            else:
+                buffers.append([None] * len(lines))
+        n = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            fields = _split(line, self.delimiter)
+            nf = len(fields)
+            for k, i in enumerate(cols):
+                buffers[k][n] = convs[k](fields[i] if i < nf else '')
+            n += 1
+        if n < len(lines):
+            buffers = [b[:n] for b in buffers]
+        return n, buffers
+
+def _concat(spec, parts):
+    '''
+    Concatenate the column buffers of the parsed parts.
+    '''
+    n = sum([p[0] for p in parts])
+    columns = []
+    for k, t in enumerate(spec.types):
+        if t in _JTYPES:
+            r = jarray.zeros(n, _JTYPES[t][0])
+            i = 0
+            for m, buffers in parts:
+                System.arraycopy(buffers[k], 0, r, i, m)
+                i += m
+        else:
+            r = []
+            for m, buffers in parts:
+                r.extend(buffers[k])
+        columns.append(r)
+    return n, columns
+
+def _result(spec, n, columns, astable):
+    arrays = []
+    for t, c in zip(spec.types, columns):
+        if t == 'date':
+            arrays.append(miutil.DateArray(c))
+        elif t in _JTYPES:
+            arrays.append(MIArray(Array.factory(_JTYPES[t][1], jarray.array([n], 'i'), c)))
+        else:
+            arrays.append(c)
+    if not astable:
+        return dict(zip(spec.names, arrays))
+    r = PyTableData()
+    for name, t, a in zip(spec.names, spec.types, arrays):
+        if t == 'date':
+            a = a.tojdates()
+        r.addcoldata(name, _TTYPES[t], a)
+    #Prime the typed column cache with the float buffers, so they are accessed without converting
+    #again and without a second copy
+    for name, t, a in zip(spec.names, spec.types, arrays):
+        if t == 'float':
+            r.cachecolumn(name, a)
+    return r
+
+def _slice(columns, s, e):
+    return [c[s:e] for c in columns]
+
+def _batches(spec, blocksize, nthreads):
+    '''
+    Parse the byte ranges batch by batch, the ranges of a batch are parsed in parallel.
+    '''
+    if nthreads is None:
+        nthreads = miutil.cpu_count()
+    ranges = spec.ranges(blocksize)
+    for s in range(0, len(ranges), nthreads):
+        yield miutil.parallel_map(spec.parse, ranges[s:s + nthreads], nthreads)
+
+def _options(filename, kwargs):
+    spec = _Spec(filename, kwargs.pop('delimiter', None), kwargs.pop('headerlines', 0),
+        kwargs.pop('readvarnames', True), kwargs.pop('varnames', None), kwargs.pop('usecols', None),
+        kwargs.pop('dtypes', None), kwargs.pop('encoding', 'utf-8'))
+    return spec, kwargs.pop('nthreads', None), kwargs.pop('astable', False)
+
+def readcsv(filename, **kwargs):
+    '''
+    Read a column oriented text (CSV or space delimited ASCII) file in parallel. The file is split
+    into byte ranges at line boundaries which are parsed on a thread pool straight into typed
+    column buffers. Double quoted fields may contain delimiters but not line breaks. Missing or
+    invalid values are ``NaN`` in float columns, ``-2147483648`` (``Integer.MIN_VALUE``) in int
+    columns and missing times in date columns.
+
+    :param filename: (*string*) File name for reading.
+    :param delimiter: (*string*) Field delimiter character. Default is ``None``, means space or tab
+        delimiter.
+    :param headerlines: (*int*) Lines to skip at beginning of the file. Default is ``0``. The line
+        after the skip lines will be read as variable names, ``-1`` if there is no variable name line.
+    :param readvarnames: (*boolean*) Read variable names or not. Default is ``True``.
+    :param varnames: (*list*) Specified variable names. Default is ``None``.
+    :param usecols: (*list*) Names or indices of the columns to be read. Default is ``None``, all
+        columns.
+    :param dtypes: (*list or dict*) Column types [int | float | str | date:<format>] of the used
+        columns, i.e. ``{'TIME': 'date:%Y-%m-%d %H:%M', 'STID': 'str'}``. Default is ``None``, the
+        types are inferred from the beginning lines as int, float, date (``%Y-%m-%d %H:%M:%S`` like
+        formats) or str.
+    :param nrows: (*int*) Maximum row number to read. Default is ``None``, all rows.
+    :param encoding: (*string*) Character encoding of the file. Default is ``utf-8``.
+    :param blocksize: (*int*) Byte number of each range. Default is ``None``, the file size divided
+        by four times the thread number, not less than 1 MB.
+    :param astable: (*boolean*) Return a table or a dict of column arrays. Default is ``False``, the
+        typed buffers are returned without copying. A table boxes every value into the rows of the
+        Java table in a single thread, use it only for the table functions.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*dict or PyTableData*) Column name and array (``DateArray`` for date columns, list
+        for string columns) dict, or the table.
+    '''
+    nrows = kwargs.pop('nrows', None)
+    blocksize = kwargs.pop('blocksize', None)
+    spec, nthreads, astable = _options(filename, kwargs)
+    if blocksize is None:
+        blocksize = max(1 << 20, (spec.size - spec.start) // (4 * (nthreads or miutil.cpu_count())) + 1)
+    parts = []
+    n = 0
+    for batch in _batches(spec, blocksize, nthreads):
+        parts.extend(batch)
+        n += sum([p[0] for p in batch])
+        if not nrows is None and n >= nrows:
+            break
+    n, columns = _concat(spec, parts)
+    if not nrows is None and n > nrows:
+        columns = _slice(columns, 0, nrows)
+        n = nrows
+    return _result(spec, n, columns, astable)
+
+def itercsv(filename, chunksize=100000, **kwargs):
+    '''
+    Read a column oriented text file chunk by chunk, the byte ranges are parsed in parallel
+    batches, so files larger than the memory can be processed.
+
+    :param filename: (*string*) File name for reading.
+    :param chunksize: (*int*) Row number of each chunk. Default is ``100000``.
+    :param blocksize: (*int*) Byte number of each range. Default is ``8 MB``.
+    :param kwargs: Other options of ``readcsv``.
+
+    :returns: Generator of the chunk column dicts (or tables).
+    '''
+    nrows = kwargs.pop('nrows', None)
+    blocksize = kwargs.pop('blocksize', 8 << 20)
+    spec, nthreads, astable = _options(filename, kwargs)
+    pending = []
+    total = 0
+    for batch in _batches(spec, blocksize, nthreads):
+        pending.extend(batch)
+        n, columns = _concat(spec, pending)
+        if not nrows is None and total + n >= nrows:
+            columns = _slice(columns, 0, nrows - total)
+            n = nrows - total
+        s = 0
+        while n - s >= chunksize:
+            yield _result(spec, chunksize, _slice(columns, s, s + chunksize), astable)
+            s += chunksize
+        total += s
+        pending = [(n - s, _slice(columns, s, n))] if n > s else []
+        if not nrows is None and total + n - s >= nrows:
+            break
+    if pending:
+        n, columns = _concat(spec, pending)
+        yield _result(spec, n, columns, astable)
@@ -8,6 +8,7 @@ from org.meteoinfo.data.meteodata import MeteoDataType
 from ucar.ma2 import DataType
 from ucar.nc2 import Attribute
 from dimvariable import DimVariable, TDimVariable
+from trajdata import readtraj
 from mipylib.numeric.dimarray import DimArray, PyGridData, PyStationData
 from mipylib.geolib.milayer import MILayer, MIXYListData
 from mipylib.numeric.miarray import MIArray
@@ -198,6 +199,19 @@ class DimDataFile():
         else:
             return None
             
+    def trajcolumns(self, nthreads=None):
+        '''
+        Get trajectory end points as columnar arrays.
+        
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+        
+        :returns: (*TrajColumns*) Columnar trajectory data.
+        '''
+        if self.dataset.isTrajData():
+            return readtraj([self.filename], nthreads)
+        else:
+            return None
+            
     def trajvardata(self, varidx, hourx=False):
         '''
         Get trajectory variable data.
@@ -235,10 +249,7 @@ class DimDataFile():
         Get time list.
         '''
         tt = self.dataset.getDataInfo().getTimes()
-        times = []
-        for t in tt:
-            times.append(miutil.pydate(t))
-        return times
+        return miutil.DateArray.fromjdates(tt).astype('s').todatetimes()
         
     def bigendian(self, big_endian):
         '''
@@ -370,10 +370,8 @@ class TDimVariable():
         self.add_offset = variable.getAddOffset()
         dims = variable.getDimensions()
         tdim = Dimension(DimensionType.T)
-        times = []
-        for t in self.dataset.times:
-            times.append(miutil.date2num(t))
-        tdim.setDimValues(times)
+        times = miutil.cached_dates2nums(self.dataset.times)
+        tdim.setDimValues(list(times))
         dims[0] = tdim
         self.dims = dims
         self.tnum = len(times)
@@ -332,12 +332,9 @@ def ncwrite(fn, data, varname, dims=None, attrs=None, largefile=False):
     #Write variable data
     for dimvar, dim in zip(dimvars, dims):
         if dim.getDimType() == DimensionType.T:
-            sst = datetime.datetime(1900,1,1)
-            tt = miutil.nums2dates(dim.getDimValue())
-            hours = []
-            for t in tt:
-                hours.append((t - sst).total_seconds() // 3600)
-            ncfile.write(dimvar, minum.array(hours))
+            tt = miutil.DateArray.fromnums(dim.getDimValue())
+            hours = tt.astype('s').tocf('hours since 1900-01-01 00:00:0.0')
+            ncfile.write(dimvar, minum.array([h // 1 for h in hours]))
         else:
             ncfile.write(dimvar, minum.array(dim.getDimValue()))
     ncfile.write(var, data)
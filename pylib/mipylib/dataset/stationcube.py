@@ -0,0 +1,183 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab station time cube module
+# Note: Jython
+#-----------------------------------------------------
+
+from org.meteoinfo.data.meteodata import Dimension, DimensionType
+from org.meteoinfo.global.util import DateUtil
+from java.lang import Double
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from mipylib.numeric.dimarray import DimArray
+from dimdatafile import DimDataFile
+
+__all__ = [
+    'StationCube','stationcube'
+    ]
+
+def _readfile(f, varnames, levelindex):
+    '''
+    Read all times of a station data file, each file is read by one thread with its own
+    dataset, so the shared time and level index are never mutated concurrently.
+
+    :returns: (*list*) (time, stations) tuples, stations is a list of (stid, x, y, values).
+    '''
+    if isinstance(f, basestring):
+        import midata
+        f = midata.addfile(f)
+        close = True
+    else:
+        close = False
+    try:
+        if not f.dataset.isStationData():
+            raise ValueError('Not a station data file: ' + f.filename)
+        r = []
+        times = f.dataset.getDataInfo().getTimes()
+        for t in range(f.timenum()):
+            stations = {}
+            order = []
+            for k, varname in enumerate(varnames):
+                sdata = f.stationdata(varname, t, levelindex).data
+                for i in xrange(sdata.getStNum()):
+                    stid = sdata.getStid(i)
+                    st = stations.get(stid)
+                    if st is None:
+                        st = (stid, sdata.getX(i), sdata.getY(i), [Double.NaN] * len(varnames))
+                        stations[stid] = st
+                        order.append(stid)
+                    v = sdata.getValue(i)
+                    if v != sdata.getMissingValue():
+                        st[3][k] = v
+            r.append((DateUtil.toOADate(times.get(t)), [stations[s] for s in order]))
+        return r
+    finally:
+        if close:
+            f.close()
+
+class StationCube(object):
+    '''
+    Station by time data of station format files.
+
+    :param stids: (*list*) Station identifiers.
+    :param x: (*MIArray*) Station x coordinates.
+    :param y: (*MIArray*) Station y coordinates.
+    :param data: (*dict*) Variable name and (station, time) DimArray.
+    '''
+    def __init__(self, stids, x, y, data):
+        self.stids = stids
+        self.x = x
+        self.y = y
+        self.data = data
+        self._index = dict((s, i) for i, s in enumerate(stids))
+
+    def __len__(self):
+        return len(self.stids)
+
+    def __repr__(self):
+        return 'StationCube(stations=%i, variables=%s)' % (len(self), self.data.keys())
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def index(self, stid):
+        '''
+        Get station index by identifier.
+
+        :param stid: (*string*) Station identifier.
+
+        :returns: (*int*) Station index, ``-1`` if not exists.
+        '''
+        return self._index.get(stid, -1)
+
+    def series(self, varname, stid):
+        '''
+        Get time series of a station.
+
+        :param varname: (*string*) Variable name.
+        :param stid: (*string*) Station identifier.
+
+        :returns: (*DimArray*) Time series of the station.
+        '''
+        i = self.index(stid)
+        if i < 0:
+            raise ValueError('Station not exists: ' + str(stid))
+        return self.data[varname][i,:]
+
+def stationcube(files, varnames, stids=None, levelindex=0, nthreads=None):
+    '''
+    Read station format files (i.e. MICAPS or station netCDF) of all times into (station, time)
+    arrays. The files are read in parallel and the station identifiers are matched by a hash
+    index.
+
+    :param files: (*list*) File names or opened data files in time order.
+    :param varnames: (*string or list*) Variable name(s).
+    :param stids: (*list*) Station identifiers of the result. Default is ``None``, all stations
+        in the files in order of their first appearance.
+    :param levelindex: (*int*) Level index. Default is ``0``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*StationCube*) Station cube with a (station, time) DimArray of each variable.
+    '''
+    if isinstance(varnames, basestring):
+        varnames = [varnames]
+    if isinstance(files, (basestring, DimDataFile)):
+        files = [files]
+    rr = miutil.parallel_map(lambda f: _readfile(f, varnames, levelindex), files, nthreads)
+    times = []
+    for r in rr:
+        times.extend([t for t, stations in r])
+    nt = len(times)
+
+    fixed = not stids is None
+    if not fixed:
+        stids = []
+        index = {}
+        xs = []
+        ys = []
+    else:
+        stids = list(stids)
+        index = dict((s, i) for i, s in enumerate(stids))
+        xs = [Double.NaN] * len(stids)
+        ys = [Double.NaN] * len(stids)
+    values = [{} for v in varnames]
+    t = 0
+    for r in rr:
+        for tt, stations in r:
+            for stid, x, y, vals in stations:
+                i = index.get(stid)
+                if i is None:
+                    if fixed:
+                        continue
+                    i = len(stids)
+                    index[stid] = i
+                    stids.append(stid)
+                    xs.append(x)
+                    ys.append(y)
+                elif xs[i] != xs[i]:
+                    xs[i] = x
+                    ys[i] = y
+                for k, v in enumerate(vals):
+                    values[k][i * nt + t] = v
+            t += 1
+
+    nst = len(stids)
+    sdim = Dimension(DimensionType.Other)
+    sdim.setDimValues(range(nst))
+    sdim.setShortName('station')
+    tdim = Dimension(DimensionType.T)
+    tdim.setDimValues(times)
+    tdim.setShortName('time')
+    data = {}
+    for varname, vals in zip(varnames, values):
+        a = jarray.array([Double.NaN] * (nst * nt), 'd')
+        for i, v in vals.iteritems():
+            a[i] = v
+        a = MIArray(miutil.fromjdoubles(a, [nst, nt]))
+        data[varname] = DimArray(a, [sdim, tdim], Double.NaN, None)
+    x = MIArray(miutil.fromjdoubles(xs, [nst]))
+    y = MIArray(miutil.fromjdoubles(ys, [nst]))
+    return StationCube(stids, x, y, data)
@@ -0,0 +1,235 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab columnar trajectory data module
+# Note: Jython
+#-----------------------------------------------------
+
+import os
+import calendar
+import datetime
+
+from ucar.ma2 import Array, DataType
+from java.lang import System
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+
+__all__ = [
+    'TrajColumns','itertraj','readtraj'
+    ]
+
+#Base columns of each trajectory end point
+_COLUMNS = ['age', 'lat', 'lon', 'height']
+
+def _year(y):
+    if y < 100:
+        y += 2000 if y < 50 else 1900
+    return y
+
+def _millis(y, m, d, h, mi=0):
+    return long(calendar.timegm((_year(y), m, d, h, mi, 0))) * 1000
+
+def _fname(f):
+    if isinstance(f, basestring):
+        return f
+    return f.filename
+
+def _parse(fname):
+    '''
+    Parse a HYSPLIT trajectory endpoint file.
+
+    :returns: (*dict*) Trajectory start points, variable names and columns of the end points
+        grouped by trajectory.
+    '''
+    if not os.path.exists(fname):
+        raise IOError('No such file: ' + fname)
+    f = open(fname)
+    try:
+        lines = f.readlines()
+    finally:
+        f.close()
+    k = 0
+    ngrid = int(lines[k].split()[0])
+    k += 1 + ngrid
+    ntraj = int(lines[k].split()[0])
+    k += 1
+    starts = []
+    for i in range(ntraj):
+        s = lines[k + i].split()
+        starts.append((_millis(int(s[0]), int(s[1]), int(s[2]), int(s[3])), float(s[-3]),
+            float(s[-2]), float(s[-1])))
+    k += ntraj
+    s = lines[k].split()
+    nvar = int(s[0])
+    varnames = s[1:1 + nvar]
+    k += 1
+    #End point lines may be wrapped, so the values are consumed as a token stream
+    tokens = ' '.join(lines[k:]).split()
+    nval = 12 + nvar
+    ncol = len(_COLUMNS) + nvar
+    times = [[] for i in range(ntraj)]
+    cols = [[[] for j in range(ncol)] for i in range(ntraj)]
+    for i in xrange(0, len(tokens) - nval + 1, nval):
+        t = int(tokens[i]) - 1
+        times[t].append(_millis(int(tokens[i + 2]), int(tokens[i + 3]), int(tokens[i + 4]),
+            int(tokens[i + 5]), int(tokens[i + 6])))
+        c = cols[t]
+        for j in xrange(ncol):
+            c[j].append(float(tokens[i + 8 + j]))
+    return dict(starts=starts, varnames=varnames, times=times, columns=cols)
+
+class TrajColumns(object):
+    '''
+    Columnar trajectory end point data. The end points of all trajectories are stored in flat
+    primitive arrays, the points of trajectory ``i`` are in ``[offsets[i], offsets[i + 1])``.
+
+    :param files: (*list*) Source file names.
+    :param varnames: (*list*) Column names.
+    :param columns: (*dict*) Column name and Java array of the end points, ``time`` column is
+        epoch milliseconds (long[]), the others are double[].
+    :param offsets: (*int[]*) Start point index of the trajectories, length is trajectory number
+        plus one.
+    :param fileindex: (*int[]*) Source file index of the trajectories.
+    :param trajindex: (*int[]*) Trajectory number of the trajectories in the source files.
+    :param starts: (*list*) Start (time, lat, lon, height) of the trajectories.
+    '''
+    def __init__(self, files, varnames, columns, offsets, fileindex, trajindex, starts):
+        self.files = files
+        self.varnames = varnames
+        self.columns = columns
+        self.offsets = offsets
+        self.fileindex = fileindex
+        self.trajindex = trajindex
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __repr__(self):
+        return 'TrajColumns(files=%i, trajectories=%i, points=%i, columns=%s)' % (len(self.files),
+            len(self), self.npoints(), ['time'] + self.varnames)
+
+    def npoints(self):
+        '''
+        Get total end point number.
+        '''
+        return self.offsets[-1]
+
+    def column(self, name):
+        '''
+        Get a column as a 1-D array without copying.
+
+        :param name: (*string*) Column name, i.e. ``time``, ``lat``, ``lon``, ``height`` or a
+            variable name like ``PRESSURE``.
+
+        :returns: (*MIArray*) Column array, ``time`` column is long epoch milliseconds.
+        '''
+        data = self.columns[name]
+        dt = DataType.LONG if name == 'time' else DataType.DOUBLE
+        return MIArray(Array.factory(dt, jarray.array([len(data)], 'i'), data))
+
+    def trajid(self):
+        '''
+        Get the trajectory index of each end point.
+
+        :returns: (*MIArray*) Int array of trajectory index.
+        '''
+        n = self.npoints()
+        r = jarray.zeros(n, 'i')
+        for i in xrange(len(self)):
+            for k in xrange(self.offsets[i], self.offsets[i + 1]):
+                r[k] = i
+        return MIArray(Array.factory(DataType.INT, jarray.array([n], 'i'), r))
+
+    def trajectory(self, i):
+        '''
+        Get the columns of a trajectory.
+
+        :param i: (*int*) Trajectory index.
+
+        :returns: (*dict*) Column name and values list.
+        '''
+        s = self.offsets[i]
+        e = self.offsets[i + 1]
+        return dict((k, list(v[s:e])) for k, v in self.columns.items())
+
+    def times(self, i=None):
+        '''
+        Get the end point times as Python datetimes.
+
+        :param i: (*int*) Trajectory index. Default is ``None``, all end points.
+
+        :returns: (*list*) Python datetimes.
+        '''
+        t = self.columns['time']
+        if not i is None:
+            t = t[self.offsets[i]:self.offsets[i + 1]]
+        epoch = datetime.datetime(1970, 1, 1)
+        return [epoch + datetime.timedelta(milliseconds=v) for v in t]
+
+def _merge(fnames, parsed):
+    varnames = None
+    for p in parsed:
+        if varnames is None:
+            varnames = p['varnames']
+        elif p['varnames'] != varnames:
+            raise ValueError('The trajectory files have different variables!')
+    varnames = _COLUMNS + (varnames or [])
+    ntraj = sum([len(p['starts']) for p in parsed])
+    offsets = jarray.zeros(ntraj + 1, 'i')
+    fileindex = jarray.zeros(ntraj, 'i')
+    trajindex = jarray.zeros(ntraj, 'i')
+    starts = []
+    i = 0
+    for fi, p in enumerate(parsed):
+        for t, times in enumerate(p['times']):
+            offsets[i + 1] = offsets[i] + len(times)
+            fileindex[i] = fi
+            trajindex[i] = t + 1
+            i += 1
+        starts.extend(p['starts'])
+    n = offsets[ntraj]
+    columns = dict((name, jarray.zeros(n, 'd')) for name in varnames)
+    columns['time'] = jarray.zeros(n, 'l')
+    k = 0
+    for p in parsed:
+        for times, cols in zip(p['times'], p['columns']):
+            m = len(times)
+            System.arraycopy(jarray.array(times, 'l'), 0, columns['time'], k, m)
+            for name, c in zip(varnames, cols):
+                System.arraycopy(jarray.array(c, 'd'), 0, columns[name], k, m)
+            k += m
+    return TrajColumns(fnames, varnames, columns, offsets, fileindex, trajindex, starts)
+
+def readtraj(files, nthreads=None):
+    '''
+    Read HYSPLIT trajectory endpoint files into columnar arrays, the files are parsed in
+    parallel.
+
+    :param files: (*list*) File names or data files opened by ``addfile_hytraj``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*TrajColumns*) Columnar trajectory data.
+    '''
+    if isinstance(files, basestring) or not isinstance(files, (list, tuple)):
+        files = [files]
+    fnames = [_fname(f) for f in files]
+    parsed = miutil.parallel_map(_parse, fnames, nthreads)
+    return _merge(fnames, parsed)
+
+def itertraj(files, nfile=100, nthreads=None):
+    '''
+    Stream HYSPLIT trajectory endpoint files as columnar arrays batch by batch, so many files
+    can be analyzed without loading all trajectories into memory.
+
+    :param files: (*list*) File names or data files opened by ``addfile_hytraj``.
+    :param nfile: (*int*) File number of each batch. Default is ``100``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: Generator of ``TrajColumns`` of the batches.
+    '''
+    files = list(files)
+    for s in range(0, len(files), nfile):
+        yield readtraj(files[s:s + nfile], nthreads)
@@ -13,37 +13,88 @@ from org.meteoinfo.shape import ShapeUtil, PolygonShape
 from org.meteoinfo.legend import BreakTypes
 from org.meteoinfo.geoprocess import GeoComputation
 from org.meteoinfo.data import ArrayMath, ArrayUtil
-from org.meteoinfo.data.mapdata import MapDataManage, AttributeTable
+from org.meteoinfo.data.mapdata import MapDataManage, AttributeTable, ShapeFileManage
+from org.meteoinfo.data.meteodata import Dimension, DimensionType
 from org.meteoinfo.projection import KnownCoordinateSystems, ProjectionInfo, Reproject
 from org.meteoinfo.global import PointD
 
 from milayer import MILayer
+from shpreader import ShapeFileReader
 from mipylib.numeric.miarray import MIArray
 from mipylib.numeric.dimarray import DimArray
+from mipylib.numeric.spatial import GridMask, PolygonIndex, ZoneIndex, reproject_points
+from mipylib.numeric.spatial import distance_matrix, layer_areas, pairwise_haversine, path_lengths
 import mipylib.migl as migl
 import mipylib.numeric.minum as minum
 
 from java.util import ArrayList
+from java.io import File
 
 __all__ = [
-    'arrayinpolygon','convert_encoding_dbf','distance','georead','geotiffread',
-    'maplayer','inpolygon','maskin','maskout','polyarea','polygon','rmaskin','rmaskout','shaperead',
+    'arrayinpolygon','convert_encoding_dbf','distance','distance_matrix','georead','geotiffread','GridMask',
+    'layer_areas','maplayer','inpolygon','maskin','maskout','pairwise_haversine','path_lengths',
+    'polyarea','polygon','PolygonIndex','polygonindex',
+    'rmaskin','rmaskout','shaperead','shapeiter','ZoneIndex','zonal_stats',
     'projinfo','project','projectxy'
     ]
 
-def shaperead(fn, encoding=None):   
+def __shapefile(fn):
+    if not fn.endswith('.shp'):
+        fn = fn + '.shp'
+    if not os.path.exists(fn):
+        fn = os.path.join(migl.mapfolder, fn)
+    return fn
+
+def shaperead(fn, encoding=None, bbox=None, fields=None, lazy=True):   
     '''
     Returns a layer readed from a shape file.
     
     :param fn: (*string*) The shape file name (.shp).
     :param encoding: (*string*) Encoding
+    :param bbox: (*list*) Bounding box [xmin, ymin, xmax, ymax], only the shapes intersecting the
+        bounding box are read. Default is ``None``.
+    :param fields: (*list*) Attribute field names to be read. Default is ``None``, all fields.
+    :param lazy: (*boolean*) Use the .shx record offsets to skip the records out of the bounding
+        box. Default is ``True``. Only used with ``bbox`` or ``fields``, the points of a multipoint
+        shape file are read into a point layer.
     
     :returns: (*MILayer*) The created layer.
     '''
-    if not fn.endswith('.shp'):
-        fn = fn + '.shp'
-    if not os.path.exists(fn):
-        fn = os.path.join(migl.mapfolder, fn)
+    fn = __shapefile(fn)
+    if not bbox is None or not fields is None:
+        if not os.path.exists(fn):
+            print 'File not exists: ' + fn
+            raise IOError
+        reader = ShapeFileReader(fn, encoding)
+        try:
+            fds = reader.getfields(fields)
+            if reader.shapetype == 'multipoint':
+                layer = MILayer(shapetype='point')
+            else:
+                layer = MILayer(shapetype=reader.shapetype)
+            prj = os.path.splitext(fn)[0] + '.prj'
+            if os.path.exists(prj):
+                proj = ShapeFileManage.loadProjFile(File(prj))
+                if not proj is None:
+                    layer.layer.setProjInfo(proj)
+                    layer.proj = proj
+            layer.layer.setFileName(fn)
+            layer.layer.setLayerName(os.path.basename(fn))
+            for f in fds:
+                layer.addfield(f[0], reader.fieldtype(f))
+            names = [f[0] for f in fds]
+            for feature in reader.features(bbox, names, lazy):
+                attrs = feature.attributes
+                values = [attrs.get(name) for name in names]
+                for shape in feature.shapes:
+                    layer.layer.editAddShape(shape, values)
+        finally:
+            reader.close()
+        if not layer.legend() is None:
+            lb = layer.legend().getLegendBreaks()[0]
+            if lb.getBreakType() == BreakTypes.PolygonBreak:
+                lb.setDrawFill(False)
+        return layer
         
     if os.path.exists(fn):        
         try:
@@ -62,6 +113,32 @@ def shaperead(fn, encoding=None):
         print 'File not exists: ' + fn
         raise
     
+def shapeiter(fn, bbox=None, fields=None, encoding=None, lazy=True):
+    '''
+    Iterate the features of a shape file one at a time without loading the whole file.
+    
+    :param fn: (*string*) The shape file name (.shp).
+    :param bbox: (*list*) Bounding box [xmin, ymin, xmax, ymax], only the features intersecting the
+        bounding box are read. Default is ``None``.
+    :param fields: (*list*) Attribute field names to be decoded. Default is ``None``, all fields.
+    :param encoding: (*string*) Encoding of the attribute strings.
+    :param lazy: (*boolean*) Use the .shx record offsets and decode the attributes on first access.
+        Default is ``True``.
+    
+    :returns: Feature generator, each feature has ``index``, ``bbox``, ``parts``, ``x``, ``y``,
+        ``attributes`` and ``shape`` attributes.
+    '''
+    fn = __shapefile(fn)
+    if not os.path.exists(fn):
+        print 'File not exists: ' + fn
+        raise IOError
+    reader = ShapeFileReader(fn, encoding)
+    try:
+        for feature in reader.features(bbox, fields, lazy):
+            yield feature
+    finally:
+        reader.close()
+    
 def georead(fn):
     '''
     Returns a layer readed from a supported geo-data file.
@@ -153,10 +230,18 @@ def inpolygon(x, y, polygon):
     
     :param x: (*array_like*) X coordinate of the points.
     :param y: (*array_like*) Y coordinate of the points.
-    :param polygon: (*PolygonShape list*) The polygon list.
+    :param polygon: (*PolygonShape list or PolygonIndex*) The polygon list or the polygon spatial index.
     
     :returns: (*boolean array*) Inside or not.
     '''
+    if isinstance(polygon, PolygonIndex):
+        if isinstance(x, numbers.Number):
+            return polygon.locate(x, y) >= 0
+        r = MIArray(ArrayUtil.array([i >= 0 for i in polygon.query(x, y)]))
+        if isinstance(x, MIArray) and x.ndim > 1:
+            r = r.reshape(x.shape)
+        return r
+        
     if isinstance(x, numbers.Number):
         return GeoComputation.pointInPolygon(polygon, x, y)
     
@@ -179,6 +264,28 @@ def inpolygon(x, y, polygon):
             polygon = [polygon]
         return MIArray(ArrayMath.inPolygon(x.array, y.array, polygon))
     
+def polygonindex(x, y, polygons, nthreads=None):
+    '''
+    Get the index of the polygon containing each point. The polygon bounding boxes are indexed
+    by an STR-tree and the polygon edges are binned, the points are processed in parallel blocks.
+    
+    :param x: (*array_like*) X coordinate of the points.
+    :param y: (*array_like*) Y coordinate of the points.
+    :param polygons: (*list or PolygonIndex*) The polygon list, polygon layer or a ``PolygonIndex``
+        object which can be reused.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    
+    :returns: (*int array*) Polygon index of each point, ``-1`` if the point is not inside any polygon.
+    '''
+    if not isinstance(polygons, PolygonIndex):
+        polygons = PolygonIndex(polygons)
+    if isinstance(x, numbers.Number):
+        return polygons.locate(x, y)
+    r = MIArray(ArrayUtil.array(polygons.query(x, y, nthreads)))
+    if isinstance(x, MIArray) and x.ndim > 1:
+        r = r.reshape(x.shape)
+    return r
+    
 def arrayinpolygon(a, polygon, x=None, y=None):
     '''
     Set array element value as 1 if inside a polygon or set value as -1.
@@ -256,14 +363,21 @@ def maskout(data, mask, x=None, y=None):
     Maskout data by polygons - NaN values of elements outside polygons.
     
     :param data: (*array_like*) Array data for maskout.
-    :param mask: (*list*) Polygon list as maskout borders.    
+    :param mask: (*list or GridMask*) Polygon list as maskout borders, or a precomputed ``GridMask``
+        which is applied to all leading dimensions of the data.
     :param x: (*array_like*) X coordinate array.
     :param y: (*array_like*) Y coordinate array.
 
     :returns: (*array_like*) Maskouted data array.
     """
     if mask is None:
-        return data        
+        return data
+    elif isinstance(mask, GridMask):
+        r = mask.maskout(data)
+        if isinstance(data, DimArray):
+            return DimArray(r, data.dims, data.fill_value, data.proj)
+        else:
+            return r
     elif isinstance(mask, (MIArray, DimArray)):
         r = ArrayMath.maskout(data.asarray(), mask.asarray())
         if isinstance(data, DimArray):
@@ -286,6 +400,50 @@ def maskout(data, mask, x=None, y=None):
     else:
         return MIArray(r)
         
+def zonal_stats(data, polygons, stats=['mean'], weights='area', x=None, y=None, nthreads=None):
+    """
+    Zonal statistics of gridded data over polygons. A cell to zone index is built once (a cell 
+    belongs to the first polygon containing the cell center), then every zone is reduced in one 
+    pass over each field of the leading dimensions.
+    
+    :param data: (*array_like*) Array data, the last two dimensions are y/x.
+    :param polygons: (*list*) Zone polygon list, polygon layer, ``PolygonIndex`` or ``ZoneIndex``. 
+        ``ZoneIndex`` can be reused for the data on same grid.
+    :param stats: (*string or list*) Statistics [mean | sum | min | max | std | count].
+    :param weights: (*string*) Cell weights for mean and std, ``area`` (spherical area for longitude/
+        latitude grid), ``cos`` (cosine of latitude) or ``None``. Default is ``area``.
+    :param x: (*array_like*) X coordinate array. Default is ``None``, the x dimension of data.
+    :param y: (*array_like*) Y coordinate array. Default is ``None``, the y dimension of data.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    
+    :returns: (*DimArray or dict*) Statistic array with leading dimensions and zone dimension, or a dict
+        of statistic name and array pairs if ``stats`` is a list.
+    """
+    if isinstance(polygons, ZoneIndex):
+        zindex = polygons
+    else:
+        islonlat = True
+        if x is None or y is None:
+            x = data.dimvalue(data.ndim - 1)
+            y = data.dimvalue(data.ndim - 2)
+            islonlat = data.islonlatdim(data.ndim - 1) and data.islonlatdim(data.ndim - 2)
+        zindex = ZoneIndex(x, y, polygons, weights, islonlat, nthreads)
+    single = isinstance(stats, basestring)
+    if single:
+        stats = [stats]
+    r = zindex.stats(data, stats, nthreads)
+    if isinstance(data, DimArray):
+        dims = data.dims[:-2]
+        zdim = Dimension(DimensionType.Other)
+        zdim.setDimValues(range(zindex.nzone))
+        dims.append(zdim)
+        for st in stats:
+            r[st] = DimArray(r[st], dims, data.fill_value, data.proj)
+    if single:
+        return r[stats[0]]
+    else:
+        return r
+        
 def rmaskout(data, x, y, mask):
     """
     Maskout data by polygons - the elements outside polygons will be removed
@@ -307,14 +465,21 @@ def maskin(data, mask, x=None, y=None):
     Maskin data by polygons - NaN values of elements inside polygons.
     
     :param data: (*array_like*) Array data for maskout.
-    :param mask: (*list*) Polygon list as maskin borders.    
+    :param mask: (*list or GridMask*) Polygon list as maskin borders, or a precomputed ``GridMask``
+        which is applied to all leading dimensions of the data.
     :param x: (*array_like*) X coordinate array.
     :param y: (*array_like*) Y coordinate array.
 
     :returns: (*array_like*) Maskined data array.
     """
     if mask is None:
-        return data        
+        return data
+    elif isinstance(mask, GridMask):
+        r = mask.maskin(data)
+        if isinstance(data, DimArray):
+            return DimArray(r, data.dims, data.fill_value, data.proj)
+        else:
+            return r
     elif isinstance(mask, MIArray):
         r = ArrayMath.maskin(data.array, mask.array)
         if isinstance(data, DimArray):
@@ -413,14 +578,16 @@ def projinfo(proj4string=None, proj='longlat', **kwargs):
         
     return ProjectionInfo(projstr) 
 
-def project(x, y, fromproj=KnownCoordinateSystems.geographic.world.WGS1984, toproj=KnownCoordinateSystems.geographic.world.WGS1984):
+def project(x, y, fromproj=KnownCoordinateSystems.geographic.world.WGS1984, toproj=KnownCoordinateSystems.geographic.world.WGS1984, nthreads=None):
     """
-    Project geographic coordinates from one projection to another.
+    Project geographic coordinates from one projection to another. Large arrays are transformed
+    in parallel blocks.
     
     :param x: (*array_like*) X coordinate values for projection.
     :param y: (*array_like*) Y coordinate values for projection.
     :param fromproj: (*ProjectionInfo*) From projection. Default is longlat projection.
     :param toproj: (*ProjectionInfo*) To projection. Default is longlat projection.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
     
     :returns: (*array_like*, *array_like*) Projected geographic coordinates.
     """
@@ -433,8 +600,7 @@ def project(x, y, fromproj=KnownCoordinateSystems.geographic.world.WGS1984, topr
     if isinstance(y, (tuple, list)):
         y = array(y)
     if isinstance(x, MIArray):
-        outxy = ArrayUtil.reproject(x.asarray(), y.asarray(), fromproj, toproj)
-        return MIArray(outxy[0]), MIArray(outxy[1])
+        return reproject_points(x, y, fromproj, toproj, nthreads)
     else:
         inpt = PointD(x, y)
         outpt = Reproject.reprojectPoint(inpt, fromproj, toproj)
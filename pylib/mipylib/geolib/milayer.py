@@ -13,6 +13,7 @@ from java.awt import Font
 from datetime import datetime
 import mipylib.miutil as miutil
 import mipylib.numeric.minum as minum
+from mipylib.numeric.query import QueryEngine
 import geoutil
 
 class MILayer(object):
@@ -39,6 +40,7 @@ class MILayer(object):
             self.layer = layer
             self.shapetype = layer.getShapeType()
             self.proj = layer.getProjInfo()
+        self._query = None
     
     def __repr__(self):
         return self.layer.getLayerInfo()            
@@ -101,6 +103,7 @@ class MILayer(object):
         :param value: (*object*) Cell value to be asigned.
         '''
         self.layer.editCellValue(fieldname, shapeindex, value)
+        self._query = None
             
     def shapes(self):
         '''
@@ -143,6 +146,7 @@ class MILayer(object):
             for i in range(n):
                 if i < len(values):
                     self.layer.editCellValue(fieldname, i, values[i])
+        self._query = None
                     
     def delfield(self, fieldname):
         '''
@@ -151,6 +155,7 @@ class MILayer(object):
         :param fieldname: (*string*) Filed name.
         '''
         self.layer.editRemoveField(fieldname)
+        self._query = None
         
     def renamefield(self, fieldname, newfieldname):
         '''
@@ -160,6 +165,7 @@ class MILayer(object):
         :param newfieldname: (*string*) The new field name.
         '''
         self.layer.editRenameField(fieldname, newfieldname)
+        self._query = None
         
     def addshape(self, x, y, fields=None, z=None, m=None):
         '''
@@ -182,6 +188,7 @@ class MILayer(object):
         else:
             for shape, field in zip(shapes, fields):
                 self.layer.editAddShape(shape, field)
+        self._query = None
                     
     def addlabels(self, fieldname, **kwargs):
         '''
@@ -258,45 +265,98 @@ class MILayer(object):
         r = ProjectionManage.projectLayer(self.layer, toproj)
         return MILayer(r)
         
-    def buffer(self, dist=0, merge=False):
+    def buffer(self, dist=0, merge=False, nthreads=None):
         '''
-        Get the buffer layer.
+        Get the buffer layer, the shapes are buffered in parallel.
         
         :param dist: (*float*) Buffer value.
-        :param merge: (*boolean*) Merge the buffered shapes or not.
+        :param merge: (*boolean*) Merge the buffered shapes or not. The merged layer has one
+            shape without attributes.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
         
         :returns: (*MILayer*) Buffered layer.
         '''
-        r = self.layer.buffer(dist, False, merge)
-        return MILayer(r)
+        import topology
+        r = topology.batch_buffer(self, dist, nthreads)
+        if merge:
+            shape = topology.cascaded_union(r, nthreads)
+            r = MILayer(shapetype='polygon')
+            r.layer.setProjInfo(self.layer.getProjInfo())
+            r.proj = self.layer.getProjInfo()
+            if not shape is None:
+                r.layer.editAddShape(shape, [])
+        return r
         
-    def clip(self, clipobj):
+    def clip(self, clipobj, nthreads=None):
         '''
-        Clip this layer by polygon or another polygon layer.
+        Clip this layer by polygon or another polygon layer. The clip polygons are indexed by an
+        STR-tree and the shapes are clipped in parallel.
         
         :param clipobj: (*PolygonShape or MILayer*) Clip object.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
         
         :returns: (*MILayer*) Clipped layer.
         '''
-        if isinstance(clipobj, PolygonShape):
-            clipobj = [clipobj]
-        elif isinstance(clipobj, MILayer):
-            clipobj = clipobj.layer
-        r = self.layer.clip(clipobj)
-        return MILayer(r)
+        import topology
+        return topology.batch_clip(self, clipobj, nthreads)
+        
+    def queryengine(self):
+        '''
+        Get the attribute query engine of the layer. The field values and indexes are cached
+        until the layer is edited.
+        
+        :returns: (*QueryEngine*) Query engine.
+        '''
+        n = self.shapenum()
+        if self._query is None or self._query.nrows != n:
+            getcolumn = lambda fieldname: [self.cellvalue(fieldname, i) for i in range(n)]
+            self._query = QueryEngine(getcolumn, n)
+        return self._query
         
-    def select(self, expression, seltype='new'):
+    def createindex(self, fieldname, kind='sorted'):
+        '''
+        Create an index of a field to speed up the indexed selections.
+        
+        :param fieldname: (*string*) Field name.
+        :param kind: (*string*) Index kind ['sorted' | 'hash']. Sorted index is used for range
+            conditions and hash index for equality and IN conditions.
+        '''
+        self.queryengine().index(fieldname, kind)
+        
+    def select(self, expression, seltype='new', indexed=False):
         '''
         Select shapes by SQL expression.
         
         :param expression: (*string*) SQL expression.
         :param seltype: (*string*) Selection type ['new' | 'add_to_current' |
             'remove_from_current' | 'select_from_current']
+        :param indexed: (*boolean*) If ``True``, the expression is compiled once and evaluated with
+            field indexes built on demand, which is much faster for repeated selections on large
+            layers. Default is ``False``.
             
         :returns: (*list of Shape*) Selected shape list.
         '''
-        self.layer.sqlSelect(expression, seltype)
-        return self.layer.getSelectedShapes()
+        if not indexed:
+            self.layer.sqlSelect(expression, seltype)
+            return self.layer.getSelectedShapes()
+            
+        shapes = self.layer.getShapes()
+        sel = set(self.queryengine().select(expression))
+        if seltype != 'new':
+            current = set(i for i in range(shapes.size()) if shapes.get(i).isSelected())
+            if seltype == 'add_to_current':
+                sel = current | sel
+            elif seltype == 'remove_from_current':
+                sel = current - sel
+            elif seltype == 'select_from_current':
+                sel = current & sel
+        r = []
+        for i in range(shapes.size()):
+            shape = shapes.get(i)
+            shape.setSelected(i in sel)
+            if i in sel:
+                r.append(shape)
+        return r
         
     def clear_selection(self):
         '''
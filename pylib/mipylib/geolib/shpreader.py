@@ -0,0 +1,383 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfo streaming shape file reader module
+# Note: Jython
+#-----------------------------------------------------
+
+import os
+import re
+import codecs
+import struct
+import datetime
+
+from org.meteoinfo.shape import PointShape, PolylineShape, PolygonShape
+from org.meteoinfo.global import PointD
+from java.nio.charset import Charset
+import jarray
+
+__all__ = [
+    'ShapeFileReader'
+    ]
+
+#Shape types without Z/M: 1 - point, 3 - polyline, 5 - polygon, 8 - multipoint. The Z/M types
+#add 10/20 and have the same x/y layout, multipatch (31) is not supported
+_SHAPETYPES = {1: 'point', 3: 'line', 5: 'polygon', 8: 'multipoint'}
+
+def _shapetype(stype):
+    if stype > 28 or not stype % 10 in _SHAPETYPES:
+        raise ValueError('Not supported shape type: %i' % stype)
+    return _SHAPETYPES[stype % 10]
+
+#Code pages of the dBase language driver ids
+_LDIDS = {0x01: 'cp437', 0x02: 'cp850', 0x03: 'cp1252', 0x4D: 'gbk', 0x4E: 'cp949', 0x4F: 'big5',
+    0x7A: 'gbk', 0x7B: 'cp949', 0x7C: 'cp874', 0xC8: 'cp1250', 0xC9: 'cp1251', 0xCA: 'cp1254',
+    0xCB: 'cp1253'}
+#Byte number of the .dbf records to detect the encoding
+_NDETECT = 1 << 20
+
+def _codec(name):
+    '''
+    Get the Python codec of an encoding name in a .cpg file, i.e. ``UTF-8``, ``GBK``, ``1252`` or
+    ``ANSI 1252``. ``None`` if the codec is unknown.
+    '''
+    name = name.strip()
+    m = re.match(r'^(?:ansi|cp|windows|oem)?[ _-]*(\d+)$', name, re.I)
+    if not m is None:
+        name = {'65001': 'utf-8', '88591': 'iso-8859-1'}.get(m.group(1), 'cp' + m.group(1))
+    m = re.match(r'^8859[ _-]?(\d+)$', name)
+    if not m is None:
+        name = 'iso-8859-' + m.group(1)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+def _intersects(a, b):
+    return not (a[2] < b[0] or a[0] > b[2] or a[3] < b[1] or a[1] > b[3])
+
+class Feature(object):
+    '''
+    A shape file record with geometry coordinates and attributes.
+
+    :param index: (*int*) Record index.
+    :param shapetype: (*string*) Shape type [point | line | polygon | multipoint].
+    :param bbox: (*tuple*) Bounding box (xmin, ymin, xmax, ymax).
+    :param parts: (*list*) Start point index of each part.
+    :param x: (*list*) X coordinates.
+    :param y: (*list*) Y coordinates.
+    '''
+    def __init__(self, index, shapetype, bbox, parts, x, y, record=None, fields=None, decoder=None):
+        self.index = index
+        self.shapetype = shapetype
+        self.bbox = bbox
+        self.parts = parts
+        self.x = x
+        self.y = y
+        self._record = record
+        self._fields = fields
+        self._decoder = decoder
+        self._attributes = None
+        self._shape = None
+
+    def __repr__(self):
+        return 'Feature(index=%i, type=%s, points=%i)' % (self.index, self.shapetype, len(self.x))
+
+    @property
+    def attributes(self):
+        '''
+        Attribute dictionary, the values are decoded on first access.
+        '''
+        if self._attributes is None:
+            self._attributes = {}
+            if not self._record is None:
+                for f in self._fields:
+                    self._attributes[f[0]] = self._decoder(self._record, f)
+        return self._attributes
+
+    @property
+    def shape(self):
+        '''
+        The shape object of the feature. A multipoint feature with more than one point has no
+        single shape, use ``shapes`` instead.
+        '''
+        if self._shape is None:
+            points = [PointD(x, y) for x, y in zip(self.x, self.y)]
+            if self.shapetype in ('point', 'multipoint'):
+                if len(points) != 1:
+                    raise ValueError('Multipoint feature has %i points, use shapes!' % len(points))
+                shape = PointShape()
+                shape.setPoint(points[0])
+            else:
+                if self.shapetype == 'polygon':
+                    shape = PolygonShape()
+                else:
+                    shape = PolylineShape()
+                shape.setPartNum(len(self.parts))
+                shape.parts = jarray.array(self.parts, 'i')
+                shape.setPoints(points)
+            self._shape = shape
+        return self._shape
+
+    @property
+    def shapes(self):
+        '''
+        The shape objects of the feature, one point shape of each point for a multipoint feature.
+        '''
+        if self.shapetype != 'multipoint':
+            return [self.shape]
+        r = []
+        for x, y in zip(self.x, self.y):
+            shape = PointShape()
+            shape.setPoint(PointD(x, y))
+            r.append(shape)
+        return r
+
+class ShapeFileReader(object):
+    '''
+    Streaming shape file reader. The record offsets of the .shx file are used to skip the
+    records not intersecting a bounding box, and only the requested attribute fields of the
+    .dbf file are decoded.
+
+    :param fn: (*string*) The shape file name (.shp).
+    :param encoding: (*string*) Encoding of the attribute strings. Default is ``None``, the
+        encoding in .cpg file or the language driver of .dbf file is used, otherwise the encoding
+        is detected as ``utf-8``, ``gbk`` or the system default encoding.
+    '''
+    def __init__(self, fn, encoding=None):
+        base = os.path.splitext(fn)[0]
+        self.filename = fn
+        self._shp = open(fn, 'rb')
+        header = self._shp.read(100)
+        self._filelen = struct.unpack('>i', header[24:28])[0] * 2
+        self._type = struct.unpack('<i', header[32:36])[0]
+        try:
+            self.shapetype = _shapetype(self._type)
+        except ValueError:
+            self._shp.close()
+            raise
+        self.bbox = struct.unpack('<4d', header[36:68])
+        self._offsets = None
+        if os.path.exists(base + '.shx'):
+            f = open(base + '.shx', 'rb')
+            data = f.read()
+            f.close()
+            n = (len(data) - 100) // 8
+            self._offsets = [struct.unpack('>i', data[100 + i * 8:104 + i * 8])[0] * 2 for i in range(n)]
+        self._dbf = None
+        self.fields = []
+        self.numrecords = 0 if self._offsets is None else len(self._offsets)
+        ldid = 0
+        if os.path.exists(base + '.dbf'):
+            self._dbf = open(base + '.dbf', 'rb')
+            header = self._dbf.read(32)
+            self.numrecords, self._headerlen, self._reclen = struct.unpack('<IHH', header[4:12])
+            ldid = ord(header[29])
+            offset = 1
+            while True:
+                desc = self._dbf.read(32)
+                if len(desc) < 32 or desc[0] == '\r':
+                    break
+                name = desc[:11].split('\0')[0].strip()
+                ftype = desc[11]
+                flen = ord(desc[16])
+                fdec = ord(desc[17])
+                self.fields.append((name, ftype, offset, flen, fdec))
+                offset += flen
+        if encoding is None and os.path.exists(base + '.cpg'):
+            f = open(base + '.cpg')
+            encoding = _codec(f.read())
+            f.close()
+        if encoding is None:
+            encoding = _LDIDS.get(ldid)
+        if encoding is None:
+            encoding = self._detect()
+        self.encoding = encoding
+
+    def __len__(self):
+        return self.numrecords
+
+    def __repr__(self):
+        return 'ShapeFileReader(%s, type=%s, records=%i)' % (self.filename, self.shapetype, self.numrecords)
+
+    def _detect(self):
+        '''
+        Detect the encoding of the character fields from the beginning records, ``utf-8`` if they
+        are valid UTF-8 strings, otherwise ``gbk`` if they are valid GBK strings, otherwise the
+        system default encoding.
+        '''
+        if self._dbf is None:
+            return 'utf-8'
+        self._dbf.seek(self._headerlen)
+        data = self._dbf.read(min(self.numrecords * self._reclen, _NDETECT))
+        n = len(data) // self._reclen if self._reclen > 0 else 0
+        cfields = [f for f in self.fields if f[1] == 'C']
+        text = ''.join([data[i * self._reclen + f[2]:i * self._reclen + f[2] + f[3]]
+            for i in range(n) for f in cfields])
+        for encoding in ('utf-8', 'gbk'):
+            try:
+                text.decode(encoding)
+                return encoding
+            except UnicodeDecodeError:
+                pass
+        return _codec(Charset.defaultCharset().name()) or 'iso-8859-1'
+
+    def close(self):
+        '''
+        Close the files.
+        '''
+        self._shp.close()
+        if not self._dbf is None:
+            self._dbf.close()
+
+    def getfields(self, names=None):
+        '''
+        Get the descriptors of fields.
+
+        :param names: (*list*) Field names. Default is ``None``, all fields.
+
+        :returns: (*list*) Field descriptors (name, type, offset, length, decimal).
+        '''
+        if names is None:
+            return list(self.fields)
+        fnames = [f[0] for f in self.fields]
+        r = []
+        for name in names:
+            if not name in fnames:
+                raise KeyError('Field not exists: ' + name)
+            r.append(self.fields[fnames.index(name)])
+        return r
+
+    def fieldtype(self, field):
+        '''
+        Get the data type name of a field.
+
+        :param field: (*tuple*) Field descriptor.
+
+        :returns: (*string*) Data type [string | int | double].
+        '''
+        name, ftype, offset, flen, fdec = field
+        if ftype == 'N' and fdec == 0 and flen < 10:
+            return 'int'
+        elif ftype in ('N', 'F'):
+            return 'double'
+        else:
+            return 'string'
+
+    def _decode(self, record, field):
+        name, ftype, offset, flen, fdec = field
+        s = record[offset:offset + flen]
+        if ftype == 'C':
+            return s.decode(self.encoding, 'replace').strip()
+        s = s.strip()
+        if ftype in ('N', 'F'):
+            if s == '' or s.startswith('*'):
+                return None
+            try:
+                v = float(s)
+            except ValueError:
+                return None
+            if self.fieldtype(field) == 'int':
+                return int(v)
+            return v
+        elif ftype == 'D':
+            try:
+                return datetime.datetime(int(s[:4]), int(s[4:6]), int(s[6:8]))
+            except ValueError:
+                return None
+        elif ftype == 'L':
+            if s in ('Y', 'y', 'T', 't'):
+                return True
+            elif s in ('N', 'n', 'F', 'f'):
+                return False
+            return None
+        return s.decode(self.encoding, 'replace')
+
+    def _parse(self, index, content, bbox):
+        stype = struct.unpack('<i', content[:4])[0]
+        if stype == 0 or stype != self._type:
+            return None
+        base = stype % 10
+        if base == 1:
+            x, y = struct.unpack('<2d', content[4:20])
+            fbbox = (x, y, x, y)
+            if not bbox is None and not _intersects(fbbox, bbox):
+                return None
+            return Feature(index, 'point', fbbox, [0], [x], [y])
+        fbbox = struct.unpack('<4d', content[4:36])
+        if not bbox is None and not _intersects(fbbox, bbox):
+            return None
+        if base == 8:
+            nparts = 0
+            npoints = struct.unpack('<i', content[36:40])[0]
+            pos = 40
+            parts = [0]
+        else:
+            nparts, npoints = struct.unpack('<2i', content[36:44])
+            parts = list(struct.unpack('<%ii' % nparts, content[44:44 + 4 * nparts]))
+            pos = 44 + 4 * nparts
+        xy = struct.unpack('<%id' % (2 * npoints), content[pos:pos + 16 * npoints])
+        return Feature(index, _SHAPETYPES[base], fbbox, parts, list(xy[0::2]), list(xy[1::2]))
+
+    def _records(self, bbox, lazy):
+        '''
+        Generate (index, content) of the shape records. The .shx offsets are used if ``lazy``
+        is ``True``, only the record heads are read for the records out of the bounding box.
+        '''
+        shp = self._shp
+        if lazy and not self._offsets is None:
+            for i, offset in enumerate(self._offsets):
+                if not bbox is None and self._type % 10 != 1:
+                    shp.seek(offset)
+                    head = shp.read(44)
+                    clen = struct.unpack('>i', head[4:8])[0] * 2
+                    stype = struct.unpack('<i', head[8:12])[0]
+                    if stype == 0 or not _intersects(struct.unpack('<4d', head[12:44]), bbox):
+                        continue
+                    yield i, head[8:] + shp.read(clen - 36)
+                else:
+                    shp.seek(offset)
+                    clen = struct.unpack('>i', shp.read(8)[4:8])[0] * 2
+                    yield i, shp.read(clen)
+        else:
+            shp.seek(100)
+            i = 0
+            pos = 100
+            while pos < self._filelen:
+                head = shp.read(8)
+                if len(head) < 8:
+                    break
+                clen = struct.unpack('>i', head[4:8])[0] * 2
+                yield i, shp.read(clen)
+                pos += 8 + clen
+                i += 1
+
+    def features(self, bbox=None, fields=None, lazy=True):
+        '''
+        Generate the features of the shape file one at a time.
+
+        :param bbox: (*list*) Bounding box [xmin, ymin, xmax, ymax], only the features intersecting
+            the bounding box are read. Default is ``None``.
+        :param fields: (*list*) Attribute field names to be decoded. Default is ``None``, all fields.
+        :param lazy: (*boolean*) If ``True``, the records are located by the .shx offsets and the
+            attributes are decoded on first access. Otherwise the .shp file is read sequentially and
+            the attributes are decoded immediately. Default is ``True``.
+
+        :returns: Feature generator, the records marked as deleted in the .dbf file are skipped.
+        '''
+        fds = self.getfields(fields)
+        for i, content in self._records(bbox, lazy):
+            feature = self._parse(i, content, bbox)
+            if feature is None:
+                continue
+            if not self._dbf is None and i < self.numrecords:
+                self._dbf.seek(self._headerlen + i * self._reclen)
+                record = self._dbf.read(self._reclen)
+                if record[:1] == '*':
+                    continue
+                feature._record = record
+                feature._fields = fds
+                feature._decoder = self._decode
+                if not lazy:
+                    feature.attributes
+            yield feature
@@ -0,0 +1,283 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfo layer simplification pyramid module
+# Note: Jython
+#-----------------------------------------------------
+
+import heapq
+
+from org.meteoinfo.shape import PolylineShape, PolygonShape
+import jarray
+
+from milayer import MILayer
+import mipylib.miutil as miutil
+
+__all__ = [
+    'douglas_peucker','visvalingam','SimplifyPyramid','get_pyramid','simplifiable'
+    ]
+
+def _segdist2(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    d2 = dx * dx + dy * dy
+    if d2 == 0:
+        return (px - x1) ** 2 + (py - y1) ** 2
+    t = ((px - x1) * dx + (py - y1) * dy) / d2
+    t = max(0.0, min(1.0, t))
+    return (px - x1 - t * dx) ** 2 + (py - y1 - t * dy) ** 2
+
+def douglas_peucker(x, y, tolerance):
+    '''
+    Simplify a line with Douglas-Peucker algorithm.
+
+    :param x: (*list*) X coordinates.
+    :param y: (*list*) Y coordinates.
+    :param tolerance: (*float*) Maximum distance of the removed points to the simplified line.
+
+    :returns: (*list*) Indices of the kept points.
+    '''
+    n = len(x)
+    if n < 3:
+        return range(n)
+    tol2 = tolerance * tolerance
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        s, e = stack.pop()
+        dmax = -1.0
+        k = -1
+        for i in xrange(s + 1, e):
+            d = _segdist2(x[i], y[i], x[s], y[s], x[e], y[e])
+            if d > dmax:
+                dmax = d
+                k = i
+        if k > 0 and dmax > tol2:
+            keep[k] = True
+            stack.append((s, k))
+            stack.append((k, e))
+    return [i for i in xrange(n) if keep[i]]
+
+def visvalingam(x, y, tolerance):
+    '''
+    Simplify a line with Visvalingam-Whyatt algorithm, the points with effective triangle
+    area less than ``tolerance * tolerance`` are removed.
+
+    :param x: (*list*) X coordinates.
+    :param y: (*list*) Y coordinates.
+    :param tolerance: (*float*) Tolerance length.
+
+    :returns: (*list*) Indices of the kept points.
+    '''
+    n = len(x)
+    if n < 3:
+        return range(n)
+    amin = tolerance * tolerance
+    prev = range(-1, n - 1)
+    nxt = range(1, n + 1)
+    def area(i):
+        a, b = prev[i], nxt[i]
+        return abs((x[a] - x[i]) * (y[b] - y[i]) - (x[b] - x[i]) * (y[a] - y[i])) * 0.5
+    heap = [(area(i), i) for i in xrange(1, n - 1)]
+    heapq.heapify(heap)
+    areas = [None] * n
+    for a, i in heap:
+        areas[i] = a
+    removed = [False] * n
+    last = 0.0
+    while heap:
+        a, i = heapq.heappop(heap)
+        if removed[i] or a != areas[i]:
+            continue
+        #Effective area never decreases, so a removed point does not cause its neighbours to drop earlier
+        a = max(a, last)
+        if a >= amin:
+            break
+        last = a
+        removed[i] = True
+        p, q = prev[i], nxt[i]
+        nxt[p] = q
+        prev[q] = p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                areas[j] = area(j)
+                heapq.heappush(heap, (areas[j], j))
+    return [i for i in xrange(n) if not removed[i]]
+
+def simplifiable(layer):
+    '''
+    Check a layer is a line or polygon layer which can be simplified.
+
+    :param layer: (*MILayer*) The layer.
+
+    :returns: (*boolean*) Can be simplified or not.
+    '''
+    if isinstance(layer, MILayer):
+        layer = layer.layer
+    if layer.getShapeNum() == 0:
+        return False
+    return isinstance(layer.getShapes().get(0), (PolylineShape, PolygonShape))
+
+_METHODS = {'dp': douglas_peucker, 'douglas_peucker': douglas_peucker,
+    'vw': visvalingam, 'visvalingam': visvalingam}
+
+class SimplifyPyramid(object):
+    '''
+    Simplified geometry pyramid of a line or polygon layer. The tolerances of the levels are a
+    geometric series relative to the layer extent, each level is built on first request and
+    cached.
+
+    :param layer: (*MILayer*) The layer.
+    :param method: (*string*) Simplification method ['dp' | 'vw'], Douglas-Peucker or
+        Visvalingam-Whyatt. Default is ``dp``.
+    :param nlevel: (*int*) Level number. Default is ``6``.
+    :param factor: (*float*) Tolerance ratio of two adjacent levels. Default is ``4``.
+    :param finest: (*float*) Tolerance of the finest level relative to the extent width. Default
+        is ``1e-5``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    '''
+    def __init__(self, layer, method='dp', nlevel=6, factor=4., finest=1e-5, nthreads=None):
+        if isinstance(layer, MILayer):
+            layer = layer.layer
+        if not method in _METHODS:
+            raise ValueError('Not supported simplification method: ' + method)
+        self.layer = layer
+        self.method = method
+        self.nthreads = nthreads
+        extent = layer.getExtent()
+        width = max(extent.getWidth(), extent.getHeight())
+        self.tolerances = [width * finest * factor ** i for i in range(nlevel)]
+        self._levels = [None] * nlevel
+
+    def __len__(self):
+        return len(self.tolerances)
+
+    def __repr__(self):
+        return 'SimplifyPyramid(method=%s, tolerances=%s)' % (self.method, self.tolerances)
+
+    def _simplify(self, shape, tolerance):
+        if not isinstance(shape, (PolylineShape, PolygonShape)):
+            return shape
+        func = _METHODS[self.method]
+        points = list(shape.getPoints())
+        n = len(points)
+        parts = list(shape.parts) + [n]
+        ispolygon = isinstance(shape, PolygonShape)
+        npoints = []
+        nparts = []
+        for k in range(len(parts) - 1):
+            pts = points[parts[k]:parts[k + 1]]
+            inds = func([p.X for p in pts], [p.Y for p in pts], tolerance)
+            if ispolygon and len(inds) < 4:
+                continue
+            if not ispolygon and len(inds) < 2:
+                continue
+            nparts.append(len(npoints))
+            npoints.extend([pts[i] for i in inds])
+        if len(nparts) == 0:
+            return shape
+        r = shape.clone()
+        r.setPartNum(len(nparts))
+        r.parts = jarray.array(nparts, 'i')
+        r.setPoints(npoints)
+        return r
+
+    def level(self, i):
+        '''
+        Get the simplified layer of a level.
+
+        :param i: (*int*) Level index, 0 is the finest level.
+
+        :returns: (*MILayer*) Simplified layer.
+        '''
+        if self._levels[i] is None:
+            tol = self.tolerances[i]
+            shapes = list(self.layer.getShapes())
+            def block(se):
+                return [self._simplify(shapes[k], tol) for k in xrange(se[0], se[1])]
+            rr = miutil.parallel_map(block, miutil.chunks(len(shapes), self.nthreads), self.nthreads)
+            layer = self.layer.clone()
+            lshapes = layer.getShapes()
+            k = 0
+            for a in rr:
+                for shape in a:
+                    lshapes.set(k, shape)
+                    k += 1
+            self._levels[i] = MILayer(layer)
+        return self._levels[i]
+
+    def select(self, width, pixels):
+        '''
+        Select the coarsest visually lossless level, the tolerance of the level is not larger than
+        half of the pixel size.
+
+        :param width: (*float*) Width of the displayed extent in layer coordinates.
+        :param pixels: (*int*) Pixel number of the displayed width.
+
+        :returns: (*int*) Level index, ``-1`` means the full resolution layer.
+        '''
+        psize = float(width) / pixels
+        r = -1
+        for i, tol in enumerate(self.tolerances):
+            if tol <= psize * 0.5:
+                r = i
+        return r
+
+    def apply(self, layer, i):
+        '''
+        Set the shapes of a level to a copy of the pyramid layer.
+
+        :param layer: (*MILayer*) A clone of the pyramid layer.
+        :param i: (*int*) Level index, ``-1`` means the full resolution.
+        '''
+        if isinstance(layer, MILayer):
+            layer = layer.layer
+        if i < 0:
+            src = self.layer.getShapes()
+        else:
+            src = self.level(i).layer.getShapes()
+        shapes = layer.getShapes()
+        for k in xrange(src.size()):
+            shapes.set(k, src.get(k))
+
+    def layer_for(self, width, pixels):
+        '''
+        Get the layer of the coarsest visually lossless level.
+
+        :param width: (*float*) Width of the displayed extent in layer coordinates.
+        :param pixels: (*int*) Pixel number of the displayed width.
+
+        :returns: (*MILayer*) The simplified layer, or the original layer if no level is lossless.
+        '''
+        i = self.select(width, pixels)
+        if i < 0:
+            return MILayer(self.layer)
+        return self.level(i)
+
+_cache = {}
+_cache_keys = []
+_cache_size = 8
+
+def get_pyramid(layer, method='dp'):
+    '''
+    Get the cached ``SimplifyPyramid`` of a layer, a new one will be created and cached if not
+    exists.
+
+    :param layer: (*MILayer*) The layer.
+    :param method: (*string*) Simplification method ['dp' | 'vw']. Default is ``dp``.
+
+    :returns: (*SimplifyPyramid*) The pyramid.
+    '''
+    if isinstance(layer, MILayer):
+        layer = layer.layer
+    key = (id(layer), layer.getShapeNum(), method)
+    r = _cache.get(key)
+    if r is None or not r.layer is layer:
+        r = SimplifyPyramid(layer, method)
+        if not key in _cache:
+            _cache_keys.append(key)
+        _cache[key] = r
+        if len(_cache_keys) > _cache_size:
+            del _cache[_cache_keys.pop(0)]
+    return r
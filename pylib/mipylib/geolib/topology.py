@@ -9,10 +9,15 @@
 from org.meteoinfo.data import ArrayUtil
 from org.meteoinfo.shape import Graphic
 
+from milayer import MILayer
+from mipylib.numeric.spatial import STRtree
+import mipylib.miutil as miutil
+
 __all__ = [
     'buffer','contains','convexhull','coveredby','covers','crosses','difference',
     'disjoint','equals','intersection','overlaps','reform','union','symdifference',
-    'split','touches','within','asshape'
+    'split','touches','within','asshape','batch_buffer','batch_clip','batch_predicate',
+    'cascaded_union'
     ]
             
 def asshape(a):
@@ -270,4 +275,164 @@ def within(a, b):
     '''
     ap = asshape(a)
     bp = asshape(b)
-    return ap.within(bp)
\ No newline at end of file
+    return ap.within(bp)
+    
+def _asshapes(a):
+    '''
+    Get shape list from a layer, a shape or a shape list.
+    '''
+    if isinstance(a, MILayer):
+        return list(a.shapes())
+    elif isinstance(a, (list, tuple)):
+        return [asshape(s) for s in a]
+    elif hasattr(a, 'getExtent'):
+        return [asshape(a)]
+    else:
+        return [asshape(s) for s in a]
+        
+def _bbox(shape):
+    e = shape.getExtent()
+    return (e.minX, e.minY, e.maxX, e.maxY)
+    
+def _map(func, items, nthreads):
+    '''
+    Map a function on the items with a thread pool in continuous blocks.
+    '''
+    def block(se):
+        return [func(items[i]) for i in xrange(se[0], se[1])]
+    r = []
+    for b in miutil.parallel_map(block, miutil.chunks(len(items), nthreads), nthreads):
+        r.extend(b)
+    return r
+    
+def _shapetype(layer):
+    t = str(layer.getShapeType()).lower()
+    if 'polygon' in t:
+        return 'polygon'
+    elif 'line' in t:
+        return 'line'
+    return 'point'
+    
+def _tolayer(a, shapes, idx, shapetype):
+    '''
+    Create a layer of the result geometries with the projection, attribute fields and attributes
+    of the source geometries of a layer.
+    
+    :param a: (*MILayer*) The source layer.
+    :param shapes: (*list*) The result geometries.
+    :param idx: (*list*) The source geometry index of each result geometry.
+    :param shapetype: (*string*) Shape type of the result layer [point | line | polygon].
+    '''
+    src = a.layer
+    r = MILayer(shapetype=shapetype)
+    r.layer.setProjInfo(src.getProjInfo())
+    r.proj = src.getProjInfo()
+    names = []
+    for col in src.getAttributeTable().getTable().getColumns():
+        r.layer.editAddField(col.getColumnName(), col.getDataType())
+        names.append(col.getColumnName())
+    for shape, i in zip(shapes, idx):
+        r.layer.editAddShape(shape, [src.getCellValue(name, i) for name in names])
+    return r
+    
+def batch_buffer(a, dis, nthreads=None):
+    '''
+    Computes the buffers of all geometries in parallel.
+    
+    :param a: (*MILayer or list*) The layer or geometry shape list.
+    :param dis: (*float*) The buffer distance.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    
+    :returns: (*MILayer or list*) Buffer polygon layer with the attributes of the layer, or buffer
+        polygon list.
+    '''
+    r = _map(lambda s: s.buffer(dis), _asshapes(a), nthreads)
+    if isinstance(a, MILayer):
+        return _tolayer(a, r, range(len(r)), 'polygon')
+    return r
+    
+def cascaded_union(a, nthreads=None):
+    '''
+    Computes the union of all geometries by cascaded (binary tree) union. The geometries are 
+    ordered by location so the neighbors are unioned first, and each tree level is unioned 
+    in parallel.
+    
+    :param a: (*MILayer or list*) The layer or geometry shape list.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    
+    :returns: (*Shape*) Union result geometry.
+    '''
+    shapes = _asshapes(a)
+    if len(shapes) == 0:
+        return None
+    bbs = [_bbox(s) for s in shapes]
+    order = sorted(range(len(shapes)), key=lambda i: (bbs[i][0] + bbs[i][2], bbs[i][1] + bbs[i][3]))
+    shapes = [shapes[i] for i in order]
+    while len(shapes) > 1:
+        pairs = [shapes[i:i + 2] for i in range(0, len(shapes), 2)]
+        shapes = _map(lambda p: p[0].union(p[1]) if len(p) == 2 else p[0], pairs, nthreads)
+    return shapes[0]
+    
+def batch_predicate(a, b, predicate='intersects', nthreads=None):
+    '''
+    Tests a spatial predicate for all geometry pairs of two layers. The candidate pairs are pruned 
+    by an STR-tree of the bounding boxes of the second layer.
+    
+    :param a: (*MILayer or list*) The first layer or geometry shape list.
+    :param b: (*MILayer or list*) The second layer or geometry shape list.
+    :param predicate: (*string*) Predicate name [intersects | contains | within | covers | coveredby |
+        crosses | overlaps | touches].
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    
+    :returns: (*list*) Index list of the matched geometries of the second layer for each geometry of
+        the first layer.
+    '''
+    funcs = {'intersects':intersects, 'contains':contains, 'within':within, 'covers':covers,
+        'coveredby':coveredby, 'crosses':crosses, 'overlaps':overlaps, 'touches':touches}
+    if not predicate in funcs:
+        raise ValueError('Not supported predicate: ' + predicate)
+    func = funcs[predicate]
+    ashapes = _asshapes(a)
+    bshapes = _asshapes(b)
+    tree = STRtree([_bbox(s) for s in bshapes])
+    def test(s):
+        return [i for i in sorted(tree.query_bbox(_bbox(s))) if func(s, bshapes[i])]
+    return _map(test, ashapes, nthreads)
+    
+def batch_clip(a, clipobj, nthreads=None):
+    '''
+    Clip all geometries of a layer by polygons. The clip polygons are indexed by an STR-tree, 
+    the geometries within a clip polygon are kept without intersection and the others are 
+    intersected with the candidate polygons in parallel.
+    
+    :param a: (*MILayer or list*) The layer or geometry shape list.
+    :param clipobj: (*MILayer, PolygonShape or list*) Clip polygons.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    
+    :returns: (*MILayer or tuple*) Clipped layer with the attributes of the source geometries, or
+        clipped geometry list and the source geometry index of each geometry for a geometry list.
+    '''
+    shapes = _asshapes(a)
+    clips = _asshapes(clipobj)
+    tree = STRtree([_bbox(s) for s in clips])
+    def clip(s):
+        r = []
+        for i in sorted(tree.query_bbox(_bbox(s))):
+            c = clips[i]
+            if s.within(c):
+                return [s]
+            if s.intersects(c):
+                g = s.intersection(c)
+                if not g is None:
+                    r.append(g)
+        return r
+    rr = _map(clip, shapes, nthreads)
+    r = []
+    idx = []
+    for i, gs in enumerate(rr):
+        for g in gs:
+            r.append(g)
+            idx.append(i)
+    if isinstance(a, MILayer):
+        return _tolayer(a, r, idx, _shapetype(a.layer))
+    return r, idx
\ No newline at end of file
@@ -1,4 +1,10 @@
 from .meteo import *
+from .parcel import *
+from .derived import *
+from .vertical import *
 
 __all__ = []
-__all__ += meteo.__all__
\ No newline at end of file
+__all__ += meteo.__all__
+__all__ += parcel.__all__
+__all__ += derived.__all__
+__all__ += vertical.__all__
\ No newline at end of file
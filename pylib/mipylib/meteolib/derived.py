@@ -0,0 +1,359 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab chunked derived variable module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from mipylib.numeric.dimarray import DimArray
+from mipylib.numeric.fused import uv2ds_kernel
+from mipylib.dataset.dimvariable import DimVariable, TDimVariable
+from meteo import P0, Lv, Cp_d, epsilon, kappa, degCtoK
+
+from java.lang import Double
+nan = Double.NaN
+
+__all__ = [
+    'DerivedVariable','derive','writevars'
+    ]
+
+def _es(tc):
+    '''
+    Saturation vapor pressure (hPa) of temperature (degree C).
+    '''
+    return 6.112 * math.exp(17.67 * tc / (tc + 243.5))
+
+def _potential_temperature(p, t):
+    if not p > 0:
+        return nan
+    return t * (P0 / p) ** kappa
+
+def _equivalent_potential_temperature(p, t):
+    if not p > 0 or not t > 0:
+        return nan
+    es = _es(t - degCtoK)
+    rs = epsilon * es / (p - es)
+    return t * (P0 / p) ** kappa * math.exp(Lv * rs / (Cp_d * t))
+
+def _qair2rh(q, t, p):
+    if q != q or t != t or p != p:
+        return nan
+    rh = q * p / (0.378 * q + 0.622) / _es(t)
+    return max(0.0, min(1.0, rh)) * 100
+
+def _dewpoint2rh(td, t):
+    if td != td or t != t:
+        return nan
+    return 100. * _es(td) / _es(t)
+
+#Kernel name: (element function, output number)
+KERNELS = {
+    'potential_temperature': (_potential_temperature, 1),
+    'equivalent_potential_temperature': (_equivalent_potential_temperature, 1),
+    'qair2rh': (_qair2rh, 1),
+    'dewpoint2rh': (_dewpoint2rh, 1),
+    'uv2ds': (uv2ds_kernel, 2)
+    }
+
+def isvariable(a):
+    '''
+    If an object is a data file variable or not.
+    '''
+    return isinstance(a, (DimVariable, TDimVariable))
+
+def _shape(a):
+    if isvariable(a):
+        return [d.getLength() for d in a.dims]
+    if isinstance(a, MIArray):
+        return list(a.shape)
+    if isinstance(a, (list, tuple)):
+        return [len(a)]
+    return []
+
+def _flat(a):
+    if isinstance(a, MIArray):
+        return miutil.jdoubles(a.asarray())
+    if isinstance(a, (int, long, float)):
+        return jarray.array([float(a)], 'd')
+    return jarray.array([float(v) for v in a], 'd')
+
+def _broadcast(shapes, axis):
+    '''
+    Broadcast the input shapes with numpy rules, the 1-D inputs are aligned along ``axis`` of
+    the result if it is not ``None``.
+
+    :returns: (*list, list*) Result shape and the input shapes expanded to the result rank.
+    '''
+    ndim = max([len(s) for s in shapes])
+    if not axis is None:
+        if axis < 0:
+            axis += ndim
+        if axis < 0 or axis >= ndim:
+            raise ValueError('The axis %i is out of the result dimensions %i!' % (axis, ndim))
+    expanded = []
+    for s in shapes:
+        if len(s) == 1 and not axis is None:
+            es = [1] * ndim
+            es[axis] = s[0]
+        else:
+            es = [1] * (ndim - len(s)) + list(s)
+        expanded.append(es)
+    shape = []
+    for d in range(ndim):
+        n = 1
+        for es in expanded:
+            if es[d] != 1:
+                if n != 1 and es[d] != n:
+                    raise ValueError('The input shapes %s can not be broadcast together!' % shapes)
+                n = es[d]
+        shape.append(n)
+    return shape, expanded
+
+class _Source(object):
+    '''
+    Aligned chunk reader of the broadcast inputs with a one chunk cache of the kernel outputs.
+    '''
+    def __init__(self, func, nout, inputs, chunksize, nthreads, axis=None):
+        self.func = func
+        self.nout = nout
+        self.inputs = list(inputs)
+        self.nthreads = nthreads
+        shapes = [_shape(a) for a in self.inputs]
+        if max([len(s) for s in shapes]) == 0:
+            raise ValueError('At least one input must be an array or a variable!')
+        self.shape, self._shapes = _broadcast(shapes, axis)
+        self.like = None
+        for a, s in zip(self.inputs, shapes):
+            if s == self.shape and (self.like is None or hasattr(a, 'dims')):
+                self.like = a
+        self.slabsize = 1
+        for s in self.shape[1:]:
+            self.slabsize *= s
+        self.chunksize = max(1, chunksize or 1)
+        self._key = None
+        self._outputs = None
+
+    def _read(self, a, es, start, end):
+        '''
+        Read flat values of an input for the slabs [start, end) of the leading dimension, an input
+        broadcast over the leading dimension is read entirely.
+        '''
+        s = _shape(a)
+        if len(s) == 0 or len(s) < len(self.shape) or es[0] == 1:
+            if isvariable(a):
+                r = a[tuple([slice(None)] * len(s))]
+                if isinstance(r, MIArray):
+                    return miutil.jdoubles(r.asarray())
+                return jarray.array([float(r)], 'd')
+            return _flat(a)
+        if isinstance(a, (list, tuple)):
+            return _flat(a[start:end])
+        key = tuple([slice(start, end)] + [slice(None)] * (len(s) - 1))
+        r = a[key]
+        if isinstance(r, MIArray):
+            return miutil.jdoubles(r.asarray())
+        return jarray.array([float(r)], 'd')
+
+    def _index(self, es, cshape):
+        '''
+        Get the flat index function of a broadcast input in a chunk with the shape, ``None`` means
+        the input has the chunk shape.
+        '''
+        ishape = list(es)
+        if ishape[0] != 1:
+            ishape[0] = cshape[0]
+        if ishape == cshape:
+            return None
+        ndim = len(cshape)
+        terms = []
+        ostride = 1
+        istride = 1
+        for d in range(ndim - 1, -1, -1):
+            if ishape[d] != 1:
+                terms.append((ostride, cshape[d], istride))
+            ostride *= cshape[d]
+            istride *= ishape[d]
+        if len(terms) == 0:
+            return lambda i: 0
+        def index(i):
+            k = 0
+            for ost, n, st in terms:
+                k += (i // ost) % n * st
+            return k
+        return index
+
+    def compute(self, start, end):
+        '''
+        Compute the kernel outputs for the slabs [start, end) of the leading dimension.
+
+        :returns: (*list*) Flat Java double arrays of the outputs.
+        '''
+        if self._key == (start, end):
+            return self._outputs
+        cshape = [end - start] + self.shape[1:]
+        n = (end - start) * self.slabsize
+        data = [self._read(a, es, start, end) for a, es in zip(self.inputs, self._shapes)]
+        indices = [self._index(es, cshape) for es in self._shapes]
+        outs = [jarray.zeros(n, 'd') for k in range(self.nout)]
+        func = self.func
+        nout = self.nout
+        def block(se):
+            for i in xrange(se[0], se[1]):
+                r = func(*[d[i] if idx is None else d[idx(i)] for d, idx in zip(data, indices)])
+                if nout == 1:
+                    outs[0][i] = r
+                else:
+                    for k in range(nout):
+                        outs[k][i] = r[k]
+        miutil.parallel_map(block, miutil.chunks(n, self.nthreads), self.nthreads)
+        self._key = (start, end)
+        self._outputs = outs
+        return outs
+
+    def dims(self, start, end):
+        if self.like is None or not isinstance(self.like, (DimArray, DimVariable, TDimVariable)):
+            return None
+        dims = list(self.like.dims)
+        dims[0] = dims[0].extract(start, end - 1, 1)
+        return dims
+
+class DerivedVariable(object):
+    '''
+    Lazy derived variable calculated from aligned chunks of the input variables or arrays along the
+    leading (i.e. time) dimension, so the inputs are never fully loaded into memory.
+
+    :param source: (*_Source*) Chunk source.
+    :param index: (*int*) Output index of the kernel.
+    '''
+    def __init__(self, source, index=0):
+        self._source = source
+        self.index = index
+        self.shape = list(source.shape)
+        self.ndim = len(self.shape)
+        self.chunksize = source.chunksize
+        like = source.like
+        self.fill_value = getattr(like, 'fill_value', nan)
+        self.proj = getattr(like, 'proj', None)
+
+    def __len__(self):
+        n = 1
+        for s in self.shape:
+            n *= s
+        return n
+
+    def __repr__(self):
+        return 'DerivedVariable(shape=%s, chunksize=%i)' % (self.shape, self.chunksize)
+
+    def _slab(self, start, end):
+        data = self._source.compute(start, end)[self.index]
+        a = MIArray(miutil.fromjdoubles(data, [end - start] + self.shape[1:]))
+        dims = self._source.dims(start, end)
+        if dims is None:
+            return a
+        return DimArray(a, dims, self.fill_value, self.proj)
+
+    def chunks(self):
+        '''
+        Generate the result chunks.
+
+        :returns: Generator of (start index, chunk array) tuples.
+        '''
+        for s in range(0, self.shape[0], self.chunksize):
+            e = min(s + self.chunksize, self.shape[0])
+            yield s, self._slab(s, e)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        k = key[0]
+        n = self.shape[0]
+        if isinstance(k, int):
+            if k < 0:
+                k += n
+            r = self._slab(k, k + 1)
+            key = (0,) + key[1:]
+        elif isinstance(k, slice):
+            start, stop, step = k.indices(n)
+            if step != 1:
+                raise ValueError('Only slices with step 1 are supported on the leading dimension!')
+            r = self._slab(start, stop)
+            key = (slice(None),) + key[1:]
+        else:
+            raise ValueError('Not supported index: ' + str(k))
+        key = key + (slice(None),) * (self.ndim - len(key))
+        return r[key]
+
+    def compute(self):
+        '''
+        Compute the whole result array.
+
+        :returns: (*DimArray*) Result array.
+        '''
+        return self[:]
+
+    def tofile(self, ncfile, variable):
+        '''
+        Write the result chunk by chunk into a variable of a netCDF file created by ``addfile``
+        with ``access='c'``.
+
+        :param ncfile: (*DimDataFile*) The output data file.
+        :param variable: (*DimVariable*) The output variable with the result shape.
+        '''
+        writevars(ncfile, [self], [variable])
+
+def writevars(ncfile, results, variables):
+    '''
+    Write derived variables into netCDF variables, the derived variables sharing a kernel (i.e. wind
+    direction and speed) are calculated only once for each chunk.
+
+    :param ncfile: (*DimDataFile*) The output data file.
+    :param results: (*list*) Derived variables.
+    :param variables: (*list*) Output variables.
+    '''
+    n = results[0].shape[0]
+    cs = results[0].chunksize
+    for s in range(0, n, cs):
+        e = min(s + cs, n)
+        for r, var in zip(results, variables):
+            ncfile.write(var, r._slab(s, e), [s] + [0] * (r.ndim - 1))
+    ncfile.flush()
+
+def derive(name, inputs, **kwargs):
+    '''
+    Create lazy derived variables of a kernel.
+
+    :param name: (*string*) Kernel name [potential_temperature | equivalent_potential_temperature |
+        qair2rh | dewpoint2rh | uv2ds].
+    :param inputs: (*list*) Input variables, arrays or numbers. The shapes are broadcast with numpy
+        rules, i.e. the arrays with less dimensions are aligned with the trailing dimensions.
+    :param axis: (*int*) Result dimension the 1-D inputs are aligned along, i.e. ``1`` for pressure
+        levels of (time, level, lat, lon) variables. Default is ``None``, numpy broadcasting.
+    :param chunksize: (*int*) Slab number of the leading dimension in each chunk. Default is ``1``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    :param out: (*tuple or list*) Output (DimDataFile, variable) tuple, or a list of the tuples for
+        the kernels with multiple outputs. The results are written into the variables and ``None``
+        is returned. Default is ``None``, the lazy results are returned.
+
+    :returns: (*DerivedVariable or tuple*) Lazy derived variable(s).
+    '''
+    func, nout = KERNELS[name]
+    chunksize = kwargs.pop('chunksize', 1)
+    nthreads = kwargs.pop('nthreads', None)
+    axis = kwargs.pop('axis', None)
+    out = kwargs.pop('out', None)
+    source = _Source(func, nout, inputs, chunksize, nthreads, axis)
+    r = [DerivedVariable(source, k) for k in range(nout)]
+    if not out is None:
+        if isinstance(out, tuple):
+            out = [out]
+        writevars(out[0][0], r, [o[1] for o in out])
+        return None
+    if nout == 1:
+        return r[0]
+    return tuple(r)
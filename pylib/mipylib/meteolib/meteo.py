@@ -10,6 +10,7 @@ from org.meteoinfo.data.analysis import MeteoMath
 import mipylib.numeric as np
 from mipylib.numeric.miarray import MIArray
 from mipylib.numeric.dimarray import DimArray
+import mipylib.numeric.fused as fused
 
 P0 = 1000.          #reference pressure for potential temperature (hPa)
 R = 8.3144598       #molar gas constant (J / K / mol)
@@ -26,20 +27,53 @@ g = 9.8             # Gravitational acceleration (m / s^2)
 __all__ = [
     'dewpoint2rh','dry_lapse','ds2uv','equivalent_potential_temperature','h2p',
     'mixing_ratio','moist_lapse','p2h','potential_temperature','qair2rh','rh2dewpoint',
-    'saturation_mixing_ratio','tc2tf','tf2tc','uv2ds','pressure_to_height_std',
+    'saturation_mixing_ratio','saturation_vapor_pressure','tc2tf','tf2tc','uv2ds','pressure_to_height_std',
     'height_to_pressure_std','eof','varimax'
     ]
 
-def uv2ds(u, v):
+def _isstream(inputs, kwargs):
+    '''
+    If the calculation should be chunked - any input is a data file variable or the chunk
+    options are set.
+    '''
+    from derived import isvariable
+    if 'chunksize' in kwargs:
+        return True
+    out = kwargs.get('out', None)
+    if isinstance(out, tuple) or (isinstance(out, list) and len(out) > 0 and isinstance(out[0], tuple)):
+        return True
+    for a in inputs:
+        if isvariable(a):
+            return True
+    return False
+    
+def _derive(name, inputs, **kwargs):
+    from derived import derive
+    return derive(name, inputs, **kwargs)
+
+def uv2ds(u, v, **kwargs):
     '''
     Calculate wind direction and wind speed from U/V.
     
     :param u: (*array_like*) U component of wind field.
     :param v: (*array_like*) V component of wind field.
+    :param chunksize: (*int*) Optional, chunk size of the leading dimension for the chunked
+        calculation of data file variables. See ``derive``.
+    :param out: (*list*) Optional, [d, s] output arrays to be filled, or [(ncfile, dvar), (ncfile, svar)]
+        output variables to write into for the chunked calculation.
+    :param nthreads: (*int*) Optional, thread number. If ``out`` or ``nthreads`` is set for arrays, the
+        arrays are calculated in parallel chunks which are written into the output arrays. See
+        ``fused.chunked_apply``.
     
     :returns: Wind direction and wind speed.
     '''
+    if _isstream([u, v], kwargs):
+        return _derive('uv2ds', [u, v], **kwargs)
+    out = kwargs.pop('out', None)
+    nthreads = kwargs.pop('nthreads', None)
     if isinstance(u, MIArray):
+        if not (out is None and nthreads is None):
+            return fused.chunked_apply(ArrayMath.uv2ds, [u, v], 2, out, nthreads)
         r = ArrayMath.uv2ds(u.asarray(), v.asarray())
         d = MIArray(r[0])
         s = MIArray(r[1])
@@ -51,16 +85,22 @@ def uv2ds(u, v):
         r = ArrayMath.uv2ds(u, v)
         return r[0], r[1]
         
-def ds2uv(d, s):
+def ds2uv(d, s, out=None, nthreads=None):
     '''
     Calculate U/V from wind direction and wind speed.
     
     :param d: (*array_like*) Wind direction.
     :param s: (*array_like*) Wind speed.
+    :param out: (*list*) Optional, [u, v] output arrays to be filled.
+    :param nthreads: (*int*) Optional, thread number. If ``out`` or ``nthreads`` is set for arrays, the
+        arrays are calculated in parallel chunks which are written into the output arrays. See
+        ``fused.chunked_apply``.
     
     :returns: Wind U/V.
     '''
     if isinstance(d, MIArray):
+        if not (out is None and nthreads is None):
+            return fused.chunked_apply(ArrayMath.ds2uv, [d, s], 2, out, nthreads)
         r = ArrayMath.ds2uv(d.asarray(), s.asarray())
         u = MIArray(r[0])
         v = MIArray(r[1])
@@ -169,7 +209,7 @@ def tc2tf(tc):
     else:
         return MeteoMath.tc2tf(tc)
 
-def qair2rh(qair, temp, press=1013.25):
+def qair2rh(qair, temp, press=1013.25, **kwargs):
     """
     Specific humidity to relative humidity
         
@@ -179,10 +219,16 @@ def qair2rh(qair, temp, press=1013.25):
         Temperature - degree c
     press: DimArray or MIArray or number
         Pressure - hPa (mb)
+    chunksize: int, optional
+        Chunk size of the leading dimension for the chunked calculation of data file variables
+    out: tuple, optional
+        (ncfile, variable) output variable to write into
     
     return: DimArray or MIArray or number
         Relative humidity - %
     """    
+    if _isstream([qair, temp, press], kwargs):
+        return _derive('qair2rh', [qair, temp, press], **kwargs)
     if isinstance(press, MIArray) or isinstance(press, DimArray):
         p = press.asarray()
     else:
@@ -195,7 +241,7 @@ def qair2rh(qair, temp, press=1013.25):
     else:
         return MeteoMath.qair2rh(qair, temp, press)
         
-def dewpoint2rh(dewpoint, temp):    
+def dewpoint2rh(dewpoint, temp, **kwargs):    
     """
     Dew point to relative humidity
         
@@ -203,10 +249,16 @@ def dewpoint2rh(dewpoint, temp):
         Dew point - degree c
     temp: DimArray or MIArray or number
         Temperature - degree c
+    chunksize: int, optional
+        Chunk size of the leading dimension for the chunked calculation of data file variables
+    out: tuple, optional
+        (ncfile, variable) output variable to write into
         
     return: DimArray or MIArray or number
         Relative humidity - %
     """    
+    if _isstream([dewpoint, temp], kwargs):
+        return _derive('dewpoint2rh', [dewpoint, temp], **kwargs)
     if isinstance(dewpoint, MIArray):
         r = MIArray(MeteoMath.dewpoint2rh(dewpoint.asarray(), temp.asarray()))
         if isinstance(dewpoint, DimArray):
@@ -235,7 +287,7 @@ def rh2dewpoint(rh, temp):
     else:
         return MeteoMath.rh2dewpoint(rh, temp)     
 
-def potential_temperature(pressure, temperature):
+def potential_temperature(pressure, temperature, **kwargs):
     """
     Calculate the potential temperature.
     Uses the Poisson equation to calculation the potential temperature
@@ -246,6 +298,11 @@ def potential_temperature(pressure, temperature):
         The total atmospheric pressure
     temperature : array_like
         The temperature
+    chunksize : int, optional
+        Chunk size of the leading dimension for the chunked calculation of data
+        file variables, a lazy ``DerivedVariable`` is returned
+    out : tuple, optional
+        (ncfile, variable) output variable to write into
     Returns
     -------
     array_like
@@ -264,6 +321,8 @@ def potential_temperature(pressure, temperature):
     >>> metpy.calc.potential_temperature(800. * units.mbar, 273. * units.kelvin)
     290.9814150577374
     """
+    if _isstream([pressure, temperature], kwargs):
+        return _derive('potential_temperature', [pressure, temperature], **kwargs)
 
     return temperature * (P0 / pressure)**kappa
 
@@ -328,13 +387,8 @@ def moist_lapse(pressure, temperature):
     .. [1] Bakhshaii, A. and R. Stull, 2013: Saturated Pseudoadiabats--A
            Noniterative Approximation. J. Appl. Meteor. Clim., 52, 5-15.
     """
-
-    def dt(t, p):
-        rs = saturation_mixing_ratio(p, t)
-        frac = ((Rd * t + Lv * rs) /
-                (Cp_d + (Lv * Lv * rs * epsilon / (Rd * t * t)))).to('kelvin')
-        return frac / p
-    return dt
+    from parcel import moist_lapse_profile
+    return moist_lapse_profile(pressure, temperature)
                                     
 def mixing_ratio(part_press, tot_press):
     """
@@ -359,6 +413,28 @@ def mixing_ratio(part_press, tot_press):
 
     return epsilon * part_press / (tot_press - part_press)
 
+def saturation_vapor_pressure(temperature):
+    """
+    Calculate the saturation water vapor (partial) pressure
+    Parameters
+    ----------
+    temperature : array_like
+        The temperature - K
+    Returns
+    -------
+    array_like
+        The saturation water vapor (partial) pressure - hPa
+    Notes
+    -----
+    Instead of temperature, dewpoint may be used in order to calculate
+    the actual (ambient) water vapor (partial) pressure.
+    The formula used is that from [Bolton1980]_ for T in degrees Celsius:
+    .. math:: 6.112 e^\frac{17.67T}{T + 243.5}
+    """
+
+    tc = temperature - degCtoK
+    return 6.112 * np.exp(17.67 * tc / (tc + 243.5))
+
 def saturation_mixing_ratio(tot_press, temperature):
     """
     Calculates the saturation mixing ratio given total pressure
@@ -382,7 +458,7 @@ def saturation_mixing_ratio(tot_press, temperature):
 
     return mixing_ratio(saturation_vapor_pressure(temperature), tot_press)
 
-def equivalent_potential_temperature(pressure, temperature):
+def equivalent_potential_temperature(pressure, temperature, **kwargs):
     """
     Calculates equivalent potential temperature given an air parcel's
     pressure and temperature.
@@ -393,6 +469,11 @@ def equivalent_potential_temperature(pressure, temperature):
         Total atmospheric pressure
     temperature: array_like
         The temperature
+    chunksize: int, optional
+        Chunk size of the leading dimension for the chunked calculation of data
+        file variables, a lazy ``DerivedVariable`` is returned
+    out: tuple, optional
+        (ncfile, variable) output variable to write into
     Returns
     -------
     array_like
@@ -405,6 +486,8 @@ def equivalent_potential_temperature(pressure, temperature):
     .. [5] Hobbs, Peter V. and Wallace, John M., 1977: Atmospheric Science, an Introductory
             Survey. 78-79.
     """
+    if _isstream([pressure, temperature], kwargs):
+        return _derive('equivalent_potential_temperature', [pressure, temperature], **kwargs)
 
     pottemp = potential_temperature(pressure, temperature)
     smixr = saturation_mixing_ratio(pressure, temperature)
@@ -0,0 +1,211 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab vectorized parcel module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+
+from org.meteoinfo.data.meteodata import Dimension, DimensionType
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from mipylib.numeric.dimarray import DimArray
+from meteo import Rd, Lv, Cp_d, epsilon, kappa, degCtoK
+
+from java.lang import Double
+nan = Double.NaN
+
+__all__ = [
+    'lcl','moist_lapse_profile','parcel_profile'
+    ]
+
+#Gas constant for dry air (J (K kg)^-1)
+_Rd = Rd * 1000.
+#Maximum pressure step of the moist adiabat integration (hPa)
+_DP = 5.
+
+def _es(t):
+    '''
+    Saturation vapor pressure (hPa) of temperature (K).
+    '''
+    return 6.112 * math.exp(17.67 * (t - degCtoK) / (t - 29.65))
+
+def _dtdp(t, p):
+    es = _es(t)
+    rs = epsilon * es / (p - es)
+    return (_Rd * t + Lv * rs) / (Cp_d + Lv * Lv * rs * epsilon / (_Rd * t * t)) / p
+
+def _moist(t, p0, p1):
+    '''
+    Integrate a moist pseudo-adiabat from pressure p0 to p1 with 4th order Runge-Kutta steps.
+    '''
+    n = max(1, int(math.ceil(abs(p1 - p0) / _DP)))
+    h = (p1 - p0) / n
+    p = p0
+    for i in xrange(n):
+        k1 = _dtdp(t, p)
+        k2 = _dtdp(t + 0.5 * h * k1, p + 0.5 * h)
+        k3 = _dtdp(t + 0.5 * h * k2, p + 0.5 * h)
+        k4 = _dtdp(t + h * k3, p + h)
+        t += h * (k1 + 2 * k2 + 2 * k3 + k4) / 6.
+        p += h
+    return t
+
+def _lcl(p, t, td):
+    '''
+    LCL pressure and temperature of a parcel, Bolton (1980) equation 15.
+    '''
+    if td > t:
+        td = t
+    tl = 1. / (1. / (td - 56.) + math.log(t / td) / 800.) + 56.
+    return p * (tl / t) ** (1. / kappa), tl
+
+def _flat(a, n=None):
+    '''
+    Get flat double values and shape of an array or a number.
+    '''
+    if isinstance(a, MIArray):
+        return miutil.jdoubles(a.asarray()), list(a.shape)
+    if isinstance(a, (list, tuple)):
+        return jarray.array([float(v) for v in a], 'd'), [len(a)]
+    return jarray.array([float(a)] * (n or 1), 'd'), []
+
+def _columns(func, ncol, nout, nthreads):
+    '''
+    Run a column kernel in parallel blocks, the kernel returns ``nout`` values of a column,
+    and the result values are ordered output index first.
+    '''
+    def block(se):
+        return [func(c) for c in xrange(se[0], se[1])]
+    rr = miutil.parallel_map(block, miutil.chunks(ncol, nthreads), nthreads)
+    r = jarray.zeros(nout * ncol, 'd')
+    c = 0
+    for a in rr:
+        for vals in a:
+            for k in xrange(nout):
+                r[k * ncol + c] = vals[k]
+            c += 1
+    return r
+
+def _result(data, shape, like, levels=None):
+    if not shape:
+        return data[0]
+    a = MIArray(miutil.fromjdoubles(data, shape or [1]))
+    if isinstance(like, DimArray):
+        dims = list(like.dims)
+        if not levels is None:
+            zdim = Dimension(DimensionType.Z)
+            zdim.setDimValues(list(levels))
+            dims = [zdim] + dims
+        return DimArray(a, dims, like.fill_value, like.proj)
+    return a
+
+def lcl(pressure, temperature, dewpoint, nthreads=None):
+    '''
+    Calculate lifting condensation level (LCL) of parcels.
+
+    :param pressure: (*array_like*) Starting pressure of the parcels - hPa.
+    :param temperature: (*array_like*) Starting temperature of the parcels - K.
+    :param dewpoint: (*array_like*) Starting dew point of the parcels - K.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*array_like, array_like*) LCL pressure (hPa) and temperature (K) with the shape of
+        ``temperature``.
+    '''
+    t, shape = _flat(temperature)
+    n = len(t)
+    td = _flat(dewpoint, n)[0]
+    p = _flat(pressure, n)[0]
+    def func(c):
+        if t[c] != t[c] or td[c] != td[c] or p[c] != p[c]:
+            return nan, nan
+        return _lcl(p[c], t[c], td[c])
+    r = _columns(func, n, 2, nthreads)
+    return _result(r[:n], shape, temperature), _result(r[n:], shape, temperature)
+
+def _levels(pressure):
+    if isinstance(pressure, MIArray):
+        return pressure.aslist()
+    if isinstance(pressure, (list, tuple)):
+        return list(pressure)
+    return [pressure]
+
+def moist_lapse_profile(pressure, temperature, ref_pressure=None, nthreads=None):
+    '''
+    Calculate temperature along moist pseudo-adiabats of many parcels. The adiabats are integrated
+    with 4th order Runge-Kutta steps not larger than 5 hPa, columns are processed in parallel.
+
+    :param pressure: (*array_like*) 1-D pressure levels - hPa.
+    :param temperature: (*array_like*) Starting temperature of the parcels - K.
+    :param ref_pressure: (*array_like*) Starting pressure of the parcels - hPa. Default is ``None``,
+        the first pressure level.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*array_like*) Parcel temperature with shape of levels plus the shape of ``temperature``.
+    '''
+    levels = _levels(pressure)
+    nlev = len(levels)
+    t, shape = _flat(temperature)
+    n = len(t)
+    p0 = _flat(levels[0] if ref_pressure is None else ref_pressure, n)[0]
+    def func(c):
+        r = []
+        tt = t[c]
+        pp = p0[c]
+        for p in levels:
+            if tt != tt or pp != pp:
+                r.append(nan)
+                continue
+            tt = _moist(tt, pp, p)
+            pp = p
+            r.append(tt)
+        return r
+    r = _columns(func, n, nlev, nthreads)
+    return _result(r, [nlev] + shape, temperature, levels)
+
+def parcel_profile(pressure, temperature, dewpoint, ref_pressure=None, nthreads=None):
+    '''
+    Calculate parcel temperature profiles of many parcels. The parcels are lifted dry adiabatically
+    to the LCL and moist pseudo-adiabatically above, columns are processed in parallel.
+
+    :param pressure: (*array_like*) 1-D pressure levels - hPa.
+    :param temperature: (*array_like*) Starting temperature of the parcels - K, i.e. 2-D surface
+        temperature of a model grid.
+    :param dewpoint: (*array_like*) Starting dew point of the parcels - K.
+    :param ref_pressure: (*array_like*) Starting pressure of the parcels - hPa, i.e. surface pressure.
+        Default is ``None``, the first pressure level.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*array_like*) Parcel temperature with shape of levels plus the shape of ``temperature``,
+        NaN for the levels below the starting pressure.
+    '''
+    levels = _levels(pressure)
+    nlev = len(levels)
+    t, shape = _flat(temperature)
+    n = len(t)
+    td = _flat(dewpoint, n)[0]
+    p0 = _flat(levels[0] if ref_pressure is None else ref_pressure, n)[0]
+    def func(c):
+        tt = t[c]
+        pp = p0[c]
+        if tt != tt or td[c] != td[c] or pp != pp:
+            return [nan] * nlev
+        plcl, tlcl = _lcl(pp, tt, td[c])
+        r = []
+        tm = tlcl
+        pm = plcl
+        for p in levels:
+            if p > pp:
+                r.append(nan)
+            elif p >= plcl:
+                r.append(tt * (p / pp) ** kappa)
+            else:
+                tm = _moist(tm, pm, p)
+                pm = p
+                r.append(tm)
+        return r
+    r = _columns(func, n, nlev, nthreads)
+    return _result(r, [nlev] + shape, temperature, levels)
@@ -0,0 +1,264 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab vertical remapping module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+
+from org.meteoinfo.data.meteodata import Dimension, DimensionType
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from mipylib.numeric.dimarray import DimArray
+from mipylib.numeric.interpolate.interpolate import _column, _interpcol
+from mipylib.dataset.dimvariable import DimVariable, TDimVariable
+
+from java.lang import Double
+nan = Double.NaN
+
+__all__ = [
+    'vinterp','vinterp_chunks'
+    ]
+
+#Standard atmosphere lapse rate (K/m)
+_GAMMA = 0.0065
+#Exponent of the standard lapse rate in pressure coordinate: Rd * gamma / g
+_LAPSE_EXP = 287.04 * _GAMMA / 9.80665
+
+def _remap(xs, ys, levels, log, ground_high, below, above):
+    '''
+    Remap a column to target levels with the options out of the column range.
+    '''
+    r = _interpcol(xs, ys, levels, log, below == 'linear' and above == 'linear')
+    n = len(xs)
+    if n == 0:
+        return r
+    lo = xs[0]
+    hi = xs[-1]
+    for k, v in enumerate(levels):
+        if not r[k] != r[k] or v != v or (log and v <= 0):
+            continue
+        xv = math.log(v) if log else v
+        if lo <= xv <= hi:
+            continue
+        isbelow = (xv > hi) == ground_high
+        opt = below if isbelow else above
+        i = n - 1 if xv > hi else 0
+        if opt == 'nearest':
+            r[k] = ys[i]
+        elif opt == 'linear' and n > 1:
+            j = n - 2 if i == n - 1 else 1
+            r[k] = ys[i] + (ys[i] - ys[j]) * (xv - xs[i]) / (xs[i] - xs[j])
+        elif opt == 'lapse' and isbelow:
+            xg = math.exp(xs[i]) if log else xs[i]
+            if ground_high:
+                r[k] = ys[i] * (v / xg) ** _LAPSE_EXP
+            else:
+                r[k] = ys[i] + _GAMMA * (xg - v)
+    return r
+
+def _flat(a):
+    if isinstance(a, MIArray):
+        return miutil.jdoubles(a.asarray()), list(a.shape)
+    if isinstance(a, (list, tuple)):
+        return jarray.array([float(v) for v in a], 'd'), [len(a)]
+    return jarray.array([float(a)], 'd'), []
+
+def _vinterp(ya, shape, xa, xshape, levels, axis, log, ground_high, below, above, nthreads):
+    '''
+    Remap flat data with the shape along an axis, the coordinates are 1-D, same shape with the
+    data, or the data shape without the leading dimensions.
+    '''
+    n = shape[axis]
+    m = len(levels)
+    nout = 1
+    for s in shape[:axis]:
+        nout *= s
+    nin = 1
+    for s in shape[axis + 1:]:
+        nin *= s
+    xsize = len(xa)
+    xcol = len(xshape) == 1
+    if xcol and xsize != n:
+        raise ValueError('The 1-D coordinate length %i is not consistent with the data vertical dimension length %i!' % (xsize, n))
+    if not xcol and (xsize == 0 or (nout * n * nin) % xsize != 0 or xshape[-len(shape[axis:]):] != shape[axis:]):
+        raise ValueError('The coordinate shape is not consistent with the data shape!')
+    xnout = 1 if xcol else xsize // (n * nin)
+    r = jarray.zeros(nout * m * nin, 'd')
+    def columns(se):
+        for c in xrange(se[0], se[1]):
+            o = c // nin
+            i = c % nin
+            yc = [ya[(o * n + k) * nin + i] for k in xrange(n)]
+            if xcol:
+                xc = xa
+            else:
+                xo = o % xnout
+                xc = [xa[(xo * n + k) * nin + i] for k in xrange(n)]
+            xs, ys = _column(xc, yc, log)
+            rc = _remap(xs, ys, levels, log, ground_high, below, above)
+            for k in xrange(m):
+                r[(o * m + k) * nin + i] = rc[k]
+    miutil.parallel_map(columns, miutil.chunks(nout * nin, nthreads), nthreads)
+    rshape = list(shape)
+    rshape[axis] = m
+    return r, rshape
+
+def _result(r, rshape, dims, axis, levels, fill_value, proj):
+    a = MIArray(miutil.fromjdoubles(r, rshape))
+    if dims is None:
+        return a
+    dims = list(dims)
+    dim = Dimension(DimensionType.Z)
+    dim.setDimValues(list(levels))
+    dims[axis] = dim
+    return DimArray(a, dims, fill_value, proj)
+
+def _options(kwargs):
+    coordtype = kwargs.pop('coordtype', 'pressure')
+    if not coordtype in ['pressure', 'height']:
+        raise ValueError('Not supported coordinate type: ' + coordtype)
+    log = kwargs.pop('log', coordtype == 'pressure')
+    below = kwargs.pop('below', 'nan')
+    above = kwargs.pop('above', 'nan')
+    if not below in ['nan', 'nearest', 'linear', 'lapse']:
+        raise ValueError('Not supported extrapolation option below the model levels: ' + below)
+    if not above in ['nan', 'nearest', 'linear']:
+        raise ValueError('Not supported extrapolation option above the model levels: ' + above)
+    nthreads = kwargs.pop('nthreads', None)
+    return log, coordtype == 'pressure', below, above, nthreads
+
+def _isvariable(a):
+    return isinstance(a, (DimVariable, TDimVariable))
+
+def _readslab(a, start, end):
+    '''
+    Read the slabs [start, end) of the leading dimension of a data file variable.
+    '''
+    shape = [d.getLength() for d in a.dims]
+    key = tuple([slice(start, end)] + [slice(None)] * (len(shape) - 1))
+    r = a[key]
+    shape[0] = end - start
+    dims = list(a.dims)
+    dims[0] = dims[0].extract(start, end - 1, 1)
+    return miutil.jdoubles(r.asarray()), shape, dims
+
+def vinterp_chunks(data, coord, levels, **kwargs):
+    '''
+    Remap a 4-D data file variable to target vertical levels chunk by chunk along the leading
+    (time) dimension, so the variable is never fully loaded into memory.
+
+    :param data: (*DimVariable*) The data variable, i.e. (time, level, lat, lon).
+    :param coord: (*DimVariable or array_like*) The vertical coordinate (pressure or height), a variable
+        with same shape of the data, or an array with the shape of the data without the time dimension,
+        or 1-D levels.
+    :param levels: (*array_like*) Target levels.
+    :param axis: (*int*) The vertical axis, can not be the leading axis. Default is ``ndim - 3``.
+    :param chunksize: (*int*) Time step number of each chunk. Default is ``1``.
+    :param kwargs: Other options of ``vinterp``.
+
+    :returns: Generator of (start index, DimArray) tuples.
+    '''
+    chunksize = kwargs.pop('chunksize', 1)
+    ndim = len(data.dims)
+    axis = kwargs.pop('axis', None)
+    if axis is None:
+        axis = max(0, ndim - 3)
+    elif axis < 0:
+        axis += ndim
+    if axis == 0:
+        raise ValueError('The variable can not be chunked along its vertical axis!')
+    log, ground_high, below, above, nthreads = _options(kwargs)
+    if isinstance(levels, MIArray):
+        levels = levels.aslist()
+    levels = list(levels)
+    nt = data.dims[0].getLength()
+    if _isvariable(coord) and len(coord.dims) < ndim:
+        coord = coord[tuple([slice(None)] * len(coord.dims))]
+    if not _isvariable(coord):
+        xa, xshape = _flat(coord)
+    for s in range(0, nt, chunksize):
+        e = min(s + chunksize, nt)
+        ya, shape, dims = _readslab(data, s, e)
+        if _isvariable(coord):
+            xa, xshape = _readslab(coord, s, e)[:2]
+        r, rshape = _vinterp(ya, shape, xa, xshape, levels, axis, log, ground_high, below, above, nthreads)
+        yield s, _result(r, rshape, dims, axis, levels, data.fill_value, getattr(data, 'proj', None))
+
+def vinterp(data, coord, levels, **kwargs):
+    '''
+    Remap data from model levels (sigma, hybrid or height levels) to pressure or height levels.
+    The columns are interpolated in parallel, linearly in logarithm of pressure by default.
+
+    :param data: (*array_like or DimVariable*) The data, i.e. 3-D (level, lat, lon) or 4-D (time, level,
+        lat, lon) array. A 4-D data file variable is streamed over time, the other data file variables
+        are read entirely.
+    :param coord: (*array_like or DimVariable*) The vertical coordinate of the data (pressure or height),
+        same shape of the data, or the shape without the leading (time) dimension, or 1-D levels.
+    :param levels: (*array_like*) Target pressure or height levels.
+    :param coordtype: (*string*) Coordinate type ['pressure' | 'height']. The ground is the high pressure
+        end or the low height end. Default is ``pressure``.
+    :param log: (*boolean*) Interpolate linearly in logarithm of the coordinate. Default is ``True`` for
+        pressure and ``False`` for height.
+    :param below: (*string*) Option of the target levels below the lowest model level ['nan' | 'nearest' |
+        'linear' | 'lapse']. ``lapse`` extrapolates temperature (K) with the standard atmosphere lapse
+        rate. Default is ``nan``.
+    :param above: (*string*) Option of the target levels above the highest model level ['nan' |
+        'nearest' | 'linear']. Default is ``nan``.
+    :param axis: (*int*) The vertical axis. Default is ``ndim - 3``.
+    :param chunksize: (*int*) Time step number of each chunk for a 4-D data file variable. Default is ``1``.
+    :param out: (*tuple*) (ncfile, variable) output variable to write the result into, the chunks of a
+        4-D data file variable are written one by one. Default is ``None``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*array_like*) Remapped data, ``None`` if ``out`` is set.
+    '''
+    if isinstance(levels, MIArray):
+        levels = levels.aslist()
+    levels = list(levels)
+    out = kwargs.pop('out', None)
+    if _isvariable(data):
+        ndim = len(data.dims)
+        axis = kwargs.get('axis', None)
+        if not axis is None and axis < 0:
+            axis += ndim
+        if ndim != 4 or axis == 0:
+            data = data[tuple([slice(None)] * ndim)]
+            if _isvariable(coord):
+                coord = coord[tuple([slice(None)] * len(coord.dims))]
+    if _isvariable(data):
+        rr = []
+        for s, r in vinterp_chunks(data, coord, levels, **kwargs):
+            if out is None:
+                rr.append(r)
+            else:
+                out[0].write(out[1], r, [s] + [0] * (r.ndim - 1))
+        if not out is None:
+            out[0].flush()
+            return None
+        if len(rr) == 1:
+            return rr[0]
+        from mipylib.numeric.minum import concatenate
+        return concatenate(rr, axis=0)
+
+    axis = kwargs.pop('axis', None)
+    log, ground_high, below, above, nthreads = _options(kwargs)
+    ya, shape = _flat(data)
+    if axis is None:
+        axis = max(0, len(shape) - 3)
+    elif axis < 0:
+        axis += len(shape)
+    xa, xshape = _flat(coord)
+    r, rshape = _vinterp(ya, shape, xa, xshape, levels, axis, log, ground_high, below, above, nthreads)
+    if isinstance(data, DimArray):
+        r = _result(r, rshape, data.dims, axis, levels, data.fill_value, data.proj)
+    else:
+        r = _result(r, rshape, None, axis, levels, None, None)
+    if not out is None:
+        out[0].write(out[1], r, [0] * r.ndim)
+        out[0].flush()
+        return None
+    return r
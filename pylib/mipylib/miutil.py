@@ -9,10 +9,15 @@ from org.meteoinfo.global import PointD
 from org.meteoinfo.global.util import DateUtil
 from org.meteoinfo.math import Complex
 from org.meteoinfo.shape import PointShape, ShapeUtil
-from java.util import Calendar, Locale
+from java.util import Calendar, Locale, Date, TimeZone
+from java.util.concurrent import Executors, Callable
 from java.text import SimpleDateFormat
 from java.awt import Color
+from java.lang import Runtime, Long, Double
+from ucar.ma2 import Array, DataType, MAMath
+import jarray
 import datetime
+import threading
 
 def pydate(t):    
     """
@@ -72,11 +77,7 @@ def dates2nums(dates):
     
     :returns: (*list*) Numerical values
     """
-    values = []
-    for t in dates:
-        tt = jdate(t)
-        values.append(DateUtil.toOADate(tt))
-    return values
+    return DateArray.fromdatetimes(dates).tonums()
     
 def num2date(v):
     """
@@ -97,11 +98,267 @@ def nums2dates(values):
     
     :returns: Python dates
     """
-    tt = []
-    for v in values:
-        t = DateUtil.fromOADate(v)
-        tt.append(pydate(t))
-    return tt
+    return DateArray.fromnums(values).astype('s').todatetimes()
+    
+#Milliseconds of the date units
+_DATE_UNITS = {'ms': 1, 's': 1000, 'm': 60000, 'h': 3600000, 'D': 86400000}
+_CF_UNITS = {'millisecond': 'ms', 'milliseconds': 'ms', 'msec': 'ms', 'msecs': 'ms',
+    'second': 's', 'seconds': 's', 'sec': 's', 'secs': 's', 's': 's',
+    'minute': 'm', 'minutes': 'm', 'min': 'm', 'mins': 'm',
+    'hour': 'h', 'hours': 'h', 'hr': 'h', 'hrs': 'h', 'h': 'h',
+    'day': 'D', 'days': 'D', 'd': 'D'}
+_EPOCH = datetime.datetime(1970, 1, 1)
+#OADate of 1970-01-01
+_OA_EPOCH = 25569.
+    
+def _parsecf(units):
+    '''
+    Parse CF time units like ``hours since 1900-01-01 00:00:0.0``.
+    
+    :returns: Date unit and epoch milliseconds of the reference time.
+    '''
+    s = units.strip().split(None, 2)
+    if len(s) < 3 or s[1].lower() != 'since' or not s[0].lower() in _CF_UNITS:
+        raise ValueError('Not supported time units: ' + units)
+    unit = _CF_UNITS[s[0].lower()]
+    ref = s[2].replace('T', ' ').rstrip('Z').split()
+    ymd = [int(v) for v in ref[0].split('-')]
+    t = datetime.datetime(ymd[0], ymd[1], ymd[2])
+    if len(ref) > 1 and ':' in ref[1]:
+        hms = ref[1].split(':') + ['0', '0']
+        t += datetime.timedelta(hours=int(hms[0]), minutes=int(hms[1]), seconds=float(hms[2]))
+    return unit, _millis(t)
+    
+def _millis(t):
+    d = t - _EPOCH
+    return (d.days * 86400 + d.seconds) * 1000L + d.microseconds // 1000
+    
+_memo = {}
+_memo_keys = []
+_memo_size = 32
+_memo_lock = threading.Lock()
+    
+def _memoize(key, func):
+    '''
+    Get the cached result of a bulk conversion, the result is calculated and cached if not
+    exists. The least recently added results are dropped when the cache is full. The cache is
+    shared by threads, the result is calculated outside the lock and the first one cached wins.
+    '''
+    with _memo_lock:
+        r = _memo.get(key)
+    if r is None:
+        r = func()
+        with _memo_lock:
+            if key in _memo:
+                r = _memo[key]
+            else:
+                if len(_memo_keys) >= _memo_size:
+                    del _memo[_memo_keys.pop(0)]
+                _memo[key] = r
+                _memo_keys.append(key)
+    return r
+    
+class DateArray(object):
+    '''
+    Compact datetime array stored as int64 values of a unit since 1970-01-01 (wall clock time
+    without time zone) in a Java long array. Missing times are stored as ``Long.MIN_VALUE`` and
+    converted to ``None`` or ``NaN``.
+    
+    :param values: (*long[] or list*) Time values.
+    :param unit: (*string*) Time unit ['ms' | 's' | 'm' | 'h' | 'D']. Default is ``ms``.
+    '''
+    def __init__(self, values, unit='ms'):
+        if not unit in _DATE_UNITS:
+            raise ValueError('Not supported date unit: ' + unit)
+        if not isinstance(values, type(jarray.zeros(0, 'l'))):
+            values = jarray.array([Long.MIN_VALUE if v is None else long(v) for v in values], 'l')
+        self.values = values
+        self.unit = unit
+        
+    def __len__(self):
+        return len(self.values)
+        
+    def __repr__(self):
+        n = len(self)
+        if n == 0:
+            return 'DateArray([], unit=%s)' % self.unit
+        return 'DateArray(%s ... %s, size=%i, unit=%s)' % (self[0], self[n - 1], n, self.unit)
+        
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return DateArray(self.values[key], self.unit)
+        v = self.values[key]
+        if v == Long.MIN_VALUE:
+            return None
+        return _EPOCH + datetime.timedelta(milliseconds=v * _DATE_UNITS[self.unit])
+        
+    def __iter__(self):
+        return iter(self.todatetimes())
+        
+    def millis(self):
+        '''
+        Get epoch milliseconds.
+        
+        :returns: (*long[]*) Epoch milliseconds.
+        '''
+        if self.unit == 'ms':
+            return self.values
+        f = _DATE_UNITS[self.unit]
+        mv = Long.MIN_VALUE
+        return jarray.array([mv if v == mv else v * f for v in self.values], 'l')
+        
+    def astype(self, unit):
+        '''
+        Convert to another unit, the values are floored to the unit.
+        
+        :param unit: (*string*) Time unit ['ms' | 's' | 'm' | 'h' | 'D'].
+        
+        :returns: (*DateArray*) Converted date array.
+        '''
+        if unit == self.unit:
+            return self
+        f = _DATE_UNITS[unit]
+        mv = Long.MIN_VALUE
+        return DateArray(jarray.array([mv if v == mv else v // f for v in self.millis()], 'l'), unit)
+        
+    def asarray(self):
+        '''
+        Get the values as a long array without copying.
+        
+        :returns: (*Array*) The ucar Array.
+        '''
+        return Array.factory(DataType.LONG, jarray.array([len(self)], 'i'), self.values)
+        
+    def todatetimes(self):
+        '''
+        Convert to Python datetimes.
+        
+        :returns: (*list*) Python datetimes.
+        '''
+        f = _DATE_UNITS[self.unit]
+        mv = Long.MIN_VALUE
+        return [None if v == mv else _EPOCH + datetime.timedelta(milliseconds=v * f) for v in self.values]
+        
+    def tojdates(self):
+        '''
+        Convert to Java dates in the default time zone.
+        
+        :returns: (*list*) Java dates.
+        '''
+        tz = TimeZone.getDefault()
+        r = []
+        for v in self.millis():
+            if v == Long.MIN_VALUE:
+                r.append(None)
+                continue
+            t = v - tz.getOffset(v)
+            r.append(Date(v - tz.getOffset(t)))
+        return r
+        
+    def tonums(self):
+        '''
+        Convert to numerical values (OLE automation dates, days since 1899-12-30).
+        
+        :returns: (*list*) Numerical values.
+        '''
+        f = float(_DATE_UNITS[self.unit]) / 86400000
+        mv = Long.MIN_VALUE
+        return [Double.NaN if v == mv else v * f + _OA_EPOCH for v in self.values]
+        
+    def tocf(self, units):
+        '''
+        Encode to CF time values.
+        
+        :param units: (*string*) CF time units, i.e. ``hours since 1900-01-01 00:00:0.0``.
+        
+        :returns: (*list*) Time values.
+        '''
+        unit, ref = _parsecf(units)
+        f = float(_DATE_UNITS[unit])
+        mv = Long.MIN_VALUE
+        return [Double.NaN if v == mv else (v - ref) / f for v in self.millis()]
+        
+    @staticmethod
+    def fromdatetimes(dates):
+        '''
+        Create from Python datetimes.
+        
+        :param dates: (*list*) Python datetimes.
+        
+        :returns: (*DateArray*) Date array.
+        '''
+        return DateArray(jarray.array([Long.MIN_VALUE if t is None else _millis(t) for t in dates], 'l'))
+        
+    @staticmethod
+    def fromjdates(dates):
+        '''
+        Create from Java dates, the wall clock time in the default time zone is kept.
+        
+        :param dates: (*list*) Java dates.
+        
+        :returns: (*DateArray*) Date array.
+        '''
+        tz = TimeZone.getDefault()
+        r = []
+        for t in dates:
+            if t is None:
+                r.append(Long.MIN_VALUE)
+                continue
+            v = t.getTime()
+            r.append(v + tz.getOffset(v))
+        return DateArray(jarray.array(r, 'l'))
+        
+    @staticmethod
+    def fromnums(values):
+        '''
+        Create from numerical values (OLE automation dates), rounded to milliseconds. ``NaN``
+        values are missing times.
+        
+        :param values: (*list*) Numerical values.
+        
+        :returns: (*DateArray*) Date array.
+        '''
+        mv = Long.MIN_VALUE
+        return DateArray(jarray.array([mv if v != v else long(round((v - _OA_EPOCH) * 86400000))
+            for v in values], 'l'))
+        
+    @staticmethod
+    def fromcf(values, units):
+        '''
+        Decode CF time values.
+        
+        :param values: (*list*) Time values.
+        :param units: (*string*) CF time units, i.e. ``days since 2000-01-01``.
+        
+        :returns: (*DateArray*) Date array.
+        '''
+        unit, ref = _parsecf(units)
+        f = _DATE_UNITS[unit]
+        mv = Long.MIN_VALUE
+        return DateArray(jarray.array([mv if v != v else ref + long(round(v * f)) for v in values], 'l'))
+        
+def cached_nums2dates(values):
+    '''
+    Convert numerical values to python dates with a memoizing cache, repeated conversions of
+    the same time axis (i.e. variables of a dataset) are calculated only once.
+    
+    :param values: (*list*) Numerical values of date.
+    
+    :returns: (*list*) Python dates, shared by the callers and should not be modified.
+    '''
+    values = tuple(values)
+    return _memoize(('nums2dates', values), lambda: nums2dates(values))
+    
+def cached_dates2nums(dates):
+    '''
+    Convert python dates to numerical values with a memoizing cache.
+    
+    :param dates: (*list*) Python dates.
+    
+    :returns: (*list*) Numerical values, shared by the callers and should not be modified.
+    '''
+    dates = tuple(dates)
+    return _memoize(('dates2nums', dates), lambda: dates2nums(dates))
     
 def dateformat(t, format, language=None):
     """
@@ -221,4 +478,97 @@ def getcolor(style, alpha=None):
         alpha = (int)(alpha * 255)
         c = Color(c.getRed(), c.getGreen(), c.getBlue(), alpha)
     
-    return c    
\ No newline at end of file
+    return c    
+
+class _Task(Callable):
+    '''
+    Java Callable wrapper of a Python function and its argument.
+    '''
+    def __init__(self, func, item):
+        self.func = func
+        self.item = item
+        
+    def call(self):
+        return self.func(self.item)
+        
+def cpu_count():
+    '''
+    Get the number of processors available to the Java virtual machine.
+    
+    :returns: (*int*) Processor number.
+    '''
+    return Runtime.getRuntime().availableProcessors()
+    
+def parallel_map(func, items, nthreads=None):
+    '''
+    Apply a function to every item of a list using a Java thread pool.
+    
+    :param func: (*function*) The function with one argument.
+    :param items: (*list*) The items.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+        The function is called serially if thread number is 1.
+        
+    :returns: (*list*) Function results in the order of the items.
+    '''
+    items = list(items)
+    if nthreads is None:
+        nthreads = cpu_count()
+    nthreads = min(nthreads, len(items))
+    if nthreads <= 1:
+        return [func(item) for item in items]
+        
+    pool = Executors.newFixedThreadPool(nthreads)
+    try:
+        futures = pool.invokeAll([_Task(func, item) for item in items])
+        return [f.get() for f in futures]
+    finally:
+        pool.shutdown()
+        
+def chunks(n, nchunk=None):
+    '''
+    Split index range ``[0, n)`` into continuous chunks.
+    
+    :param n: (*int*) Total length.
+    :param nchunk: (*int*) Chunk number. Default is ``None``, means the processor number.
+    
+    :returns: (*list*) List of (start, end) index tuples.
+    '''
+    if nchunk is None:
+        nchunk = cpu_count()
+    nchunk = max(1, min(nchunk, n))
+    size = n // nchunk
+    rem = n % nchunk
+    r = []
+    sidx = 0
+    for i in range(nchunk):
+        eidx = sidx + size + (1 if i < rem else 0)
+        r.append((sidx, eidx))
+        sidx = eidx
+    return r
+    
+def jdoubles(a):
+    '''
+    Copy array data into a flat Java double array.
+    
+    :param a: (*Array*) The ucar Array.
+    
+    :returns: (*double[]*) Java double array with the array values in row-major order.
+    '''
+    if a.getDataType() == DataType.DOUBLE:
+        return a.copyTo1DJavaArray()
+    r = Array.factory(DataType.DOUBLE, a.getShape())
+    MAMath.copyDouble(r, a)
+    return r.getStorage()
+    
+def fromjdoubles(data, shape):
+    '''
+    Create a double ucar Array from a flat Java double array without copying.
+    
+    :param data: (*double[] or list*) Array values in row-major order.
+    :param shape: (*list*) Array shape.
+    
+    :returns: (*Array*) The ucar Array.
+    '''
+    if isinstance(data, list):
+        data = jarray.array(data, 'd')
+    return Array.factory(DataType.DOUBLE, jarray.array(shape, 'i'), data)
\ No newline at end of file
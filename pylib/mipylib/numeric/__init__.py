@@ -7,6 +7,7 @@ from . import random
 from . import fitting
 from . import stats
 from . import interpolate
+from . import spatial
 from stats import percentile
 
 __all__ = []
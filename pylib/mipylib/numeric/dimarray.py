@@ -12,6 +12,9 @@ from org.meteoinfo.global import PointD
 from ucar.ma2 import Array, Range, MAMath
 #import milayer
 from miarray import MIArray
+from spatial.weights import grid_weights, point_weights, regular_weights, conservative_weights
+from spatial.reproject import get_reprojector
+from spatial.gridmask import GridMask
 #from milayer import MILayer
 import math
 import datetime
@@ -683,10 +686,13 @@ class DimArray(MIArray):
         '''
         Maskout data by polygons - the elements outside polygons will be set as NaN.
 
-        :param mask: (*list*) Polygon list as mask borders.
+        :param mask: (*list or GridMask*) Polygon list as mask borders, or a precomputed ``GridMask``
+            of the grid which is applied to all leading dimensions.
         
         :returns: (*DimArray*) Maskouted data.
         '''
+        if isinstance(mask, GridMask):
+            return DimArray(mask.maskout(self), self.dims, self.fill_value, self.proj)
         if isinstance(mask, MIArray):
             r = ArrayMath.maskout(self.asarray(), mask.asarray())
             return DimArray(MIArray(r), self.dims, self.fill_value, self.proj)
@@ -703,10 +709,13 @@ class DimArray(MIArray):
         '''
         Maskin data by polygons - the elements inside polygons will be set as NaN.
 
-        :param mask: (*list*) Polygon list as mask borders.
+        :param mask: (*list or GridMask*) Polygon list as mask borders, or a precomputed ``GridMask``
+            of the grid which is applied to all leading dimensions.
         
         :returns: (*DimArray*) Maskined data.
         '''
+        if isinstance(mask, GridMask):
+            return DimArray(mask.maskin(self), self.dims, self.fill_value, self.proj)
         if isinstance(mask, MIArray):
             r = ArrayMath.maskin(self.asarray(), mask.asarray())
             return DimArray(r, self.dims, self.fill_value, self.proj)
@@ -853,10 +862,19 @@ class DimArray(MIArray):
         """
         Multidimensional interpolation on regular grids.
 
-        :param xi: (*list*) The coordinates to sample the gridded data at.
+        :param xi: (*list*) The coordinates to sample the gridded data at. Multiple points can be sampled
+            with a (npoints, ndim) array or list, ``ndim`` could be less than the dimension number of the
+            array and the leading dimensions are kept.
         
-        :returns: (*float*) Interpolated value at input coordinates.
+        :returns: (*float or array*) Interpolated value at input coordinates.
         """
+        if isinstance(xi, (MIArray, DimArray)) and xi.ndim == 2:
+            nd = xi.shape[1]
+            xx = xi.aslist()
+            xi = [xx[i:i + nd] for i in range(0, len(xx), nd)]
+        if len(xi) > 0 and isinstance(xi[0], (list, tuple, MIArray)):
+            return self.__interpn_points(xi)
+            
         points = []
         for i in range(self.ndim):
             points.append(self.dims[i].getDimValue())
@@ -869,8 +887,56 @@ class DimArray(MIArray):
             nxi.append(x)
         r = ArrayUtil.interpn(points, self.asarray(), nxi)
         return r
+        
+    def __interpn_points(self, xi):
+        nxi = []
+        for p in xi:
+            if isinstance(p, MIArray):
+                p = p.aslist()
+            pp = []
+            for x in p:
+                if isinstance(x, datetime.datetime):
+                    x = miutil.date2num(x)
+                pp.append(x)
+            nxi.append(pp)
+        nd = len(nxi[0])
+        points = []
+        for i in range(self.ndim - nd, self.ndim):
+            points.append(list(self.dims[i].getDimValue()))
+        r = regular_weights(points, nxi).apply(self)
+        return self.__pointdims(r, self.ndim - nd)
+        
+    def __pointdims(self, r, nlead):
+        if nlead == 0:
+            return r
+        dims = self.dims[:nlead]
+        pdim = Dimension(DimensionType.Other)
+        pdim.setDimValues(range(r.shape[-1]))
+        dims.append(pdim)
+        return DimArray(r, dims, self.fill_value, self.proj)
      
     def tostation(self, x, y):
+        '''
+        Interpolate the array to stations. If the array has leading dimensions (i.e. time and level)
+        more than y/x dimensions, the bilinear weights are calculated once and applied to every
+        slice.
+        
+        :param x: (*array_like*) X coordinates of the stations.
+        :param y: (*array_like*) Y coordinates of the stations.
+        
+        :returns: (*array*) Station values, with the leading dimensions kept.
+        '''
+        if self.ndim > 2:
+            if isinstance(x, MIArray):
+                x = x.aslist()
+                y = y.aslist()
+            elif not isinstance(x, (list, tuple)):
+                x = [x]
+                y = [y]
+            xx = list(self.dims[-1].getDimValue())
+            yy = list(self.dims[-2].getDimValue())
+            w = point_weights(xx, yy, list(x), list(y), [len(x)])
+            return self.__pointdims(w.apply(self), self.ndim - 2)
         gdata = self.asgriddata()
         if isinstance(x, MIArray) or isinstance(x, DimArray):
             r = gdata.data.toStation(x.aslist(), y.aslist())
@@ -878,7 +944,7 @@ class DimArray(MIArray):
         else:
             return gdata.data.toStation(x, y)
             
-    def project(self, x=None, y=None, toproj=None, method='bilinear'):
+    def project(self, x=None, y=None, toproj=None, method='bilinear', reprojector=None):
         """
         Project array
         
@@ -886,13 +952,25 @@ class DimArray(MIArray):
         :param y: To y coordinates.
         :param toproj: To projection.
         :param method: Interpolation method: ``bilinear`` or ``neareast`` .
+        :param reprojector: (*Reprojector*) Reprojector with cached index and weight mapping. Default is
+            ``None``. The cached reprojector of the grids is also used if the to x/y coordinates are 1-D.
         
-        :returns: (*MIArray*) Projected array
+        :returns: (*DimArray or MIArray*) Projected array. A DimArray with the to x/y dimensions if a
+            reprojector is used or the to x/y coordinates are 1-D or not specified, MIArray if the to
+            x/y coordinates are 2-D.
         """
         yy = self.dims[self.ndim - 2].getDimValue()
         xx = self.dims[self.ndim - 1].getDimValue()
         if toproj is None:
             toproj = self.proj
+            
+        if reprojector is None and not x is None and not y is None:
+            if isinstance(x, list) or (isinstance(x, MIArray) and x.ndim == 1):
+                reprojector = get_reprojector(self, (x, y, toproj), method)
+        if not reprojector is None:
+            r = reprojector.apply(self, self.fill_value)
+            dims = self._xydims(reprojector.x, reprojector.y)
+            return DimArray(r, dims, self.fill_value, reprojector.proj)
         
         if x is None or y is None:
             pr = ArrayUtil.reproject(self.array, xx, yy, self.proj, toproj)
@@ -913,17 +991,71 @@ class DimArray(MIArray):
             method = ResampleMethods.Bilinear
         else:
             method = ResampleMethods.NearestNeighbor
-        if isinstance(x, list):
-            r = ArrayUtil.reproject(self.array, xx, yy, x, y, self.proj, toproj, self.fill_value, method)
-        elif isinstance(x, MIArray):
-            if x.ndim == 1:
-                r = ArrayUtil.reproject(self.array, xx, yy, x.aslist(), y.aslist(), self.proj, toproj, self.fill_value, method)
-            else:
-                r = ArrayUtil.reproject(self.array, xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
-        else:
-            r = ArrayUtil.reproject(self.array, xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
+        r = ArrayUtil.reproject(self.array, xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
         #r = ArrayUtil.reproject(self.array, xx, yy, x.asarray(), y.asarray(), self.proj, toproj, self.fill_value, method)
         return MIArray(r)
+        
+    def regrid_weights(self, x, y, method='bilinear', nthreads=None):
+        '''
+        Calculate the sparse interpolation weights from the grid of the array (last two dimensions)
+        to a new rectilinear grid. The weights can be reused by ``regrid`` for other arrays with
+        same grid.
+        
+        :param x: (*array_like*) X coordinates of the new grid.
+        :param y: (*array_like*) Y coordinates of the new grid.
+        :param method: (*string*) Interpolation method: ``bilinear``, ``nearest`` or ``conservative``. The
+            ``conservative`` method is first order area weighted remapping using the cell overlap areas,
+            spherical areas are used if the x/y dimensions are longitude/latitude.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+        
+        :returns: (*SparseWeights*) Interpolation weights.
+        '''
+        xx = self.dimvalue(self.ndim - 1).aslist()
+        yy = self.dimvalue(self.ndim - 2).aslist()
+        if isinstance(x, MIArray):
+            x = x.aslist()
+        if isinstance(y, MIArray):
+            y = y.aslist()
+        if method == 'conservative':
+            islonlat = self.islonlatdim(self.ndim - 1) and self.islonlatdim(self.ndim - 2)
+            return conservative_weights(xx, yy, list(x), list(y), islonlat, nthreads)
+        if not method in ['bilinear', 'nearest', 'neareast']:
+            raise ValueError('Not supported method: ' + method)
+        method = 'bilinear' if method == 'bilinear' else 'nearest'
+        return grid_weights(xx, yy, list(x), list(y), method, nthreads)
+        
+    def regrid(self, x=None, y=None, method='bilinear', weights=None, nthreads=None):
+        '''
+        Regrid the array to a new rectilinear grid. The leading dimensions (i.e. time and level)
+        are kept.
+        
+        :param x: (*array_like*) X coordinates of the new grid. Not used if ``weights`` is set.
+        :param y: (*array_like*) Y coordinates of the new grid. Not used if ``weights`` is set.
+        :param method: (*string*) Interpolation method: ``bilinear``, ``nearest`` or ``conservative``.
+        :param weights: (*SparseWeights*) Interpolation weights from ``regrid_weights``. Default is
+            ``None``, the weights will be calculated.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+        
+        :returns: (*DimArray*) Regridded array.
+        '''
+        if weights is None:
+            weights = self.regrid_weights(x, y, method, nthreads)
+        r = weights.apply(self, nthreads=nthreads)
+        dims = self._xydims(weights.x, weights.y)
+        return DimArray(r, dims, self.fill_value, self.proj)
+        
+    def _xydims(self, x, y):
+        '''
+        Get dimensions with the last two dimensions replaced by new y/x dimensions.
+        '''
+        dims = self.dims[:-2]
+        ydim = Dimension(DimensionType.Y)
+        ydim.setDimValues(list(y))
+        dims.append(ydim)
+        xdim = Dimension(DimensionType.X)
+        xdim.setDimValues(list(x))
+        dims.append(xdim)
+        return dims
             
     def join(self, b, dimidx):
         r = ArrayMath.join(self.array, b.array, dimidx)
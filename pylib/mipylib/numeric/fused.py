@@ -0,0 +1,260 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab fused element kernel module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+
+from ucar.ma2 import DataType, MAMath
+import jarray
+
+import mipylib.miutil as miutil
+from miarray import MIArray
+from dimarray import DimArray
+
+from java.lang import Double, System
+nan = Double.NaN
+
+__all__ = [
+    'chunked_apply','copyto','fused_apply','fused_ds2uv','fused_magnitude','fused_uv2ds'
+    ]
+
+#Element number of the chunks of chunked_apply
+_BLOCKSIZE = 65536
+
+def magnitude_kernel(u, v):
+    return math.sqrt(u * u + v * v)
+
+def uv2ds_kernel(u, v):
+    '''
+    Wind direction (degree, where the wind blows from) and speed of U/V.
+    '''
+    if u != u or v != v:
+        return nan, nan
+    s = math.sqrt(u * u + v * v)
+    if s == 0:
+        return 0.0, 0.0
+    d = math.degrees(math.atan2(u, v)) + 180.
+    if d >= 360:
+        d -= 360.
+    return d, s
+
+def ds2uv_kernel(d, s):
+    r = math.radians(d)
+    return -s * math.sin(r), -s * math.cos(r)
+
+def _flat(a):
+    if isinstance(a, MIArray):
+        return miutil.jdoubles(a.asarray())
+    return jarray.array([float(a)], 'd')
+
+def _canonical(a):
+    '''
+    If the elements of an array are in row-major order from the start of its storage, i.e. the
+    array is not a section, transposed or permuted view.
+    '''
+    shape = list(a.getShape())
+    pos = [0] * len(shape)
+    ima = a.getIndex()
+    ima.set(jarray.array(pos, 'i'))
+    if ima.currentElement() != 0:
+        return False
+    stride = 1
+    for d in range(len(shape) - 1, -1, -1):
+        if shape[d] > 1:
+            pos[d] = 1
+            ima.set(jarray.array(pos, 'i'))
+            if ima.currentElement() != stride:
+                return False
+            pos[d] = 0
+        stride *= shape[d]
+    return True
+
+def _buffer(out, n):
+    '''
+    Get the backing double array of an output buffer, ``None`` if the buffer can not be
+    written directly.
+    '''
+    a = out.asarray()
+    if a.getSize() != n:
+        raise ValueError('The output array size is not consistent with the inputs!')
+    if a.getDataType() == DataType.DOUBLE:
+        storage = a.getStorage()
+        if len(storage) == n and _canonical(a):
+            return storage
+    return None
+
+def copyto(out, results):
+    '''
+    Copy result arrays into output arrays in the index order of the outputs.
+
+    :param out: (*MIArray or list*) Output array(s) to be filled.
+    :param results: (*MIArray or list*) Result array(s) with same shape.
+
+    :returns: (*MIArray or tuple*) The output array(s).
+    '''
+    if isinstance(out, MIArray):
+        out = [out]
+        results = [results]
+    for o, a in zip(out, results):
+        if o.asarray().getSize() != a.asarray().getSize():
+            raise ValueError('The output array size is not consistent with the result!')
+        MAMath.copyDouble(o.asarray(), a.asarray())
+    if len(out) == 1:
+        return out[0]
+    return tuple(out)
+
+def _results(like, shape, bufs, out, nout):
+    r = []
+    for k in range(nout):
+        if out is None:
+            a = MIArray(miutil.fromjdoubles(bufs[k], shape))
+            if isinstance(like, DimArray):
+                a = DimArray(a, like.dims, like.fill_value, like.proj)
+        else:
+            a = out[k]
+            if not bufs[k] is a.asarray().getStorage():
+                MAMath.copyDouble(a.asarray(), miutil.fromjdoubles(bufs[k], shape))
+        r.append(a)
+    if nout == 1:
+        return r[0]
+    return tuple(r)
+
+def chunked_apply(func, inputs, nout=1, out=None, nthreads=None):
+    '''
+    Apply a Java array function (i.e. ``ArrayMath.uv2ds``) to aligned flat chunks of the input
+    arrays on a thread pool. The function runs at Java speed on every thread and the chunk results
+    are copied straight into the contiguous double output arrays, so only chunk sized temporary
+    arrays are created.
+
+    :param func: (*function*) Function of ucar Arrays with same shape, returns an Array or a Java
+        array of ``nout`` Arrays.
+    :param inputs: (*list*) Input arrays with same shape.
+    :param nout: (*int*) Output number of the function. Default is ``1``.
+    :param out: (*MIArray or list*) Output array(s) to be filled. Default is ``None``, new double
+        arrays are created.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray or tuple*) Result array(s).
+    '''
+    like = inputs[0]
+    shape = list(like.shape)
+    n = like.asarray().getSize()
+    flats = []
+    for a in inputs:
+        a = a.asarray()
+        if a.getSize() != n:
+            raise ValueError('The input arrays must have same shape!')
+        if not _canonical(a):
+            a = a.copy()
+        flats.append(a.reshapeNoCopy(jarray.array([n], 'i')))
+    if not out is None and isinstance(out, MIArray):
+        out = [out]
+    bufs = [None] * nout if out is None else [_buffer(o, n) for o in out]
+    bufs = [jarray.zeros(n, 'd') if b is None else b for b in bufs]
+    def block(se):
+        m = se[1] - se[0]
+        origin = jarray.array([se[0]], 'i')
+        size = jarray.array([m], 'i')
+        r = func(*[f.section(origin, size).copy() for f in flats])
+        if nout == 1:
+            r = [r]
+        for k in range(nout):
+            a = r[k]
+            if a.getDataType() == DataType.DOUBLE and len(a.getStorage()) == m and _canonical(a):
+                data = a.getStorage()
+            else:
+                data = miutil.jdoubles(a)
+            System.arraycopy(data, 0, bufs[k], se[0], m)
+    if nthreads is None:
+        nthreads = miutil.cpu_count()
+    nchunk = max(nthreads, (n + _BLOCKSIZE - 1) // _BLOCKSIZE)
+    miutil.parallel_map(block, miutil.chunks(n, nchunk), nthreads)
+    return _results(like, shape, bufs, out, nout)
+
+def fused_apply(func, inputs, nout=1, out=None, nthreads=None):
+    '''
+    Apply a Jython element kernel to arrays in one pass, the elements are processed in parallel
+    blocks without intermediate arrays. The kernel is a Jython call per element, which is much
+    slower than the Java ``ArrayMath`` functions, so it is meant for custom kernels without a Java
+    counterpart (i.e. the chunked derived variables), use ``chunked_apply`` with the Java functions
+    for speed.
+
+    :param func: (*function*) Element kernel, returns a number or a tuple of ``nout`` numbers.
+    :param inputs: (*list*) Input arrays with same shape or numbers.
+    :param nout: (*int*) Output number of the kernel. Default is ``1``.
+    :param out: (*MIArray or list*) Output array(s) to be filled. Default is ``None``, new double
+        arrays are created.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray or tuple*) Result array(s).
+    '''
+    like = None
+    for a in inputs:
+        if isinstance(a, MIArray):
+            like = a
+            break
+    if like is None:
+        return func(*inputs)
+    shape = list(like.shape)
+    n = like.asarray().getSize()
+    data = [_flat(a) for a in inputs]
+    for d in data:
+        if len(d) != 1 and len(d) != n:
+            raise ValueError('The input arrays must have same shape!')
+    if not out is None and isinstance(out, MIArray):
+        out = [out]
+    bufs = [None] * nout if out is None else [_buffer(o, n) for o in out]
+    bufs = [jarray.zeros(n, 'd') if b is None else b for b in bufs]
+    sizes = [len(d) for d in data]
+    def block(se):
+        for i in xrange(se[0], se[1]):
+            r = func(*[d[i % m] for d, m in zip(data, sizes)])
+            if nout == 1:
+                bufs[0][i] = r
+            else:
+                for k in xrange(nout):
+                    bufs[k][i] = r[k]
+    miutil.parallel_map(block, miutil.chunks(n, nthreads), nthreads)
+    return _results(like, shape, bufs, out, nout)
+
+def fused_magnitude(u, v, out=None, nthreads=None):
+    '''
+    Calculate sqrt(u*u+v*v) in one pass.
+
+    :param u: (*array*) U component array.
+    :param v: (*array*) V component array.
+    :param out: (*MIArray*) Output array to be filled. Default is ``None``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray*) Result array.
+    '''
+    return fused_apply(magnitude_kernel, [u, v], 1, out, nthreads)
+
+def fused_uv2ds(u, v, out=None, nthreads=None):
+    '''
+    Calculate wind direction and speed from U/V in one pass.
+
+    :param u: (*array*) U component array.
+    :param v: (*array*) V component array.
+    :param out: (*list*) Output direction and speed arrays to be filled. Default is ``None``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray, MIArray*) Wind direction and speed.
+    '''
+    return fused_apply(uv2ds_kernel, [u, v], 2, out, nthreads)
+
+def fused_ds2uv(d, s, out=None, nthreads=None):
+    '''
+    Calculate U/V from wind direction and speed in one pass.
+
+    :param d: (*array*) Wind direction array.
+    :param s: (*array*) Wind speed array.
+    :param out: (*list*) Output U and V arrays to be filled. Default is ``None``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray, MIArray*) Wind U and V.
+    '''
+    return fused_apply(ds2uv_kernel, [d, s], 2, out, nthreads)
@@ -8,13 +8,18 @@
 
 from org.meteoinfo.math.interpolate import InterpUtil
 from org.meteoinfo.data import ArrayMath, ArrayUtil
+from org.meteoinfo.data.meteodata import Dimension
 from ucar.ma2 import Array
+from java.lang import Double
 
 from mipylib.numeric.miarray import MIArray
 from mipylib.numeric.dimarray import DimArray
+import mipylib.miutil as miutil
+import math
+import bisect
 
 __all__ = [
-    'interp1d','RectBivariateSpline'
+    'interp1d','interp1d_axis','RectBivariateSpline'
     ]
 
 class interp1d(object):
@@ -48,7 +53,145 @@ class interp1d(object):
             return r
         else:
             return MIArray(r)
+
             
+def _column(x, y, log):
+    '''
+    Get valid x/y pairs of a column in ascending x order.
+    '''
+    xs = []
+    ys = []
+    for xv, yv in zip(x, y):
+        if math.isnan(xv) or math.isnan(yv) or (log and xv <= 0):
+            continue
+        xs.append(math.log(xv) if log else xv)
+        ys.append(yv)
+    if len(xs) > 1 and xs[0] > xs[-1]:
+        xs.reverse()
+        ys.reverse()
+    return xs, ys
+    
+def _interpcol(xs, ys, xnew, log, extrapolate):
+    '''
+    Linear interpolation of a column. The bracketing search starts from the last bracket 
+    if the new x values are monotonic.
+    '''
+    n = len(xs)
+    r = []
+    i = 0
+    for xv in xnew:
+        if math.isnan(xv) or n == 0 or (log and xv <= 0):
+            r.append(Double.NaN)
+            continue
+        if log:
+            xv = math.log(xv)
+        if n == 1:
+            r.append(ys[0] if xv == xs[0] else Double.NaN)
+            continue
+        if xv < xs[0] or xv > xs[-1]:
+            if not extrapolate:
+                r.append(Double.NaN)
+                continue
+            i = 0 if xv < xs[0] else n - 2
+        elif xs[i] <= xv <= xs[i + 1]:
+            pass
+        elif i + 2 < n and xs[i + 1] <= xv <= xs[i + 2]:
+            i += 1
+        elif i > 0 and xs[i - 1] <= xv <= xs[i]:
+            i -= 1
+        else:
+            i = min(max(bisect.bisect_right(xs, xv) - 1, 0), n - 2)
+        dx = xs[i + 1] - xs[i]
+        if dx == 0:
+            r.append(ys[i])
+        else:
+            r.append(ys[i] + (ys[i + 1] - ys[i]) * (xv - xs[i]) / dx)
+    return r
+            
+def interp1d_axis(x, y, xnew, axis=0, log=False, extrapolate=False, nthreads=None):
+    '''
+    Linear interpolation along an axis of a multi-dimensional array, i.e. vertical interpolation
+    from model levels to pressure levels. The coordinates can vary per column.
+    
+    :param x: (*array_like*) The coordinates, a 1-D array with the length of the axis, or an array with
+        same shape of ``y`` (coordinates per column). The coordinates of a column should be monotonic,
+        NaN values are skipped.
+    :param y: (*array_like*) The data array.
+    :param xnew: (*array_like*) The new coordinates, a 1-D array or an array with same shape of ``y``
+        except the axis (new coordinates per column).
+    :param axis: (*int*) The axis to be interpolated. Default is ``0``.
+    :param log: (*boolean*) Interpolate linearly in logarithm of the coordinates, i.e. for pressure.
+        Default is ``False``.
+    :param extrapolate: (*boolean*) Extrapolate linearly out of the coordinate range. Default is 
+        ``False``, the values out of the range are NaN.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    
+    :returns: (*array_like*) Interpolated array with the axis length of ``xnew``.
+    '''
+    if isinstance(x, (list, tuple)):
+        x = MIArray(ArrayUtil.array(x))
+    if isinstance(y, (list, tuple)):
+        y = MIArray(ArrayUtil.array(y))
+    if isinstance(xnew, (list, tuple)):
+        xnew = MIArray(ArrayUtil.array(xnew))
+    shape = list(y.shape)
+    if axis < 0:
+        axis += len(shape)
+    n = shape[axis]
+    nout = 1
+    for s in shape[:axis]:
+        nout *= s
+    nin = 1
+    for s in shape[axis + 1:]:
+        nin *= s
+    xcol = x.ndim == 1
+    if xcol:
+        if x.size != n:
+            raise ValueError('The x length must be the same with the y axis length!')
+    elif list(x.shape) != shape:
+        raise ValueError('x and y must have same shape!')
+    if xnew.ndim == 1:
+        m = xnew.size
+        xncol = True
+    else:
+        m = xnew.shape[axis]
+        xncol = False
+    rshape = list(shape)
+    rshape[axis] = m
+    if not xncol and list(xnew.shape) != rshape:
+        raise ValueError('xnew shape is not consistent with y shape!')
+        
+    ya = miutil.jdoubles(y.asarray())
+    xa = miutil.jdoubles(x.asarray())
+    xna = miutil.jdoubles(xnew.asarray())
+    r = [Double.NaN] * (nout * m * nin)
+    def columns(se):
+        for c in xrange(se[0], se[1]):
+            o = c // nin
+            i = c % nin
+            yc = [ya[(o * n + k) * nin + i] for k in xrange(n)]
+            if xcol:
+                xc = xa
+            else:
+                xc = [xa[(o * n + k) * nin + i] for k in xrange(n)]
+            if xncol:
+                xnc = xna
+            else:
+                xnc = [xna[(o * m + k) * nin + i] for k in xrange(m)]
+            xs, ys = _column(xc, yc, log)
+            rc = _interpcol(xs, ys, xnc, log, extrapolate)
+            for k in xrange(m):
+                r[(o * m + k) * nin + i] = rc[k]
+    miutil.parallel_map(columns, miutil.chunks(nout * nin, nthreads), nthreads)
+    r = MIArray(miutil.fromjdoubles(r, rshape))
+    if isinstance(y, DimArray) and xncol:
+        dims = list(y.dims)
+        dim = Dimension(dims[axis].getDimType())
+        dim.setDimValues(xnew.aslist())
+        dims[axis] = dim
+        r = DimArray(r, dims, y.fill_value, y.proj)
+    return r
+    
 class interp2d(object):
     '''
     Interpolate over a 2-D grid.
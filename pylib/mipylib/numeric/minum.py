@@ -16,7 +16,12 @@ from dimarray import PyGridData, DimArray, PyStationData
 from miarray import MIArray
 from mitable import PyTableData
 import series
+import fused
 from series import Series
+from spatial import StationIndex, SparseWeights, Reprojector
+import spatial.gridding as gridding
+import spatial.weights as weights
+import mipylib.miutil as miutil
 
 from java.lang import Math, Double
 from java.util import Calendar
@@ -32,7 +37,7 @@ __all__ = [
     'argmin','argmax','array','asarray','asgridarray','asgriddata','asin','asmiarray','asstationdata',
     'atan','atan2','ave_month','histogram','broadcast_to','cdiff','concatenate',
     'corrcoef','cos','degrees','diag','dim_array','datatable','series','dot','exp','eye','fmax','fmin',
-    'griddata','hcurl','hdivg','identity','interp2d',
+    'griddata','griddata_weights','hcurl','hdivg','identity','interp2d','StationIndex','Reprojector',
     'interpn','isarray','isnan','linint2','linregress','linspace','log','log10',
     'logspace','magnitude','max','maximum','mean','median','meshgrid','min','minimum','monthname',
     'nonzero','ones','ones_like','pol2cart','polyval','power',
@@ -1631,15 +1636,21 @@ def hdivg(u, v):
         r = ArrayMath.hdivg(u.asarray(), v.asarray(), xdim.getDimValue(), ydim.getDimValue())
         return DimArray(MIArray(r), u.dims, u.fill_value, u.proj)
               
-def magnitude(u, v):
+def magnitude(u, v, out=None, nthreads=None):
     '''
     Performs the calculation: sqrt(u*u+v*v).
     
     :param u: (*array*) U component array.
     :param v: (*array*) V component array.
+    :param out: (*MIArray*) Optional, output array to be filled.
+    :param nthreads: (*int*) Optional, thread number. If ``out`` or ``nthreads`` is set, the arrays
+        are calculated in parallel chunks which are written into the output array. See
+        ``fused.chunked_apply``.
     
     :returns: Result array.
     '''
+    if isinstance(u, MIArray) and isinstance(v, MIArray) and not (out is None and nthreads is None):
+        return fused.chunked_apply(ArrayMath.magnitude, [u, v], 1, out, nthreads)
     if isinstance(u, DimArray) and isinstance(v, DimArray):
         r = ArrayMath.magnitude(u.asarray(), v.asarray())
         return DimArray(MIArray(r), u.dims, u.fill_value, u.proj)
@@ -1800,9 +1811,11 @@ def interpn(points, values, xi):
     
     :param points: (*list*) The points defining the regular grid in n dimensions.
     :param values: (*array_like*) The data on the regular grid in n dimensions.
-    :param xi: (*list*) The coordinates to sample the gridded data at.
+    :param xi: (*list*) The coordinates to sample the gridded data at. Multiple points can be sampled
+        with a (npoints, ndim) array or list, the interpolation weights are calculated once and 
+        the leading dimensions of ``values`` more than the n dimensions are kept.
     
-    :returns: (*float*) Interpolated value at input coordinates.
+    :returns: (*float or array*) Interpolated value at input coordinates.
     """
     npoints = []
     for p in points:
@@ -1811,7 +1824,14 @@ def interpn(points, values, xi):
         npoints.append(p)
         
     if isinstance(xi, MIArray):
-        xi = xi.aslist()
+        if xi.ndim == 2:
+            nd = xi.shape[1]
+            xx = xi.aslist()
+            xi = [xx[i:i + nd] for i in range(0, len(xx), nd)]
+        else:
+            xi = xi.aslist()
+    if len(xi) > 0 and isinstance(xi[0], (list, tuple, MIArray)):
+        return weights.regular_weights(npoints, __interpn_points(xi)).apply(values)
     nxi = []
     for x in xi:
         if isinstance(x, datetime.datetime):
@@ -1821,11 +1841,28 @@ def interpn(points, values, xi):
     r = ArrayUtil.interpn(npoints, values.asarray(), nxi)
     return r
     
+def __interpn_points(xi):
+    nxi = []
+    for p in xi:
+        if isinstance(p, MIArray):
+            p = p.aslist()
+        pp = []
+        for x in p:
+            if isinstance(x, datetime.datetime):
+                x = miutil.date2num(x)
+            pp.append(x)
+        nxi.append(pp)
+    return nxi
+    
 def griddata(points, values, xi=None, **kwargs):
     '''
     Interpolate scattered data to grid data.
     
-    :param points: (*list*) The list contains x and y coordinate arrays of the scattered data.
+    :param points: (*list or StationIndex*) The list contains x and y coordinate arrays of the scattered data,
+        or a ``StationIndex`` object of the scattered data. The neighbor searching of 'idw' and 'neareast'
+        methods will use the spatial index and run in parallel across grid rows if ``StationIndex`` is
+        used, the index can be reused for different values of the same stations. The other methods use
+        the coordinates of the index.
     :param values: (*array_like*) The scattered data array.
     :param xi: (*list*) The list contains x and y coordinate arrays of the grid data. Default is ``None``,
         the grid x and y coordinate size were both 500.
@@ -1838,12 +1875,20 @@ def griddata(points, values, xi=None, **kwargs):
         is ``None`` in 'idw' method, means no raduis was used. Default is ``[10, 7, 4, 2, 1]`` in cressman 
         method.
     :param convexhull: (*boolean*) If the convexhull will be used to mask result grid data. Default is ``False``.
+    :param nthreads: (*int*) Thread number, only used with ``StationIndex``. Default is ``None``, means the
+        processor number.
     
     :returns: (*array*) Interpolated grid data (2-D array)
     '''
     method = kwargs.pop('method', 'idw')
-    x_s = points[0]
-    y_s = points[1]
+    if isinstance(points, StationIndex):
+        index = points
+        x_s = index.x
+        y_s = index.y
+    else:
+        index = None
+        x_s = points[0]
+        y_s = points[1]
     if xi is None:
         xn = 500
         yn = 500
@@ -1854,7 +1899,9 @@ def griddata(points, values, xi=None, **kwargs):
         y_g = xi[1]
     if isinstance(values, MIArray):
         values = values.asarray()    
-    if method == 'idw':
+    if not index is None and method in ['idw', 'neareast']:
+        r = __griddata_index(index, values, x_g, y_g, method, **kwargs)
+    elif method == 'idw':
         pnum = kwargs.pop('pointnum', 2)
         radius = kwargs.pop('radius', None)
         if radius is None:
@@ -1891,6 +1938,58 @@ def griddata(points, values, xi=None, **kwargs):
         return MIArray(r), x_g, y_g
     else:
         return MIArray(r), x_g, y_g
+        
+def __griddata_index(index, values, x_g, y_g, method, **kwargs):
+    if isinstance(values, Array):
+        values = MIArray(values)
+    values = values.aslist()
+    nthreads = kwargs.pop('nthreads', None)
+    xg = list(x_g) if isinstance(x_g, (list, tuple)) else x_g.aslist()
+    yg = list(y_g) if isinstance(y_g, (list, tuple)) else y_g.aslist()
+    if method == 'idw':
+        pnum = kwargs.pop('pointnum', 2)
+        radius = kwargs.pop('radius', None)
+        r = gridding.idw_grid(index, values, xg, yg, pnum, radius, nthreads)
+    else:
+        radius = kwargs.pop('radius', inf)
+        r = gridding.nearest_grid(index, values, xg, yg, radius, nthreads)
+    return miutil.fromjdoubles(r, [len(yg), len(xg)])
+    
+def griddata_weights(points, xi, method='idw', **kwargs):
+    '''
+    Calculate the sparse interpolation weights from scattered points to grid. The weights can
+    be applied to the values of the same points repeatedly, i.e. ``w.apply(values)``, and the
+    values can have leading dimensions such as time (the last dimension is the points).
+    
+    :param points: (*list or StationIndex*) The list contains x and y coordinate arrays of the 
+        scattered points, or a ``StationIndex`` object.
+    :param xi: (*list*) The list contains x and y coordinate arrays of the grid.
+    :param method: (*string*) The interpolation method. [idw | nearest]
+    :param pointnum: (*int*) Only used for 'idw' method. The number of the points to be used for each grid
+        point interpolation.
+    :param radius: (*float*) Used for 'idw' and 'nearest' methods, the searching raduis. Default is 
+        ``None``, means no raduis was used.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    
+    :returns: (*SparseWeights*) Interpolation weights.
+    '''
+    if isinstance(points, StationIndex):
+        index = points
+    else:
+        index = StationIndex(points[0], points[1])
+    x_g = xi[0]
+    y_g = xi[1]
+    xg = list(x_g) if isinstance(x_g, (list, tuple)) else x_g.aslist()
+    yg = list(y_g) if isinstance(y_g, (list, tuple)) else y_g.aslist()
+    nthreads = kwargs.pop('nthreads', None)
+    radius = kwargs.pop('radius', None)
+    if method == 'idw':
+        pnum = kwargs.pop('pointnum', 2)
+        return weights.idw_weights(index, xg, yg, pnum, radius, nthreads)
+    elif method in ['nearest', 'neareast']:
+        return weights.nearest_weights(index, xg, yg, radius, nthreads)
+    else:
+        raise ValueError('Not supported method: ' + method)
 
 def pol2cart(theta, rho):
     '''
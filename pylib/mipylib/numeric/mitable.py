@@ -10,9 +10,35 @@ import datetime
 from org.meteoinfo.data import TableData, TimeTableData, ArrayUtil, TableUtil, DataTypes
 
 from miarray import MIArray
+from query import QueryEngine
 import mipylib.miutil as miutil
 
-from java.util import Calendar, Date
+from ucar.ma2 import Array, DataType
+from java.util import Calendar, Date, TimeZone
+from java.lang import Long
+import jarray
+
+class _ColumnView(MIArray):
+    '''
+    Read-only view of a cached table column, the cached storage is shared so item assignment
+    is refused. Use ``copy`` to get a writable array.
+    '''
+    def __getitem__(self, indices):
+        r = MIArray.__getitem__(self, indices)
+        if isinstance(r, MIArray):
+            return _ColumnView(r.asarray())
+        return r
+        
+    def __setitem__(self, indices, value):
+        raise ValueError('The table column view is read-only, use copy() to get a writable array!')
+        
+    def copy(self):
+        '''
+        Get a writable copy of the column.
+        
+        :returns: (*MIArray*) Copied array.
+        '''
+        return MIArray(self.asarray().copy())
 
 ###############################################################        
 #  The encapsulate class of TableData
@@ -23,29 +49,16 @@ class PyTableData(object):
         if data is None:
             self.data = TableData()
         self.timedata = isinstance(data, TimeTableData)
+        self._query = None
+        self._columns = {}
         
     def __getitem__(self, key):
         if isinstance(key, (str, unicode)):     
             coldata = self.data.getColumnData(key)
-            if coldata.getDataType().isNumeric():
-                return MIArray(ArrayUtil.array(coldata.getDataValues()))
-            elif coldata.getDataType() == DataTypes.Date:
-                vv = coldata.getData()
-                r = []
-                cal = Calendar.getInstance()
-                for v in vv:
-                    cal.setTime(v)
-                    year = cal.get(Calendar.YEAR)
-                    month = cal.get(Calendar.MONTH) + 1
-                    day = cal.get(Calendar.DAY_OF_MONTH)
-                    hour = cal.get(Calendar.HOUR_OF_DAY)
-                    minute = cal.get(Calendar.MINUTE)
-                    second = cal.get(Calendar.SECOND)
-                    dt = datetime.datetime(year, month, day, hour, minute, second)
-                    r.append(dt)
-                return r
+            if coldata.getDataType() == DataTypes.Date:
+                return miutil.DateArray(self.column(key).asarray().getStorage())
             else:
-                return MIArray(ArrayUtil.array(coldata.getData()))
+                return self.column(key)
         elif isinstance(key, (list, tuple)):
             cols = self.data.findColumns(key)
             dtable = self.data.colSelect(cols)
@@ -58,6 +71,7 @@ class PyTableData(object):
         return None
         
     def __setitem__(self, key, value):
+        self._reset()
         if isinstance(value, MIArray):
             self.data.setColumnData(key, value.aslist())
         else:
@@ -66,6 +80,13 @@ class PyTableData(object):
     def __repr__(self):
         return self.data.toString()
         
+    def _reset(self):
+        '''
+        Clear the query engine and the typed column cache after the table is modified.
+        '''
+        self._query = None
+        self._columns = {}
+        
     @property
     def loc(self):
         return 'loc'
@@ -116,6 +137,7 @@ class PyTableData(object):
         :param colname: (*string*) New column name.
         '''
         self.data.renameColumn(col, colname)
+        self._reset()
         
     def setcolnames(self, colnames):
         '''
@@ -125,7 +147,62 @@ class PyTableData(object):
         '''
         for i in range(len(colnames)):
             self.data.renameColumn(i, colnames[i])
+        self._reset()
     
+    def column(self, colname):
+        '''
+        Return a column as a read-only view of a typed array. The column is converted into primitive
+        storage once and cached until the table is modified, so later accesses return views without
+        copying. The view refuses item assignment, use its ``copy`` method to get a writable array.
+        
+        :param colname: (*string*) Column name.
+        
+        :returns: (*MIArray*) Read-only column view. Numeric columns are double arrays, date columns
+            are long arrays of wall clock epoch milliseconds in whole seconds, ``Long.MIN_VALUE`` for
+            missing dates.
+        '''
+        a = self._columns.get(colname)
+        if a is None or a.getSize() != self.rownum():
+            coldata = self.data.getColumnData(colname)
+            if coldata.getDataType().isNumeric():
+                a = ArrayUtil.array(coldata.getDataValues())
+            elif coldata.getDataType() == DataTypes.Date:
+                vv = coldata.getData()
+                n = vv.size()
+                millis = jarray.zeros(n, 'l')
+                tz = TimeZone.getDefault()
+                for i in xrange(n):
+                    v = vv.get(i)
+                    if v is None:
+                        millis[i] = Long.MIN_VALUE
+                    else:
+                        v = v.getTime()
+                        v += tz.getOffset(v)
+                        millis[i] = v - v % 1000
+                a = Array.factory(DataType.LONG, jarray.array([n], 'i'), millis)
+            else:
+                a = ArrayUtil.array(coldata.getData())
+            self._columns[colname] = a
+        return _ColumnView(a)
+        
+    def cachecolumn(self, colname, a):
+        '''
+        Set the typed array of a column, i.e. the values already parsed by a reader, so ``column``
+        returns it without converting the column again. The arrays of numeric columns are stored
+        as double arrays as ``column`` returns.
+        
+        :param colname: (*string*) Column name.
+        :param a: (*MIArray*) Column values with the row number of the table.
+        '''
+        if isinstance(a, MIArray):
+            a = a.asarray()
+        if a.getSize() != self.rownum():
+            raise ValueError('The array size is not consistent with the row number!')
+        coldata = self.data.getColumnData(colname)
+        if coldata.getDataType().isNumeric() and a.getDataType() != DataType.DOUBLE:
+            a = miutil.fromjdoubles(miutil.jdoubles(a), list(a.getShape()))
+        self._columns[colname] = a
+        
     def coldata(self, key):
         '''
         Return column data as one dimension array.
@@ -163,6 +240,7 @@ class PyTableData(object):
         :param value: (*object*) The value.
         '''
         self.data.setValue(row, col, value)
+        self._reset()
     
     def addcoldata(self, colname, dtype, coldata):
         '''
@@ -176,6 +254,7 @@ class PyTableData(object):
             self.data.addColumnData(colname, dtype, coldata.aslist())
         else:
             self.data.addColumnData(colname, dtype, coldata)
+        self._reset()
 
     def addcol(self, colname, dtype, index=None):
         '''
@@ -191,6 +270,7 @@ class PyTableData(object):
             self.data.addColumn(colname, dtype)
         else:
             self.data.addColumn(index, colname, dtype)
+        self._reset()
     
     def delcol(self, colname):
         '''
@@ -199,6 +279,7 @@ class PyTableData(object):
         :param colname: (*string*) The column name.
         '''
         self.data.removeColumn(colname)
+        self._reset()
         
     def addrow(self, row=None):
         '''
@@ -210,6 +291,7 @@ class PyTableData(object):
             self.data.addRow()
         else:
             self.data.addRow(row)
+        self._reset()
             
     def addrows(self, rows):
         '''
@@ -218,6 +300,7 @@ class PyTableData(object):
         :param rows: (*list*) The list of the rows.
         '''
         self.data.addRows(rows)
+        self._reset()
         
     def delrow(self, row):
         '''
@@ -226,6 +309,7 @@ class PyTableData(object):
         :param row: (*int or DataRow*) Data row.
         '''
         self.data.dataTable.removeRow(row)
+        self._reset()
         
     def delrows(self, rows):
         '''
@@ -234,12 +318,14 @@ class PyTableData(object):
         :param rows: (*list*) Data rows.
         '''
         self.data.dataTable.removRows(rows)
+        self._reset()
         
     def clearrows(self):
         '''
         Clear all rows.               
         '''
         self.data.dataTable.getRows().clear()
+        self._reset()
         
     def getrow(self, index):
         '''
@@ -284,6 +370,7 @@ class PyTableData(object):
             self.data.join(other.data, colname)
         else:
             self.data.join(other.data, colname, colname1)
+        self._reset()
         
     def savefile(self, filename, delimiter=',', format=None, date_format=None, float_format=None):
         '''
@@ -646,6 +733,69 @@ class PyTableData(object):
         :returns: (*PyTableData*) SQL result table.
         '''
         return PyTableData(self.data.sqlSelect(expression))
+        
+    def queryengine(self):
+        '''
+        Get the query engine of the table. The column values and indexes are cached until the
+        table is modified.
+        
+        :returns: (*QueryEngine*) Query engine.
+        '''
+        if self._query is None or self._query.nrows != self.rownum():
+            getcolumn = lambda colname: self.data.getColumnData(colname).getData()
+            self._query = QueryEngine(getcolumn, self.rownum())
+        return self._query
+        
+    def createindex(self, colname, kind='sorted'):
+        '''
+        Create an index of a column to speed up the queries.
+        
+        :param colname: (*string*) The column name.
+        :param kind: (*string*) Index kind ['sorted' | 'hash']. Sorted index is used for range
+            conditions and hash index for equality and IN conditions.
+        '''
+        self.queryengine().index(colname, kind)
+        
+    def queryindex(self, expression):
+        '''
+        Returns the row indices selected by an expression.
+        
+        :param expression: (*string*) SQL WHERE style expression, i.e. ``TEMP > 20 AND NAME LIKE 'B%'``.
+        
+        :returns: (*list*) Sorted row indices.
+        '''
+        return self.queryengine().select(expression)
+        
+    def query(self, expression):
+        '''
+        Returns the rows selected by an expression. The expression is compiled once and the
+        equality and range conditions are evaluated with column indexes built on demand.
+        
+        :param expression: (*string*) SQL WHERE style expression, i.e. ``TEMP > 20 AND NAME LIKE 'B%'``.
+        
+        :returns: (*PyTableData*) Result table.
+        '''
+        inds = self.queryindex(expression)
+        r = self.clone()
+        rows = r.data.dataTable.getRows()
+        keep = [rows.get(i) for i in inds]
+        rows.clear()
+        rows.addAll(keep)
+        return r
+        
+    def joinindex(self, other, colname, colname1=None):
+        '''
+        Returns the matched row indices of joining with another table by equal column values,
+        using the hash index of the other table.
+        
+        :param other: (*PyTableData*) The other table.
+        :param colname: (*string*) The common field name.
+        :param colname1: (*string*) The common field name in the other table. Default is ``None`` if
+            the common field names are same in both tables.
+            
+        :returns: (*list, list*) Matched row indices of this and the other table.
+        '''
+        return self.queryengine().join(other.queryengine(), colname, colname1)
     
     def clone(self):
         '''
@@ -0,0 +1,413 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab compiled and indexed attribute query module
+# Note: Jython
+#-----------------------------------------------------
+
+import re
+import bisect
+import numbers
+
+import mipylib.miutil as miutil
+
+__all__ = [
+    'QueryEngine'
+    ]
+
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<num>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?) |
+    (?P<str>'(?:[^']|'')*'|"(?:[^"]|"")*") |
+    (?P<op><>|!=|==|<=|>=|=|<|>|\(|\)|,) |
+    (?P<name>\[[^\]]+\]|[A-Za-z_][A-Za-z_0-9.]*)
+    )''', re.VERBOSE)
+
+_KEYWORDS = ['AND', 'OR', 'NOT', 'IN', 'BETWEEN', 'LIKE', 'IS', 'NULL']
+
+def _tokenize(expression):
+    tokens = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        m = _TOKEN.match(expression, pos)
+        if m is None or m.end() == pos:
+            raise ValueError('Invalid expression at: ' + expression[pos:])
+        pos = m.end()
+        if m.group('num') is not None:
+            s = m.group('num')
+            if '.' in s or 'e' in s or 'E' in s:
+                v = float(s)
+            else:
+                v = int(s)
+            tokens.append(('value', v))
+        elif m.group('str') is not None:
+            s = m.group('str')
+            tokens.append(('value', s[1:-1].replace(s[0] * 2, s[0])))
+        elif m.group('op') is not None:
+            tokens.append(('op', m.group('op')))
+        else:
+            s = m.group('name')
+            if s.upper() in _KEYWORDS:
+                tokens.append(('kw', s.upper()))
+            elif s.startswith('['):
+                tokens.append(('field', s[1:-1]))
+            else:
+                tokens.append(('field', s))
+    return tokens
+
+class _Parser(object):
+    '''
+    Recursive descent parser of SQL WHERE style expressions.
+    '''
+    def __init__(self, expression):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def next(self):
+        t = self.peek()
+        self.pos += 1
+        return t
+
+    def accept(self, kind, value=None):
+        t = self.peek()
+        if t[0] == kind and (value is None or t[1] == value):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, kind, value=None):
+        if not self.accept(kind, value):
+            raise ValueError('Expect %s but get %s' % (value or kind, self.peek()[1]))
+
+    def parse(self):
+        node = self.orexpr()
+        if self.pos < len(self.tokens):
+            raise ValueError('Unexpected token: %s' % str(self.peek()[1]))
+        return node
+
+    def orexpr(self):
+        nodes = [self.andexpr()]
+        while self.accept('kw', 'OR'):
+            nodes.append(self.andexpr())
+        return nodes[0] if len(nodes) == 1 else ('or',) + tuple(nodes)
+
+    def andexpr(self):
+        nodes = [self.notexpr()]
+        while self.accept('kw', 'AND'):
+            nodes.append(self.notexpr())
+        return nodes[0] if len(nodes) == 1 else ('and',) + tuple(nodes)
+
+    def notexpr(self):
+        if self.accept('kw', 'NOT'):
+            return ('not', self.notexpr())
+        return self.primary()
+
+    def value(self):
+        t = self.next()
+        if t[0] != 'value':
+            raise ValueError('Expect value but get %s' % str(t[1]))
+        return t[1]
+
+    def primary(self):
+        if self.accept('op', '('):
+            node = self.orexpr()
+            self.expect('op', ')')
+            return node
+        t = self.next()
+        if t[0] == 'value':
+            #Value on the left side
+            op = self.next()
+            field = self.next()
+            if op[0] != 'op' or field[0] != 'field':
+                raise ValueError('Invalid comparison')
+            rop = {'<':'>', '<=':'>=', '>':'<', '>=':'<='}.get(op[1], op[1])
+            return self.comparison(field[1], rop, t[1])
+        if t[0] != 'field':
+            raise ValueError('Expect field but get %s' % str(t[1]))
+        field = t[1]
+        negate = self.accept('kw', 'NOT')
+        if self.accept('kw', 'IN'):
+            self.expect('op', '(')
+            values = [self.value()]
+            while self.accept('op', ','):
+                values.append(self.value())
+            self.expect('op', ')')
+            node = ('in', field, values)
+        elif self.accept('kw', 'BETWEEN'):
+            lo = self.value()
+            self.expect('kw', 'AND')
+            hi = self.value()
+            node = ('range', field, lo, True, hi, True)
+        elif self.accept('kw', 'LIKE'):
+            pat = self.value()
+            regex = '^' + ''.join('.*' if c == '%' else ('.' if c == '_' else re.escape(c)) for c in pat) + '$'
+            node = ('like', field, re.compile(regex, re.S))
+        elif not negate and self.accept('kw', 'IS'):
+            negate = self.accept('kw', 'NOT')
+            self.expect('kw', 'NULL')
+            node = ('null', field)
+        else:
+            if negate:
+                raise ValueError('Invalid NOT position')
+            op = self.next()
+            if op[0] != 'op':
+                raise ValueError('Expect operator but get %s' % str(op[1]))
+            return self.comparison(field, op[1], self.value())
+        return ('not', node) if negate else node
+
+    def comparison(self, field, op, value):
+        if op in ('=', '=='):
+            return ('in', field, [value])
+        elif op in ('!=', '<>'):
+            return ('not', ('in', field, [value]))
+        elif op == '<':
+            return ('range', field, None, False, value, False)
+        elif op == '<=':
+            return ('range', field, None, False, value, True)
+        elif op == '>':
+            return ('range', field, value, False, None, False)
+        elif op == '>=':
+            return ('range', field, value, True, None, False)
+        raise ValueError('Invalid operator: ' + op)
+
+def _key(v):
+    '''
+    Comparable key of a value, numbers and strings are compared separately.
+    '''
+    if isinstance(v, bool):
+        return (0, int(v))
+    if isinstance(v, numbers.Number):
+        return (0, v)
+    return (1, unicode(v))
+
+class QueryEngine(object):
+    '''
+    Attribute query engine with compiled expressions and per-field indexes built on demand.
+    The equality and IN conditions use hash indexes and the range conditions use sorted
+    indexes, so the selections are sublinear in the record number, other conditions are
+    tested on the candidate records only.
+
+    :param getcolumn: (*function*) Function returning the value list of a field.
+    :param nrows: (*int*) Record number.
+    :param nthreads: (*int*) Thread number of the full scans. Default is ``None``, means the processor number.
+    '''
+    def __init__(self, getcolumn, nrows, nthreads=None):
+        self._getcolumn = getcolumn
+        self.nrows = nrows
+        self.nthreads = nthreads
+        self._columns = {}
+        self._hash = {}
+        self._sorted = {}
+        self._compiled = {}
+
+    def __repr__(self):
+        return 'QueryEngine(nrows=%i, indexes=%s)' % (self.nrows, sorted(set(self._hash.keys() + self._sorted.keys())))
+
+    def column(self, field):
+        '''
+        Get cached value list of a field.
+        '''
+        col = self._columns.get(field)
+        if col is None:
+            col = list(self._getcolumn(field))
+            self._columns[field] = col
+        return col
+
+    def index(self, field, kind='sorted'):
+        '''
+        Build an index of a field.
+
+        :param field: (*string*) Field name.
+        :param kind: (*string*) Index kind [sorted | hash].
+        '''
+        if kind == 'hash':
+            self._hashindex(field)
+        else:
+            self._sortedindex(field)
+
+    def _hashindex(self, field):
+        idx = self._hash.get(field)
+        if idx is None:
+            idx = {}
+            for i, v in enumerate(self.column(field)):
+                if not v is None:
+                    idx.setdefault(_key(v), []).append(i)
+            self._hash[field] = idx
+        return idx
+
+    def _sortedindex(self, field):
+        idx = self._sorted.get(field)
+        if idx is None:
+            pairs = sorted((_key(v), i) for i, v in enumerate(self.column(field)) if not v is None)
+            idx = ([p[0] for p in pairs], [p[1] for p in pairs])
+            self._sorted[field] = idx
+        return idx
+
+    def compile(self, expression):
+        '''
+        Compile an expression, the compiled expressions are cached.
+
+        :param expression: (*string*) SQL WHERE style expression, i.e. ``POP > 1e6 AND NAME LIKE 'B%'``.
+
+        :returns: Expression tree.
+        '''
+        node = self._compiled.get(expression)
+        if node is None:
+            node = _Parser(expression).parse()
+            self._compiled[expression] = node
+        return node
+
+    def _indexed(self, node):
+        return node[0] in ('in', 'range')
+
+    def _lookup(self, node):
+        '''
+        Get the matched record set of an indexed condition.
+        '''
+        field = node[1]
+        if node[0] == 'in':
+            idx = self._hashindex(field)
+            r = set()
+            for v in node[2]:
+                r.update(idx.get(_key(v), []))
+            return r
+        keys, rows = self._sortedindex(field)
+        lo, loinc, hi, hiinc = node[2:]
+        if lo is None:
+            kind = 0 if hi is None else _key(hi)[0]
+            start = bisect.bisect_left(keys, (kind,))
+        else:
+            lo = _key(lo)
+            start = bisect.bisect_left(keys, lo) if loinc else bisect.bisect_right(keys, lo)
+        if hi is None:
+            end = bisect.bisect_left(keys, (lo[0] + 1,))
+        else:
+            hi = _key(hi)
+            end = bisect.bisect_right(keys, hi) if hiinc else bisect.bisect_left(keys, hi)
+        return set(rows[start:end])
+
+    def _predicate(self, node):
+        '''
+        Compile a condition to a predicate function of record index.
+        '''
+        op = node[0]
+        if op == 'and':
+            funcs = [self._predicate(n) for n in node[1:]]
+            return lambda i: all(f(i) for f in funcs)
+        elif op == 'or':
+            funcs = [self._predicate(n) for n in node[1:]]
+            return lambda i: any(f(i) for f in funcs)
+        elif op == 'not':
+            func = self._predicate(node[1])
+            return lambda i: not func(i)
+        col = self.column(node[1])
+        if op == 'in':
+            keys = set(_key(v) for v in node[2])
+            return lambda i: col[i] is not None and _key(col[i]) in keys
+        elif op == 'range':
+            lo, loinc, hi, hiinc = node[2:]
+            kind = _key(lo if hi is None else hi)[0]
+            lo = None if lo is None else _key(lo)
+            hi = None if hi is None else _key(hi)
+            def func(i):
+                v = col[i]
+                if v is None:
+                    return False
+                k = _key(v)
+                if k[0] != kind:
+                    return False
+                if not lo is None and (k < lo or (k == lo and not loinc)):
+                    return False
+                if not hi is None and (k > hi or (k == hi and not hiinc)):
+                    return False
+                return True
+            return func
+        elif op == 'like':
+            regex = node[2]
+            return lambda i: col[i] is not None and regex.match(unicode(col[i])) is not None
+        elif op == 'null':
+            return lambda i: col[i] is None or col[i] == ''
+        raise ValueError('Invalid expression node: ' + op)
+
+    def _scan(self, func, candidates=None):
+        '''
+        Test a predicate on the candidate records, all records are scanned in parallel blocks
+        if no candidates.
+        '''
+        if not candidates is None:
+            return set(i for i in candidates if func(i))
+        def block(se):
+            return [i for i in xrange(se[0], se[1]) if func(i)]
+        r = set()
+        for a in miutil.parallel_map(block, miutil.chunks(self.nrows, self.nthreads), self.nthreads):
+            r.update(a)
+        return r
+
+    def _evaluate(self, node, candidates=None):
+        op = node[0]
+        if op == 'and':
+            children = list(node[1:])
+            indexed = [n for n in children if self._indexed(n)]
+            others = [n for n in children if not self._indexed(n)]
+            r = candidates
+            for n in indexed:
+                s = self._lookup(n)
+                r = s if r is None else r & s
+            for n in others:
+                r = self._evaluate(n, r)
+            return r
+        elif op == 'or':
+            r = set()
+            for n in node[1:]:
+                r |= self._evaluate(n, candidates)
+            return r
+        elif op == 'not':
+            s = self._evaluate(node[1], candidates)
+            base = set(range(self.nrows)) if candidates is None else candidates
+            return base - s
+        elif self._indexed(node):
+            s = self._lookup(node)
+            return s if candidates is None else candidates & s
+        else:
+            return self._scan(self._predicate(node), candidates)
+
+    def select(self, expression):
+        '''
+        Select records by an expression.
+
+        :param expression: (*string*) SQL WHERE style expression. Supported operators: ``= == != <> < <= > >=``,
+            ``IN (...)``, ``BETWEEN ... AND ...``, ``LIKE`` with ``%`` and ``_``, ``IS [NOT] NULL``, ``AND``,
+            ``OR``, ``NOT`` and parentheses.
+
+        :returns: (*list*) Sorted indices of the selected records.
+        '''
+        return sorted(self._evaluate(self.compile(expression)))
+
+    def join(self, other, field, otherfield=None):
+        '''
+        Join records with another query engine by equal field values, using the hash index of the
+        other engine.
+
+        :param other: (*QueryEngine*) The other engine.
+        :param field: (*string*) Field name.
+        :param otherfield: (*string*) Field name of the other engine. Default is ``None``, same as ``field``.
+
+        :returns: (*list, list*) Matched record indices of this and the other engine.
+        '''
+        if otherfield is None:
+            otherfield = field
+        idx = other._hashindex(otherfield)
+        r1 = []
+        r2 = []
+        for i, v in enumerate(self.column(field)):
+            if v is None:
+                continue
+            for j in idx.get(_key(v), []):
+                r1.append(i)
+                r2.append(j)
+        return r1, r2
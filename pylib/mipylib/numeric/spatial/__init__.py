@@ -0,0 +1,8 @@
+from .kdtree import *
+from .weights import *
+from .reproject import *
+from .transform import *
+from .gridmask import *
+from .strtree import *
+from .zonal import *
+from .geodesic import *
\ No newline at end of file
@@ -0,0 +1,202 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab vectorized distance and area module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from polygon import as_polygons
+
+__all__ = [
+    'distance_matrix','layer_areas','pairwise_haversine','path_lengths'
+    ]
+
+#Mean earth radius in meters
+_RADIUS = 6371000.0
+
+def _doubles(v):
+    '''
+    Get flat double values and shape of an array.
+    '''
+    if isinstance(v, MIArray):
+        return miutil.jdoubles(v.asarray()), list(v.shape)
+    if isinstance(v, (int, long, float)):
+        return jarray.array([float(v)], 'd'), []
+    v = [float(a) for a in v]
+    return jarray.array(v, 'd'), [len(v)]
+
+def _concat(rr):
+    r = []
+    for a in rr:
+        r.extend(a)
+    return r
+
+def _haversine(lon1, lat1, lon2, lat2, radius):
+    rad = math.pi / 180.
+    p1 = lat1 * rad
+    p2 = lat2 * rad
+    a = math.sin((p2 - p1) * 0.5) ** 2 + math.cos(p1) * math.cos(p2) * math.sin((lon2 - lon1) * rad * 0.5) ** 2
+    a = math.sqrt(a)
+    if a > 1:
+        a = 1.0
+    return 2 * radius * math.asin(a)
+
+def _euclid(x1, y1, x2, y2, radius):
+    return math.hypot(x2 - x1, y2 - y1)
+
+def pairwise_haversine(lon1, lat1, lon2, lat2, radius=_RADIUS, nthreads=None):
+    '''
+    Calculate great circle distances between pairs of points element-wise.
+
+    :param lon1: (*array_like*) Longitudes of the first points.
+    :param lat1: (*array_like*) Latitudes of the first points.
+    :param lon2: (*array_like*) Longitudes of the second points.
+    :param lat2: (*array_like*) Latitudes of the second points.
+    :param radius: (*float*) Earth radius. Default is ``6371000`` meters.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray*) Distances with the shape of ``lon1``, NaN for missing points.
+    '''
+    x1, shape = _doubles(lon1)
+    y1 = _doubles(lat1)[0]
+    x2 = _doubles(lon2)[0]
+    y2 = _doubles(lat2)[0]
+    n = len(x1)
+    if len(y1) != n or len(x2) != n or len(y2) != n:
+        raise ValueError('The coordinate arrays must have same size!')
+    def block(se):
+        return [_haversine(x1[i], y1[i], x2[i], y2[i], radius) for i in xrange(se[0], se[1])]
+    r = _concat(miutil.parallel_map(block, miutil.chunks(n, nthreads), nthreads))
+    return MIArray(miutil.fromjdoubles(r, shape or [1]))
+
+def distance_matrix(x1, y1, x2=None, y2=None, islonlat=False, radius=_RADIUS, nthreads=None):
+    '''
+    Calculate distances between all pairs of two point sets.
+
+    :param x1: (*array_like*) X coordinates of the first points.
+    :param y1: (*array_like*) Y coordinates of the first points.
+    :param x2: (*array_like*) X coordinates of the second points. Default is ``None``, same as the
+        first points.
+    :param y2: (*array_like*) Y coordinates of the second points.
+    :param islonlat: (*boolean*) x/y is longitude/latitude or not. Great circle distances in meters
+        are calculated for longitude/latitude. Default is ``False``.
+    :param radius: (*float*) Earth radius. Default is ``6371000`` meters.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray*) Distance matrix with shape (n1, n2).
+    '''
+    x1 = _doubles(x1)[0]
+    y1 = _doubles(y1)[0]
+    if x2 is None:
+        x2 = x1
+        y2 = y1
+    else:
+        x2 = _doubles(x2)[0]
+        y2 = _doubles(y2)[0]
+    n1 = len(x1)
+    n2 = len(x2)
+    func = _haversine if islonlat else _euclid
+    def rows(se):
+        r = []
+        for i in xrange(se[0], se[1]):
+            xi = x1[i]
+            yi = y1[i]
+            r.extend([func(xi, yi, x2[j], y2[j], radius) for j in xrange(n2)])
+        return r
+    r = _concat(miutil.parallel_map(rows, miutil.chunks(n1, nthreads), nthreads))
+    return MIArray(miutil.fromjdoubles(r, [n1, n2]))
+
+def path_lengths(x, y, offsets=None, islonlat=False, radius=_RADIUS, nthreads=None):
+    '''
+    Calculate lengths of many paths, i.e. trajectories. The segments with missing end points
+    are skipped.
+
+    :param x: (*array_like*) X coordinates. 2-D array (path, point) if ``offsets`` is ``None``,
+        otherwise flat coordinates of all paths.
+    :param y: (*array_like*) Y coordinates.
+    :param offsets: (*array_like*) Start index of each path in the flat coordinates, with the total
+        point number as the last element. Default is ``None``.
+    :param islonlat: (*boolean*) x/y is longitude/latitude or not. Default is ``False``.
+    :param radius: (*float*) Earth radius. Default is ``6371000`` meters.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray*) Path lengths, meters for longitude/latitude.
+    '''
+    xs, shape = _doubles(x)
+    ys = _doubles(y)[0]
+    if offsets is None:
+        if len(shape) == 1:
+            shape = [1] + shape
+        npt = shape[-1]
+        offsets = range(0, len(xs) + 1, npt)
+    else:
+        if isinstance(offsets, MIArray):
+            offsets = offsets.aslist()
+        offsets = [int(a) for a in offsets]
+    npath = len(offsets) - 1
+    func = _haversine if islonlat else _euclid
+    def paths(se):
+        r = []
+        for k in xrange(se[0], se[1]):
+            s = 0.0
+            for i in xrange(offsets[k], offsets[k + 1] - 1):
+                d = func(xs[i], ys[i], xs[i + 1], ys[i + 1], radius)
+                if d == d:
+                    s += d
+            r.append(s)
+        return r
+    r = _concat(miutil.parallel_map(paths, miutil.chunks(npath, nthreads), nthreads))
+    return MIArray(miutil.fromjdoubles(r, [npath]))
+
+def _ringarea(points, islonlat, radius):
+    '''
+    Get the absolute area of a ring, the spherical excess approximation is used for
+    longitude/latitude.
+    '''
+    n = len(points)
+    s = 0.0
+    if islonlat:
+        rad = math.pi / 180.
+        for i in xrange(n):
+            p1 = points[i]
+            p2 = points[(i + 1) % n]
+            s += (p2.X - p1.X) * rad * (2 + math.sin(p1.Y * rad) + math.sin(p2.Y * rad))
+        return abs(s * radius * radius * 0.5)
+    for i in xrange(n):
+        p1 = points[i]
+        p2 = points[(i + 1) % n]
+        s += p1.X * p2.Y - p2.X * p1.Y
+    return abs(s * 0.5)
+
+def _polygonarea(shape, islonlat, radius):
+    a = 0.0
+    for p in shape.getPolygons():
+        a += _ringarea(list(p.getOutLine()), islonlat, radius)
+        if p.hasHole():
+            for line in p.getHoleLines():
+                a -= _ringarea(list(line), islonlat, radius)
+    return a
+
+def layer_areas(layer, islonlat=True, radius=_RADIUS, nthreads=None):
+    '''
+    Calculate areas of all polygons of a layer.
+
+    :param layer: (*MILayer or list*) Polygon layer or polygon list.
+    :param islonlat: (*boolean*) The coordinates are longitude/latitude or not. The areas are square
+        meters for longitude/latitude. Default is ``True``.
+    :param radius: (*float*) Earth radius. Default is ``6371000`` meters.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray*) Polygon areas.
+    '''
+    polygons = as_polygons(layer)
+    def block(se):
+        return [_polygonarea(polygons[i], islonlat, radius) for i in xrange(se[0], se[1])]
+    r = _concat(miutil.parallel_map(block, miutil.chunks(len(polygons), nthreads), nthreads))
+    return MIArray(miutil.fromjdoubles(r, [len(r)]))
@@ -0,0 +1,106 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab scattered data gridding module using spatial index
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+
+import mipylib.miutil as miutil
+
+from java.lang import Double
+nan = Double.NaN
+
+def _valid_mask(values):
+    return [not math.isnan(v) for v in values]
+
+def _gridrows(func, ny, nthreads):
+    '''
+    Calculate grid values row by row in parallel.
+    '''
+    def rowblock(se):
+        r = []
+        for i in xrange(se[0], se[1]):
+            r.extend(func(i))
+        return r
+    blocks = miutil.parallel_map(rowblock, miutil.chunks(ny, nthreads), nthreads)
+    data = []
+    for b in blocks:
+        data.extend(b)
+    return data
+
+def idw_grid(index, values, xg, yg, pointnum=2, radius=None, nthreads=None):
+    '''
+    Inverse distance weighted interpolation to grid points.
+
+    :param index: (*StationIndex*) The station spatial index.
+    :param values: (*list*) Station values.
+    :param xg: (*list*) X coordinates of the grid.
+    :param yg: (*list*) Y coordinates of the grid.
+    :param pointnum: (*int*) Nearest station number used for each grid point. If ``radius``
+        is not ``None``, the grid value will be NaN if the station number within the radius
+        is less than ``pointnum``.
+    :param radius: (*float*) Searching radius. Default is ``None``.
+    :param nthreads: (*int*) Thread number.
+
+    :returns: (*list*) Flattened grid values with y/x order.
+    '''
+    mask = _valid_mask(values)
+    def row(i):
+        y = yg[i]
+        r = []
+        for x in xg:
+            if radius is None:
+                dists, inds = index.query(x, y, pointnum, mask=mask)
+            else:
+                dists, inds = index.query_radius(x, y, radius, mask=mask)
+                if len(inds) < pointnum:
+                    r.append(nan)
+                    continue
+            if len(inds) == 0:
+                r.append(nan)
+                continue
+            s = 0.0
+            ws = 0.0
+            v = None
+            for d, k in zip(dists, inds):
+                if d == 0:
+                    v = values[k]
+                    break
+                w = 1.0 / (d * d)
+                s += w * values[k]
+                ws += w
+            if v is None:
+                v = s / ws
+            r.append(v)
+        return r
+    return _gridrows(row, len(yg), nthreads)
+
+def nearest_grid(index, values, xg, yg, radius=None, nthreads=None):
+    '''
+    Nearest neighbor interpolation to grid points.
+
+    :param index: (*StationIndex*) The station spatial index.
+    :param values: (*list*) Station values.
+    :param xg: (*list*) X coordinates of the grid.
+    :param yg: (*list*) Y coordinates of the grid.
+    :param radius: (*float*) Searching radius. Default is ``None``.
+    :param nthreads: (*int*) Thread number.
+
+    :returns: (*list*) Flattened grid values with y/x order.
+    '''
+    mask = _valid_mask(values)
+    if not radius is None and math.isinf(radius):
+        radius = None
+    def row(i):
+        y = yg[i]
+        r = []
+        for x in xg:
+            dists, inds = index.query(x, y, 1, radius=radius, mask=mask)
+            if len(inds) == 0:
+                r.append(nan)
+            else:
+                r.append(values[inds[0]])
+        return r
+    return _gridrows(row, len(yg), nthreads)
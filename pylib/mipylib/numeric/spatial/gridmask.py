@@ -0,0 +1,195 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab rasterized polygon grid mask module
+# Note: Jython
+#-----------------------------------------------------
+
+import bisect
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from weights import _Axis, _bounds
+from polygon import _coords, polygon_rings, as_polygons, ring_edges, crossings, bin_edges
+
+from java.lang import Double
+nan = Double.NaN
+
+__all__ = [
+    'GridMask'
+    ]
+
+def _rasterize(edges, xs, ys, nthreads=None):
+    '''
+    Rasterize a polygon (even-odd rule) on ascending sample coordinates, return the
+    inside sample indices of each row.
+    '''
+    bins = bin_edges(edges, ys)
+    def rows(se):
+        r = []
+        for i in xrange(se[0], se[1]):
+            cs = crossings(bins[i], ys[i])
+            inds = []
+            for k in xrange(0, len(cs) - 1, 2):
+                j0 = bisect.bisect_left(xs, cs[k])
+                j1 = bisect.bisect_left(xs, cs[k + 1])
+                inds.extend(xrange(j0, j1))
+            r.append(inds)
+        return r
+    rr = miutil.parallel_map(rows, miutil.chunks(len(ys), nthreads), nthreads)
+    r = []
+    for a in rr:
+        r.extend(a)
+    return r
+
+def _subsamples(ax, nsub):
+    '''
+    Get ascending sub-sample coordinates of the cells of an ascending axis and the
+    cell index of each sub-sample.
+    '''
+    v = []
+    cells = []
+    for i, (lo, hi) in enumerate(_bounds(ax.v)):
+        d = (hi - lo) / nsub
+        for k in range(nsub):
+            v.append(lo + (k + 0.5) * d)
+            cells.append(i)
+    return v, cells
+
+class GridMask(object):
+    '''
+    Precomputed polygon mask of a rectilinear grid. The polygons are rasterized once with
+    scanlines and binned edges, then the mask can be applied to any array on the grid with
+    leading dimensions (i.e. time and level) by ``maskout``, ``maskin`` or ``multiply``.
+
+    :param x: (*array_like*) X coordinates of the grid.
+    :param y: (*array_like*) Y coordinates of the grid.
+    :param polygons: (*list*) Polygon list, a polygon layer or a polygon.
+    :param fraction: (*boolean*) Calculate fractional cell coverage or not. Default is ``False``.
+    :param nsub: (*int*) Sub-sample number of each cell side for the fractional coverage.
+        Default is ``5``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    '''
+    def __init__(self, x, y, polygons, fraction=False, nsub=5, nthreads=None):
+        self.x = _coords(x)
+        self.y = _coords(y)
+        self.nx = len(self.x)
+        self.ny = len(self.y)
+        self.shape = [self.ny, self.nx]
+        xa = _Axis(self.x)
+        ya = _Axis(self.y)
+        n = self.nx * self.ny
+        inside = [False] * n
+        polygons = as_polygons(polygons)
+        for p in polygons:
+            edges = ring_edges(polygon_rings(p))
+            rows = _rasterize(edges, xa.v, ya.v, nthreads)
+            for i, inds in enumerate(rows):
+                off = ya.index(i) * self.nx
+                for j in inds:
+                    inside[off + xa.index(j)] = True
+        self._inside = inside
+        self._outinds = [k for k in xrange(n) if not inside[k]]
+        self._ininds = [k for k in xrange(n) if inside[k]]
+        self.fraction = None
+        if fraction:
+            xs, xcells = _subsamples(xa, nsub)
+            ys, ycells = _subsamples(ya, nsub)
+            count = [0] * n
+            for p in polygons:
+                edges = ring_edges(polygon_rings(p))
+                rows = _rasterize(edges, xs, ys, nthreads)
+                for i, inds in enumerate(rows):
+                    off = ya.index(ycells[i]) * self.nx
+                    for j in inds:
+                        count[off + xa.index(xcells[j])] += 1
+            ns = float(nsub * nsub)
+            self.fraction = [min(c / ns, 1.0) for c in count]
+
+    def __repr__(self):
+        return 'GridMask(shape=%s, inside=%i)' % (self.shape, len(self._ininds))
+
+    def asarray(self):
+        '''
+        Get the mask array, 1 for the cells inside the polygons and 0 for the others. The
+        fractional coverage array is returned if it was calculated.
+
+        :returns: (*MIArray*) Mask array.
+        '''
+        if self.fraction is None:
+            data = [1.0 if v else 0.0 for v in self._inside]
+        else:
+            data = self.fraction
+        return MIArray(miutil.fromjdoubles(data, self.shape))
+
+    def _apply(self, a, func, nthreads=None):
+        if isinstance(a, MIArray):
+            a = a.asarray()
+        shape = list(a.getShape())
+        if shape[-2:] != self.shape:
+            raise ValueError('The last two dimensions of the array are not consistent with the mask grid!')
+        n = self.nx * self.ny
+        nslab = 1
+        for s in shape[:-2]:
+            nslab *= s
+        data = miutil.jdoubles(a)
+        def slabs(se):
+            r = []
+            for t in xrange(se[0], se[1]):
+                v = list(data[t * n:(t + 1) * n])
+                func(v)
+                r.extend(v)
+            return r
+        rr = miutil.parallel_map(slabs, miutil.chunks(nslab, nthreads), nthreads)
+        r = []
+        for v in rr:
+            r.extend(v)
+        return MIArray(miutil.fromjdoubles(r, shape))
+
+    def maskout(self, a, nthreads=None):
+        '''
+        Set the elements outside the polygons as NaN.
+
+        :param a: (*array_like*) The array, the last two dimensions are y/x.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+        :returns: (*MIArray*) Masked array.
+        '''
+        inds = self._outinds
+        def func(v):
+            for k in inds:
+                v[k] = nan
+        return self._apply(a, func, nthreads)
+
+    def maskin(self, a, nthreads=None):
+        '''
+        Set the elements inside the polygons as NaN.
+
+        :param a: (*array_like*) The array, the last two dimensions are y/x.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+        :returns: (*MIArray*) Masked array.
+        '''
+        inds = self._ininds
+        def func(v):
+            for k in inds:
+                v[k] = nan
+        return self._apply(a, func, nthreads)
+
+    def multiply(self, a, nthreads=None):
+        '''
+        Multiply the array by the mask, the fractional coverage is used if it was calculated.
+
+        :param a: (*array_like*) The array, the last two dimensions are y/x.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+        :returns: (*MIArray*) Result array.
+        '''
+        if self.fraction is None:
+            w = [1.0 if v else 0.0 for v in self._inside]
+        else:
+            w = self.fraction
+        def func(v):
+            for k in xrange(len(v)):
+                v[k] *= w[k]
+        return self._apply(a, func, nthreads)
@@ -0,0 +1,206 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab k-d tree spatial index module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+import heapq
+
+from org.meteoinfo.data import ArrayUtil
+
+from mipylib.numeric.miarray import MIArray
+
+__all__ = [
+    'StationIndex'
+    ]
+
+class StationIndex(object):
+    '''
+    K-d tree spatial index of scattered station locations. The index is built once and can
+    be reused by ``griddata`` for k-nearest and radius neighbor searching.
+
+    :param x: (*array_like*) X coordinates of the stations.
+    :param y: (*array_like*) Y coordinates of the stations.
+    :param leafsize: (*int*) Maximum station number of a leaf node. Default is ``8``.
+    '''
+    def __init__(self, x, y, leafsize=8):
+        if isinstance(x, (list, tuple)):
+            x = MIArray(ArrayUtil.array(x))
+        if isinstance(y, (list, tuple)):
+            y = MIArray(ArrayUtil.array(y))
+        if x.size != y.size:
+            raise ValueError('x and y must have same size!')
+        self.x = x
+        self.y = y
+        self._x = [float(v) for v in x.aslist()]
+        self._y = [float(v) for v in y.aslist()]
+        self.n = len(self._x)
+        self.leafsize = max(1, leafsize)
+        self._build()
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        return 'StationIndex(n=%i, nodes=%i)' % (self.n, len(self._lo))
+
+    def _build(self):
+        xs = self._x
+        ys = self._y
+        self._idx = range(self.n)
+        self._lo = []
+        self._hi = []
+        self._left = []
+        self._right = []
+        self._xmin = []
+        self._xmax = []
+        self._ymin = []
+        self._ymax = []
+        if self.n == 0:
+            return
+
+        stack = [(0, self.n, self._newnode(0, self.n))]
+        while stack:
+            lo, hi, node = stack.pop()
+            if hi - lo <= self.leafsize:
+                continue
+            if self._xmax[node] - self._xmin[node] >= self._ymax[node] - self._ymin[node]:
+                coords = xs
+            else:
+                coords = ys
+            sub = sorted(self._idx[lo:hi], key=lambda i: coords[i])
+            self._idx[lo:hi] = sub
+            mid = (lo + hi) // 2
+            left = self._newnode(lo, mid)
+            right = self._newnode(mid, hi)
+            self._left[node] = left
+            self._right[node] = right
+            stack.append((lo, mid, left))
+            stack.append((mid, hi, right))
+
+    def _newnode(self, lo, hi):
+        xs = self._x
+        ys = self._y
+        nx = [xs[i] for i in self._idx[lo:hi]]
+        ny = [ys[i] for i in self._idx[lo:hi]]
+        self._lo.append(lo)
+        self._hi.append(hi)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._xmin.append(min(nx))
+        self._xmax.append(max(nx))
+        self._ymin.append(min(ny))
+        self._ymax.append(max(ny))
+        return len(self._lo) - 1
+
+    def _mindist2(self, node, x, y):
+        dx = 0.0
+        if x < self._xmin[node]:
+            dx = self._xmin[node] - x
+        elif x > self._xmax[node]:
+            dx = x - self._xmax[node]
+        dy = 0.0
+        if y < self._ymin[node]:
+            dy = self._ymin[node] - y
+        elif y > self._ymax[node]:
+            dy = y - self._ymax[node]
+        return dx * dx + dy * dy
+
+    def query(self, x, y, k=1, radius=None, mask=None):
+        '''
+        Query the k nearest stations of a point.
+
+        :param x: (*float*) X coordinate of the point.
+        :param y: (*float*) Y coordinate of the point.
+        :param k: (*int*) Number of nearest stations to return. Default is ``1``.
+        :param radius: (*float*) Only return stations within this distance. Default is ``None``.
+        :param mask: (*list*) Boolean list of the stations, only the stations with ``True`` value
+            are searched. Default is ``None``, all stations are searched.
+
+        :returns: (*list, list*) Distances and indices of the nearest stations, sorted by distance.
+        '''
+        if self.n == 0 or k <= 0:
+            return [], []
+        xs = self._x
+        ys = self._y
+        idx = self._idx
+        maxd2 = float('inf') if radius is None else radius * radius
+        heap = []    #max-heap of (-dist2, index)
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            bound = maxd2 if len(heap) < k else -heap[0][0]
+            if self._mindist2(node, x, y) > bound:
+                continue
+            left = self._left[node]
+            if left < 0:
+                for j in xrange(self._lo[node], self._hi[node]):
+                    i = idx[j]
+                    if not mask is None and not mask[i]:
+                        continue
+                    dx = xs[i] - x
+                    dy = ys[i] - y
+                    d2 = dx * dx + dy * dy
+                    if d2 > maxd2:
+                        continue
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d2, i))
+                    elif d2 < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d2, i))
+            else:
+                right = self._right[node]
+                #Visit the nearer child first
+                if self._mindist2(left, x, y) <= self._mindist2(right, x, y):
+                    stack.append(right)
+                    stack.append(left)
+                else:
+                    stack.append(left)
+                    stack.append(right)
+        heap.sort(reverse=True)
+        dists = [math.sqrt(-d2) for d2, i in heap]
+        inds = [i for d2, i in heap]
+        return dists, inds
+
+    def query_radius(self, x, y, radius, mask=None):
+        '''
+        Query the stations within a distance of a point.
+
+        :param x: (*float*) X coordinate of the point.
+        :param y: (*float*) Y coordinate of the point.
+        :param radius: (*float*) The searching radius.
+        :param mask: (*list*) Boolean list of the stations, only the stations with ``True`` value
+            are searched. Default is ``None``, all stations are searched.
+
+        :returns: (*list, list*) Distances and indices of the stations, not sorted.
+        '''
+        dists = []
+        inds = []
+        if self.n == 0:
+            return dists, inds
+        xs = self._x
+        ys = self._y
+        idx = self._idx
+        r2 = radius * radius
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._mindist2(node, x, y) > r2:
+                continue
+            left = self._left[node]
+            if left < 0:
+                for j in xrange(self._lo[node], self._hi[node]):
+                    i = idx[j]
+                    if not mask is None and not mask[i]:
+                        continue
+                    dx = xs[i] - x
+                    dy = ys[i] - y
+                    d2 = dx * dx + dy * dy
+                    if d2 <= r2:
+                        dists.append(math.sqrt(d2))
+                        inds.append(i)
+            else:
+                stack.append(self._right[node])
+                stack.append(left)
+        return dists, inds
@@ -0,0 +1,99 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab polygon geometry helper module
+# Note: Jython
+#-----------------------------------------------------
+
+import bisect
+
+from mipylib.numeric.miarray import MIArray
+
+def _coords(v):
+    if isinstance(v, MIArray):
+        return v.aslist()
+    return list(v)
+
+def polygon_rings(polygon):
+    '''
+    Get the rings of a polygon, including the outlines and hole lines.
+
+    :param polygon: (*PolygonShape or tuple*) The polygon shape or a (x, y) coordinate tuple.
+
+    :returns: (*list*) Rings, each ring is a (x list, y list) tuple.
+    '''
+    if isinstance(polygon, tuple):
+        return [(_coords(polygon[0]), _coords(polygon[1]))]
+    rings = []
+    for p in polygon.getPolygons():
+        lines = [p.getOutLine()]
+        if p.hasHole():
+            lines.extend(p.getHoleLines())
+        for line in lines:
+            rings.append(([pt.X for pt in line], [pt.Y for pt in line]))
+    return rings
+
+def as_polygons(polygons):
+    '''
+    Get polygon list from a layer, a polygon or a polygon list.
+
+    :param polygons: (*MILayer, PolygonShape, tuple or list*) The polygons.
+
+    :returns: (*list*) Polygon list.
+    '''
+    if hasattr(polygons, 'shapes'):
+        polygons = polygons.shapes()
+    if isinstance(polygons, tuple) or not hasattr(polygons, '__iter__'):
+        return [polygons]
+    return list(polygons)
+
+def ring_bbox(rings):
+    '''
+    Get the bounding box (xmin, ymin, xmax, ymax) of rings.
+    '''
+    xmin = min(min(xs) for xs, ys in rings)
+    xmax = max(max(xs) for xs, ys in rings)
+    ymin = min(min(ys) for xs, ys in rings)
+    ymax = max(max(ys) for xs, ys in rings)
+    return xmin, ymin, xmax, ymax
+
+def ring_edges(rings):
+    '''
+    Get the edge list (x1, y1, x2, y2) of rings, the horizontal edges are skipped.
+    '''
+    edges = []
+    for xs, ys in rings:
+        n = len(xs)
+        for i in range(n):
+            j = (i + 1) % n
+            if ys[i] != ys[j]:
+                edges.append((xs[i], ys[i], xs[j], ys[j]))
+    return edges
+
+def crossings(edges, y):
+    '''
+    Get sorted x coordinates of the edge crossings with a horizontal line.
+    '''
+    r = []
+    for x1, y1, x2, y2 in edges:
+        if (y1 <= y < y2) or (y2 <= y < y1):
+            r.append(x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+    r.sort()
+    return r
+
+def bin_edges(edges, ys):
+    '''
+    Bin edges into ascending horizontal lines, an edge is put in the bins of the lines it crosses.
+
+    :param edges: (*list*) Edge list.
+    :param ys: (*list*) Ascending y coordinates of the lines.
+
+    :returns: (*list*) Edge list of each line.
+    '''
+    bins = [[] for y in ys]
+    for e in edges:
+        lo = bisect.bisect_left(ys, min(e[1], e[3]))
+        hi = bisect.bisect_left(ys, max(e[1], e[3]))
+        for i in xrange(lo, hi):
+            bins[i].append(e)
+    return bins
@@ -0,0 +1,134 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab cached grid reprojection module
+# Note: Jython
+#-----------------------------------------------------
+
+import threading
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from weights import point_weights
+from transform import _transform
+
+from java.lang import Double
+nan = Double.NaN
+
+__all__ = [
+    'Reprojector'
+    ]
+
+def _coords(v):
+    if isinstance(v, MIArray):
+        return v.aslist()
+    return list(v)
+
+def _grid(g):
+    '''
+    Get x, y coordinates and projection from a grid, the grid is an array with x/y
+    dimensions or a (x, y, proj) tuple.
+    '''
+    if isinstance(g, (list, tuple)):
+        return _coords(g[0]), _coords(g[1]), g[2]
+    x = g.dimvalue(g.ndim - 1).aslist()
+    y = g.dimvalue(g.ndim - 2).aslist()
+    return x, y, g.proj
+
+class Reprojector(object):
+    '''
+    Cached reprojection mapping between two rectilinear grids with different projections.
+    The coordinate transform of the target grid and the source cell indices and weights are
+    calculated once, then applied to any array on the source grid with leading dimensions
+    (i.e. time and level).
+
+    :param from_grid: (*DimArray or tuple*) Source grid, an array with x/y dimensions and projection,
+        or a (x, y, proj) tuple.
+    :param to_grid: (*DimArray or tuple*) Target grid, an array or a (x, y, proj) tuple.
+    :param method: (*string*) Interpolation method: ``bilinear`` or ``nearest``. Default is ``bilinear``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    '''
+    def __init__(self, from_grid, to_grid, method='bilinear', nthreads=None):
+        x, y, fromproj = _grid(from_grid)
+        self.shape = [len(y), len(x)]
+        self.x, self.y, self.proj = _grid(to_grid)
+        self.fromproj = fromproj
+        self.method = 'bilinear' if method == 'bilinear' else 'nearest'
+        nx = len(self.x)
+        ny = len(self.y)
+        px = []
+        py = []
+        for yy in self.y:
+            px.extend(self.x)
+            py.extend([yy] * nx)
+        if not fromproj is None and not self.proj is None and \
+            fromproj.toProj4String() != self.proj.toProj4String():
+            px, py = _transform(px, py, self.proj, fromproj, nthreads)
+        self.weights = point_weights(x, y, px, py, [ny, nx], self.method, nthreads)
+        self.weights.x = self.x
+        self.weights.y = self.y
+
+    def __repr__(self):
+        return 'Reprojector(%s -> %s, method=%s)' % (self.shape, self.weights.shape, self.method)
+
+    def apply(self, a, fill_value=None, nthreads=None):
+        '''
+        Reproject an array on the source grid, the last two dimensions are y/x.
+
+        :param a: (*array_like*) The input array.
+        :param fill_value: (*float*) Missing value of the input array and fill value of the output
+            points out of the source grid. Default is ``None``, means NaN.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+        :returns: (*MIArray*) Reprojected array.
+        '''
+        if fill_value is None or fill_value != fill_value:
+            return self.weights.apply(a, nthreads=nthreads)
+        if isinstance(a, MIArray):
+            a = a.asarray()
+        data = miutil.jdoubles(a)
+        for i in xrange(len(data)):
+            if data[i] == fill_value:
+                data[i] = nan
+        r = self.weights.apply(miutil.fromjdoubles(data, list(a.getShape())), nthreads=nthreads)
+        data = miutil.jdoubles(r.asarray())
+        for i in xrange(len(data)):
+            if data[i] != data[i]:
+                data[i] = fill_value
+        return MIArray(miutil.fromjdoubles(data, list(r.shape)))
+
+    __call__ = apply
+
+_cache = {}
+_cache_keys = []
+_cache_size = 8
+_cache_lock = threading.Lock()
+
+def _key(g):
+    x, y, proj = _grid(g)
+    return (tuple(x), tuple(y), None if proj is None else proj.toProj4String())
+
+def get_reprojector(from_grid, to_grid, method='bilinear'):
+    '''
+    Get a cached ``Reprojector``, a new one will be created and cached if not exists.
+
+    :param from_grid: (*DimArray or tuple*) Source grid.
+    :param to_grid: (*DimArray or tuple*) Target grid.
+    :param method: (*string*) Interpolation method.
+
+    :returns: (*Reprojector*) The reprojector.
+    '''
+    key = (_key(from_grid), _key(to_grid), method)
+    with _cache_lock:
+        r = _cache.get(key)
+    if r is None:
+        r = Reprojector(from_grid, to_grid, method)
+        with _cache_lock:
+            if key in _cache:
+                r = _cache[key]
+            else:
+                _cache[key] = r
+                _cache_keys.append(key)
+                if len(_cache_keys) > _cache_size:
+                    del _cache[_cache_keys.pop(0)]
+    return r
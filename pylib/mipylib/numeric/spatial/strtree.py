@@ -0,0 +1,202 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab STR-tree polygon spatial index module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+
+import mipylib.miutil as miutil
+from polygon import _coords, polygon_rings, as_polygons, ring_bbox, ring_edges
+
+__all__ = [
+    'STRtree','PolygonIndex'
+    ]
+
+class STRtree(object):
+    '''
+    Sort-Tile-Recursive packed R-tree of bounding boxes.
+
+    :param bboxes: (*list*) Bounding boxes, each is (xmin, ymin, xmax, ymax).
+    :param nodesize: (*int*) Maximum child number of a node. Default is ``10``.
+    '''
+    def __init__(self, bboxes, nodesize=10):
+        self.bboxes = list(bboxes)
+        self.nodesize = max(2, nodesize)
+        self._children = []
+        self._boxes = []
+        self._leaf = []
+        level = range(len(self.bboxes))
+        boxes = self.bboxes
+        isleaf = True
+        self._root = None
+        while len(level) > 0:
+            nodes = self._pack(level, boxes, isleaf)
+            if len(nodes) == 1:
+                self._root = nodes[0]
+                break
+            level = nodes
+            boxes = self._boxes
+            isleaf = False
+
+    def _pack(self, items, boxes, isleaf):
+        ns = self.nodesize
+        n = len(items)
+        nslice = int(math.ceil(math.sqrt(math.ceil(float(n) / ns))))
+        ssize = ns * nslice
+        cx = lambda i: boxes[i][0] + boxes[i][2]
+        cy = lambda i: boxes[i][1] + boxes[i][3]
+        items = sorted(items, key=cx)
+        nodes = []
+        for s in range(0, n, ssize):
+            sl = sorted(items[s:s + ssize], key=cy)
+            for k in range(0, len(sl), ns):
+                children = sl[k:k + ns]
+                bb = (min(boxes[i][0] for i in children), min(boxes[i][1] for i in children),
+                    max(boxes[i][2] for i in children), max(boxes[i][3] for i in children))
+                self._children.append(children)
+                self._boxes.append(bb)
+                self._leaf.append(isleaf)
+                nodes.append(len(self._boxes) - 1)
+        return nodes
+
+    def query_point(self, x, y):
+        '''
+        Get the indices of the bounding boxes containing a point.
+
+        :param x: (*float*) X coordinate of the point.
+        :param y: (*float*) Y coordinate of the point.
+
+        :returns: (*list*) Bounding box indices.
+        '''
+        r = []
+        if self._root is None:
+            return r
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            bb = self._boxes[node]
+            if x < bb[0] or x > bb[2] or y < bb[1] or y > bb[3]:
+                continue
+            if self._leaf[node]:
+                for i in self._children[node]:
+                    b = self.bboxes[i]
+                    if b[0] <= x <= b[2] and b[1] <= y <= b[3]:
+                        r.append(i)
+            else:
+                stack.extend(self._children[node])
+        return r
+
+    def query_bbox(self, bbox):
+        '''
+        Get the indices of the bounding boxes intersecting a bounding box.
+
+        :param bbox: (*tuple*) The bounding box (xmin, ymin, xmax, ymax).
+
+        :returns: (*list*) Bounding box indices.
+        '''
+        r = []
+        if self._root is None:
+            return r
+        xmin, ymin, xmax, ymax = bbox
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            bb = self._boxes[node]
+            if xmax < bb[0] or xmin > bb[2] or ymax < bb[1] or ymin > bb[3]:
+                continue
+            if self._leaf[node]:
+                for i in self._children[node]:
+                    b = self.bboxes[i]
+                    if not (xmax < b[0] or xmin > b[2] or ymax < b[1] or ymin > b[3]):
+                        r.append(i)
+            else:
+                stack.extend(self._children[node])
+        return r
+
+class _PreparedPolygon(object):
+    '''
+    Polygon with edges binned into horizontal bands for fast point in polygon test.
+    '''
+    def __init__(self, rings, edgesperband=8):
+        self.bbox = ring_bbox(rings)
+        edges = ring_edges(rings)
+        ymin = self.bbox[1]
+        ymax = self.bbox[3]
+        self.nband = max(1, min(len(edges) // edgesperband, 1024))
+        self.ymin = ymin
+        self.dy = (ymax - ymin) / self.nband if ymax > ymin else 1.0
+        self.bands = [[] for i in range(self.nband)]
+        for e in edges:
+            b0 = self._band(min(e[1], e[3]))
+            b1 = self._band(max(e[1], e[3]))
+            for b in range(b0, b1 + 1):
+                self.bands[b].append(e)
+
+    def _band(self, y):
+        return min(max(int((y - self.ymin) / self.dy), 0), self.nband - 1)
+
+    def contains(self, x, y):
+        inside = False
+        for x1, y1, x2, y2 in self.bands[self._band(y)]:
+            if (y1 <= y < y2) or (y2 <= y < y1):
+                if x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                    inside = not inside
+        return inside
+
+class PolygonIndex(object):
+    '''
+    Spatial index of polygons for assigning points to the containing polygons. An STR-tree of
+    the polygon bounding boxes selects the candidate polygons, and the edges of each polygon
+    are binned into horizontal bands so only the edges near the point are tested.
+
+    :param polygons: (*list*) Polygon list or a polygon layer.
+    :param nodesize: (*int*) Maximum child number of the STR-tree nodes. Default is ``10``.
+    '''
+    def __init__(self, polygons, nodesize=10):
+        self.polygons = as_polygons(polygons)
+        self._prepared = [_PreparedPolygon(polygon_rings(p)) for p in self.polygons]
+        self._tree = STRtree([p.bbox for p in self._prepared], nodesize)
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def __repr__(self):
+        return 'PolygonIndex(n=%i)' % len(self.polygons)
+
+    def locate(self, x, y):
+        '''
+        Get the index of the first polygon containing a point.
+
+        :param x: (*float*) X coordinate of the point.
+        :param y: (*float*) Y coordinate of the point.
+
+        :returns: (*int*) Polygon index, ``-1`` if the point is not inside any polygon.
+        '''
+        if x != x or y != y:
+            return -1
+        for i in sorted(self._tree.query_point(x, y)):
+            if self._prepared[i].contains(x, y):
+                return i
+        return -1
+
+    def query(self, x, y, nthreads=None):
+        '''
+        Get the containing polygon indices of points, the points are processed in parallel blocks.
+
+        :param x: (*array_like*) X coordinates of the points.
+        :param y: (*array_like*) Y coordinates of the points.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+        :returns: (*list*) Polygon index of each point, ``-1`` if the point is not inside any polygon.
+        '''
+        x = _coords(x)
+        y = _coords(y)
+        def block(se):
+            return [self.locate(x[i], y[i]) for i in xrange(se[0], se[1])]
+        rr = miutil.parallel_map(block, miutil.chunks(len(x), nthreads), nthreads)
+        r = []
+        for a in rr:
+            r.extend(a)
+        return r
@@ -0,0 +1,74 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab bulk coordinate transform module
+# Note: Jython
+#-----------------------------------------------------
+
+from org.meteoinfo.data import ArrayUtil
+from java.lang import System
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+
+__all__ = [
+    'reproject_points'
+    ]
+
+#Minimum point number of a block
+_BLOCKSIZE = 65536
+
+def _jdoubles(v):
+    if isinstance(v, MIArray):
+        v = v.asarray()
+    if isinstance(v, (list, tuple)):
+        return jarray.array([float(a) for a in v], 'd')
+    return miutil.jdoubles(v)
+
+def _transform(x, y, fromproj, toproj, nthreads=None):
+    '''
+    Transform the coordinates of points in blocks of primitive double arrays, the blocks are
+    reprojected by ``ArrayUtil.reproject`` in parallel.
+
+    :returns: (*double[], double[]*) Transformed x and y coordinates in flat Java double arrays.
+    '''
+    x = _jdoubles(x)
+    y = _jdoubles(y)
+    n = len(x)
+    if len(y) != n:
+        raise ValueError('The x and y coordinates must have same length!')
+    if n == 0 or fromproj.toProj4String() == toproj.toProj4String():
+        return x[:], y[:]
+    rx = jarray.zeros(n, 'd')
+    ry = jarray.zeros(n, 'd')
+    nchunk = max(1, min(n // _BLOCKSIZE, nthreads or miutil.cpu_count()))
+    def block(se):
+        s, e = se
+        m = e - s
+        pxy = ArrayUtil.reproject(miutil.fromjdoubles(x[s:e], [m]), miutil.fromjdoubles(y[s:e], [m]),
+            fromproj, toproj)
+        System.arraycopy(miutil.jdoubles(pxy[0]), 0, rx, s, m)
+        System.arraycopy(miutil.jdoubles(pxy[1]), 0, ry, s, m)
+    miutil.parallel_map(block, miutil.chunks(n, nchunk), nthreads)
+    return rx, ry
+
+def reproject_points(x, y, fromproj, toproj, nthreads=None):
+    '''
+    Transform the coordinates of points from one projection to another and keep the array
+    shape. Large arrays are split into blocks which are transformed in parallel.
+
+    :param x: (*array_like*) X coordinates.
+    :param y: (*array_like*) Y coordinates.
+    :param fromproj: (*ProjectionInfo*) From projection.
+    :param toproj: (*ProjectionInfo*) To projection.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*MIArray, MIArray*) Transformed x and y coordinates.
+    '''
+    if isinstance(x, MIArray):
+        shape = list(x.shape)
+    else:
+        shape = [len(x)]
+    rx, ry = _transform(x, y, fromproj, toproj, nthreads)
+    return MIArray(miutil.fromjdoubles(rx, shape)), MIArray(miutil.fromjdoubles(ry, shape))
@@ -0,0 +1,434 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab sparse interpolation weights module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+import bisect
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+
+from java.lang import Double
+nan = Double.NaN
+
+__all__ = [
+    'SparseWeights'
+    ]
+
+class SparseWeights(object):
+    '''
+    Sparse interpolation weight operator stored in compressed sparse row format. Each output
+    point is the weighted sum of some input points. The operator can be created once and
+    applied to many fields with the same input points.
+
+    :param rowptr: (*list*) Row pointers with length of output point number plus one.
+    :param cols: (*list*) Input point indices of the weights.
+    :param vals: (*list*) Weight values.
+    :param nin: (*int*) Input point number.
+    :param shape: (*list*) Output shape.
+    :param x: (*list*) Output x coordinates. Default is ``None``.
+    :param y: (*list*) Output y coordinates. Default is ``None``.
+    '''
+    def __init__(self, rowptr, cols, vals, nin, shape, x=None, y=None):
+        self._rowptr = rowptr
+        self._cols = cols
+        self._vals = vals
+        self.nin = nin
+        self.shape = list(shape)
+        self.nout = 1
+        for n in self.shape:
+            self.nout *= n
+        if len(rowptr) != self.nout + 1:
+            raise ValueError('Row pointer length is not consistent with the output shape!')
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return 'SparseWeights(nin=%i, shape=%s, nnz=%i)' % (self.nin, self.shape, self.nnz)
+
+    @property
+    def nnz(self):
+        '''
+        Number of the stored weights.
+        '''
+        return len(self._vals)
+
+    def _split(self, shape):
+        n = 1
+        for i in range(len(shape) - 1, -1, -1):
+            n *= shape[i]
+            if n == self.nin:
+                return i
+        raise ValueError('The last dimensions of the array are not consistent with the weights input size %i!' % self.nin)
+
+    def _rows(self, data, off, start, end, renormalize):
+        rp = self._rowptr
+        cs = self._cols
+        vs = self._vals
+        isnan = math.isnan
+        r = []
+        for i in xrange(start, end):
+            s = 0.0
+            ws = 0.0
+            wall = 0.0
+            for k in xrange(rp[i], rp[i + 1]):
+                w = vs[k]
+                v = data[off + cs[k]]
+                wall += w
+                if not isnan(v):
+                    s += w * v
+                    ws += w
+            if ws == 0 or (not renormalize and ws != wall):
+                r.append(nan)
+            elif ws == wall:
+                r.append(s)
+            else:
+                r.append(s * wall / ws)
+        return r
+
+    def apply(self, a, renormalize=True, nthreads=None):
+        '''
+        Apply the weights to an array. The last dimensions of the array are the input points,
+        the leading dimensions (i.e. time or level) are kept.
+
+        :param a: (*array_like*) The input array.
+        :param renormalize: (*boolean*) If ``True``, the NaN input values are skipped and the weights
+            of the valid values are renormalized. Otherwise the output is NaN if any input value is NaN.
+            Default is ``True``.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+        :returns: (*MIArray*) Result array with shape of leading dimensions plus the output shape.
+        '''
+        if isinstance(a, (list, tuple)):
+            a = miutil.fromjdoubles([float(v) for v in a], [len(a)])
+        elif isinstance(a, MIArray):
+            a = a.asarray()
+        shape = list(a.getShape())
+        idx = self._split(shape)
+        lshape = shape[:idx]
+        nslab = 1
+        for n in lshape:
+            nslab *= n
+        data = miutil.jdoubles(a)
+        if nthreads is None:
+            nthreads = miutil.cpu_count()
+        if nslab >= nthreads:
+            rchunks = [(0, self.nout)]
+        else:
+            rchunks = miutil.chunks(self.nout, nthreads)
+        tasks = []
+        for t in xrange(nslab):
+            for se in rchunks:
+                tasks.append((t * self.nin, se[0], se[1]))
+        rr = miutil.parallel_map(lambda task: self._rows(data, task[0], task[1], task[2], renormalize),
+            tasks, nthreads)
+        r = []
+        for rows in rr:
+            r.extend(rows)
+        return MIArray(miutil.fromjdoubles(r, lshape + self.shape))
+
+    __call__ = apply
+
+def _build(func, nout, nthreads=None):
+    '''
+    Build compressed sparse row lists in parallel, ``func`` return column and weight lists
+    of an output point.
+    '''
+    def block(se):
+        rr = []
+        for i in xrange(se[0], se[1]):
+            rr.append(func(i))
+        return rr
+    blocks = miutil.parallel_map(block, miutil.chunks(nout, nthreads), nthreads)
+    rowptr = [0]
+    cols = []
+    vals = []
+    for rr in blocks:
+        for cs, vs in rr:
+            cols.extend(cs)
+            vals.extend(vs)
+            rowptr.append(len(cols))
+    return rowptr, cols, vals
+
+def idw_weights(index, xg, yg, pointnum=2, radius=None, nthreads=None):
+    '''
+    Inverse distance weights from stations to grid points.
+
+    :param index: (*StationIndex*) The station spatial index.
+    :param xg: (*list*) X coordinates of the grid.
+    :param yg: (*list*) Y coordinates of the grid.
+    :param pointnum: (*int*) Nearest station number used for each grid point.
+    :param radius: (*float*) Searching radius. Default is ``None``.
+    :param nthreads: (*int*) Thread number.
+
+    :returns: (*SparseWeights*) The weights.
+    '''
+    nx = len(xg)
+    def row(i):
+        x = xg[i % nx]
+        y = yg[i // nx]
+        if radius is None:
+            dists, inds = index.query(x, y, pointnum)
+        else:
+            dists, inds = index.query_radius(x, y, radius)
+            if len(inds) < pointnum:
+                return [], []
+        ws = []
+        for d, k in zip(dists, inds):
+            if d == 0:
+                return [k], [1.0]
+            ws.append(1.0 / (d * d))
+        s = sum(ws)
+        return inds, [w / s for w in ws]
+    rowptr, cols, vals = _build(row, nx * len(yg), nthreads)
+    return SparseWeights(rowptr, cols, vals, index.n, [len(yg), nx], xg, yg)
+
+def nearest_weights(index, xg, yg, radius=None, nthreads=None):
+    '''
+    Nearest neighbor weights from stations to grid points.
+
+    :param index: (*StationIndex*) The station spatial index.
+    :param xg: (*list*) X coordinates of the grid.
+    :param yg: (*list*) Y coordinates of the grid.
+    :param radius: (*float*) Searching radius. Default is ``None``.
+    :param nthreads: (*int*) Thread number.
+
+    :returns: (*SparseWeights*) The weights.
+    '''
+    if not radius is None and math.isinf(radius):
+        radius = None
+    nx = len(xg)
+    def row(i):
+        dists, inds = index.query(xg[i % nx], yg[i // nx], 1, radius=radius)
+        return inds, [1.0] * len(inds)
+    rowptr, cols, vals = _build(row, nx * len(yg), nthreads)
+    return SparseWeights(rowptr, cols, vals, index.n, [len(yg), nx], xg, yg)
+
+class _Axis(object):
+    '''
+    Coordinate axis of a rectilinear grid, ascending or descending.
+    '''
+    def __init__(self, v):
+        self.n = len(v)
+        self.reverse = self.n > 1 and v[0] > v[-1]
+        if self.reverse:
+            self.v = list(reversed(v))
+        else:
+            self.v = list(v)
+
+    def index(self, i):
+        return self.n - 1 - i if self.reverse else i
+
+    def locate(self, p):
+        '''
+        Get the lower cell index and the fraction of a coordinate, ``None`` if out of the axis.
+        '''
+        v = self.v
+        if p != p or p < v[0] or p > v[-1]:
+            return None
+        if self.n == 1:
+            return 0, 0.0
+        i = min(max(bisect.bisect_right(v, p) - 1, 0), self.n - 2)
+        return i, (p - v[i]) / (v[i + 1] - v[i])
+
+def point_weights(x, y, px, py, shape, method='bilinear', nthreads=None):
+    '''
+    Interpolation weights from a rectilinear grid to points.
+
+    :param x: (*list*) X coordinates of the input grid, ascending or descending.
+    :param y: (*list*) Y coordinates of the input grid, ascending or descending.
+    :param px: (*list*) X coordinates of the output points.
+    :param py: (*list*) Y coordinates of the output points.
+    :param shape: (*list*) Output shape.
+    :param method: (*string*) Interpolation method [bilinear | nearest].
+    :param nthreads: (*int*) Thread number.
+
+    :returns: (*SparseWeights*) The weights.
+    '''
+    xa = _Axis(x)
+    ya = _Axis(y)
+    nx = xa.n
+    bilinear = method == 'bilinear'
+    def row(k):
+        lx = xa.locate(px[k])
+        ly = ya.locate(py[k])
+        if lx is None or ly is None:
+            return [], []
+        j, tx = lx
+        i, ty = ly
+        if bilinear:
+            cs = []
+            ws = []
+            for di, wy in ((0, 1 - ty), (1, ty)):
+                for dj, wx in ((0, 1 - tx), (1, tx)):
+                    w = wy * wx
+                    if w > 0:
+                        cs.append(ya.index(i + di) * nx + xa.index(j + dj))
+                        ws.append(w)
+            if len(cs) == 0:
+                cs.append(ya.index(i) * nx + xa.index(j))
+                ws.append(1.0)
+            return cs, ws
+        else:
+            if tx > 0.5:
+                j += 1
+            if ty > 0.5:
+                i += 1
+            return [ya.index(i) * nx + xa.index(j)], [1.0]
+    rowptr, cols, vals = _build(row, len(px), nthreads)
+    return SparseWeights(rowptr, cols, vals, nx * ya.n, shape)
+
+def grid_weights(x, y, xn, yn, method='bilinear', nthreads=None):
+    '''
+    Interpolation weights from a rectilinear grid to another rectilinear grid.
+
+    :param x: (*list*) X coordinates of the input grid.
+    :param y: (*list*) Y coordinates of the input grid.
+    :param xn: (*list*) X coordinates of the output grid.
+    :param yn: (*list*) Y coordinates of the output grid.
+    :param method: (*string*) Interpolation method [bilinear | nearest].
+    :param nthreads: (*int*) Thread number.
+
+    :returns: (*SparseWeights*) The weights.
+    '''
+    px = []
+    py = []
+    for yy in yn:
+        px.extend(xn)
+        py.extend([yy] * len(xn))
+    w = point_weights(x, y, px, py, [len(yn), len(xn)], method, nthreads)
+    w.x = xn
+    w.y = yn
+    return w
+
+def regular_weights(points, xi, nthreads=None):
+    '''
+    Multi-linear interpolation weights from a regular grid in n dimensions to points.
+
+    :param points: (*list*) The coordinate lists defining the regular grid in n dimensions.
+    :param xi: (*list*) The coordinates of the points, each item is a list with n coordinates.
+    :param nthreads: (*int*) Thread number.
+
+    :returns: (*SparseWeights*) The weights.
+    '''
+    axes = [_Axis(p) for p in points]
+    ndim = len(axes)
+    strides = [1] * ndim
+    for i in range(ndim - 2, -1, -1):
+        strides[i] = strides[i + 1] * axes[i + 1].n
+    nin = strides[0] * axes[0].n
+    def row(k):
+        p = xi[k]
+        cs = [0]
+        ws = [1.0]
+        for i in range(ndim):
+            loc = axes[i].locate(p[i])
+            if loc is None:
+                return [], []
+            j, t = loc
+            ncs = []
+            nws = []
+            for dj, wt in ((0, 1 - t), (1, t)):
+                if wt <= 0:
+                    continue
+                c = axes[i].index(j + dj) * strides[i]
+                for c0, w0 in zip(cs, ws):
+                    ncs.append(c0 + c)
+                    nws.append(w0 * wt)
+            if len(ncs) == 0:
+                ncs = [c0 + axes[i].index(j) * strides[i] for c0 in cs]
+                nws = ws
+            cs = ncs
+            ws = nws
+        return cs, ws
+    rowptr, cols, vals = _build(row, len(xi), nthreads)
+    return SparseWeights(rowptr, cols, vals, nin, [len(xi)])
+
+def _bounds(v):
+    '''
+    Get cell bounds (low, high) from the cell center coordinates.
+    '''
+    n = len(v)
+    if n == 1:
+        return [(v[0] - 0.5, v[0] + 0.5)]
+    edges = [v[0] - (v[1] - v[0]) * 0.5]
+    for i in range(n - 1):
+        edges.append((v[i] + v[i + 1]) * 0.5)
+    edges.append(v[-1] + (v[-1] - v[-2]) * 0.5)
+    return [(min(edges[i], edges[i + 1]), max(edges[i], edges[i + 1])) for i in range(n)]
+
+def _overlap(bin, bout, period=None):
+    '''
+    Get overlap lengths of 1-D cells, return list of (input indices, lengths) for each output cell.
+    '''
+    order = sorted(range(len(bin)), key=lambda i: bin[i][0])
+    his = [bin[i][1] for i in order]
+    shifts = [0] if period is None else [-period, 0, period]
+    r = []
+    for lo, hi in bout:
+        cs = []
+        ls = []
+        for s in shifts:
+            k = bisect.bisect_right(his, lo - s)
+            while k < len(order):
+                i = order[k]
+                ilo = bin[i][0] + s
+                if ilo >= hi:
+                    break
+                l = min(hi, bin[i][1] + s) - max(lo, ilo)
+                if l > 0:
+                    cs.append(i)
+                    ls.append(l)
+                k += 1
+        r.append((cs, ls))
+    return r
+
+def conservative_weights(x, y, xn, yn, islonlat=True, nthreads=None):
+    '''
+    First order conservative remapping weights between two rectilinear grids. The weight is
+    the overlap area of the input cell and output cell divided by the covered area of the
+    output cell. Spherical cell areas are used for longitude/latitude grids.
+
+    :param x: (*list*) X coordinates of the input grid cell centers.
+    :param y: (*list*) Y coordinates of the input grid cell centers.
+    :param xn: (*list*) X coordinates of the output grid cell centers.
+    :param yn: (*list*) Y coordinates of the output grid cell centers.
+    :param islonlat: (*boolean*) Longitude/latitude grids or not. Default is ``True``.
+    :param nthreads: (*int*) Thread number.
+
+    :returns: (*SparseWeights*) The weights.
+    '''
+    bx = _bounds(x)
+    bxn = _bounds(xn)
+    by = _bounds(y)
+    byn = _bounds(yn)
+    if islonlat:
+        def sinlat(b):
+            return [(math.sin(math.radians(max(-90., lo))), math.sin(math.radians(min(90., hi))))
+                for lo, hi in b]
+        by = sinlat(by)
+        byn = sinlat(byn)
+        ox = _overlap(bx, bxn, 360.)
+    else:
+        ox = _overlap(bx, bxn)
+    oy = _overlap(by, byn)
+    nx = len(x)
+    nxn = len(xn)
+    def row(k):
+        ycs, yls = oy[k // nxn]
+        xcs, xls = ox[k % nxn]
+        a = sum(yls) * sum(xls)
+        if a <= 0:
+            return [], []
+        cs = []
+        ws = []
+        for i, ly in zip(ycs, yls):
+            for j, lx in zip(xcs, xls):
+                cs.append(i * nx + j)
+                ws.append(ly * lx / a)
+        return cs, ws
+    rowptr, cols, vals = _build(row, nxn * len(yn), nthreads)
+    return SparseWeights(rowptr, cols, vals, nx * len(y), [len(yn), nxn], xn, yn)
@@ -0,0 +1,163 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab zonal statistics module
+# Note: Jython
+#-----------------------------------------------------
+
+import math
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from weights import _bounds
+from polygon import _coords
+from strtree import PolygonIndex
+
+from java.lang import Double
+nan = Double.NaN
+
+__all__ = [
+    'ZoneIndex'
+    ]
+
+def _cellweights(x, y, weights, islonlat):
+    '''
+    Get cell weights of a rectilinear grid.
+    '''
+    nx = len(x)
+    ny = len(y)
+    if weights is None:
+        return [1.0] * (nx * ny)
+    if weights == 'cos':
+        wy = [math.cos(math.radians(v)) for v in y]
+        wx = [1.0] * nx
+    elif weights == 'area':
+        wx = [hi - lo for lo, hi in _bounds(x)]
+        if islonlat:
+            wy = [math.sin(math.radians(min(90., hi))) - math.sin(math.radians(max(-90., lo)))
+                for lo, hi in _bounds(y)]
+        else:
+            wy = [hi - lo for lo, hi in _bounds(y)]
+    else:
+        raise ValueError('Not supported weights: ' + str(weights))
+    r = []
+    for a in wy:
+        r.extend([a * b for b in wx])
+    return r
+
+class ZoneIndex(object):
+    '''
+    Cell to zone index of a rectilinear grid. Each grid cell is assigned to the first polygon
+    containing the cell center, then all zones can be reduced in one pass over each field.
+
+    :param x: (*array_like*) X coordinates of the grid.
+    :param y: (*array_like*) Y coordinates of the grid.
+    :param polygons: (*list or PolygonIndex*) Zone polygons, polygon layer or ``PolygonIndex``.
+    :param weights: (*string*) Cell weights, ``area`` (spherical area for longitude/latitude grid),
+        ``cos`` (cosine of latitude) or ``None`` (equal weights). Default is ``area``.
+    :param islonlat: (*boolean*) Longitude/latitude grid or not. Default is ``True``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    '''
+    def __init__(self, x, y, polygons, weights='area', islonlat=True, nthreads=None):
+        self.x = _coords(x)
+        self.y = _coords(y)
+        self.shape = [len(self.y), len(self.x)]
+        if not isinstance(polygons, PolygonIndex):
+            polygons = PolygonIndex(polygons)
+        self.nzone = len(polygons)
+        px = []
+        py = []
+        for yy in self.y:
+            px.extend(self.x)
+            py.extend([yy] * len(self.x))
+        self.zone = polygons.query(px, py, nthreads)
+        w = _cellweights(self.x, self.y, weights, islonlat)
+        self.cells = [[] for i in range(self.nzone)]
+        self.weights = [[] for i in range(self.nzone)]
+        for k, z in enumerate(self.zone):
+            if z >= 0:
+                self.cells[z].append(k)
+                self.weights[z].append(w[k])
+
+    def __repr__(self):
+        return 'ZoneIndex(shape=%s, nzone=%i)' % (self.shape, self.nzone)
+
+    def _reduce(self, data, off, stats):
+        isnan = math.isnan
+        r = dict((s, []) for s in stats)
+        for cs, ws in zip(self.cells, self.weights):
+            n = 0
+            sw = 0.0
+            s = 0.0
+            swv = 0.0
+            swv2 = 0.0
+            vmin = None
+            vmax = None
+            for k, w in zip(cs, ws):
+                v = data[off + k]
+                if isnan(v):
+                    continue
+                n += 1
+                s += v
+                sw += w
+                swv += w * v
+                swv2 += w * v * v
+                if vmin is None or v < vmin:
+                    vmin = v
+                if vmax is None or v > vmax:
+                    vmax = v
+            for st in stats:
+                if st == 'count':
+                    r[st].append(n)
+                elif n == 0:
+                    r[st].append(nan)
+                elif st == 'mean':
+                    r[st].append(swv / sw)
+                elif st == 'sum':
+                    r[st].append(s)
+                elif st == 'min':
+                    r[st].append(vmin)
+                elif st == 'max':
+                    r[st].append(vmax)
+                elif st == 'std':
+                    m = swv / sw
+                    r[st].append(math.sqrt(max(swv2 / sw - m * m, 0.0)))
+        return r
+
+    def stats(self, a, stats=['mean'], nthreads=None):
+        '''
+        Calculate zonal statistics of an array, the last two dimensions are y/x.
+
+        :param a: (*array_like*) The array.
+        :param stats: (*list*) Statistics names [mean | sum | min | max | std | count]. The mean and std are
+            weighted by the cell weights, NaN values are skipped.
+        :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+        :returns: (*dict*) Statistic name and result array pairs, the result array shape is the leading
+            dimensions plus the zone number.
+        '''
+        for st in stats:
+            if not st in ['mean', 'sum', 'min', 'max', 'std', 'count']:
+                raise ValueError('Not supported statistic: ' + st)
+        if isinstance(a, MIArray):
+            a = a.asarray()
+        shape = list(a.getShape())
+        if shape[-2:] != self.shape:
+            raise ValueError('The last two dimensions of the array are not consistent with the zone grid!')
+        n = self.shape[0] * self.shape[1]
+        nslab = 1
+        for s in shape[:-2]:
+            nslab *= s
+        data = miutil.jdoubles(a)
+        def slabs(se):
+            return [self._reduce(data, t * n, stats) for t in xrange(se[0], se[1])]
+        rr = miutil.parallel_map(slabs, miutil.chunks(nslab, nthreads), nthreads)
+        r = {}
+        rshape = shape[:-2] + [self.nzone]
+        for st in stats:
+            v = []
+            for b in rr:
+                for d in b:
+                    v.extend(d[st])
+            r[st] = MIArray(miutil.fromjdoubles([float(s) for s in v], rshape))
+        return r
@@ -1,6 +1,8 @@
 from .stats import *
 from .distributions import *
+from .climatology import *
 
 __all__ = []
 __all__ += stats.__all__
-__all__ += distributions.__all__
\ No newline at end of file
+__all__ += distributions.__all__
+__all__ += climatology.__all__
\ No newline at end of file
@@ -0,0 +1,455 @@
+#-----------------------------------------------------
+# Author: Yaqiang Wang
+# Date: 2026-10-19
+# Purpose: MeteoInfoLab streaming climatology module
+# Note: Jython
+#-----------------------------------------------------
+
+import datetime
+import math
+
+from org.meteoinfo.data.meteodata import Dimension, DimensionType
+from java.lang import Double, System
+import jarray
+
+import mipylib.miutil as miutil
+from mipylib.numeric.miarray import MIArray
+from mipylib.numeric.dimarray import DimArray
+
+nan = Double.NaN
+
+__all__ = [
+    'Climatology','QuantileSketch','climatology'
+    ]
+
+def _dayofyear(t):
+    '''
+    Day of year in a leap year calendar, so a date has same day number in all years and February
+    29 is the day 60.
+    '''
+    return datetime.date(2000, t.month, t.day).timetuple().tm_yday
+
+#Group key functions of the frequencies
+_FREQS = {
+    'dayofyear': _dayofyear,
+    'month': lambda t: t.month,
+    'season': lambda t: t.month % 12 // 3 + 1,
+    'year': lambda t: t.year,
+    'all': lambda t: 0
+    }
+
+_MOMENTS = ['count', 'sum', 'mean', 'var', 'std', 'min', 'max']
+
+class QuantileSketch(object):
+    '''
+    Mergeable approximate quantile sketches of a number of cells. The values are kept as weighted
+    centroids which are compressed into at most ``capacity`` equal weight centroids when the
+    buffer of a cell is full. The buffer of a cell is a Java double array grown on demand up to
+    ``2 * capacity + 1`` values, and the weights are stored only after the first compression or
+    merge, so a cell never takes more memory than the values it summarizes.
+
+    :param capacity: (*int*) Centroid number after compression. Default is ``100``.
+    :param size: (*int*) Cell number. Default is ``1``.
+    '''
+    def __init__(self, capacity=100, size=1):
+        self.capacity = capacity
+        self.size = size
+        self._limit = 2 * capacity + 1
+        self.values = [None] * size
+        #None means all the weights of a cell are 1
+        self.weights = [None] * size
+        self.counts = jarray.zeros(size, 'i')
+
+    def _grow(self, cell, m):
+        n = min(self._limit, max(4, 2 * m))
+        values = jarray.zeros(n, 'd')
+        if m > 0:
+            System.arraycopy(self.values[cell], 0, values, 0, m)
+        self.values[cell] = values
+        if not self.weights[cell] is None:
+            weights = jarray.zeros(n, 'd')
+            System.arraycopy(self.weights[cell], 0, weights, 0, m)
+            self.weights[cell] = weights
+        return values
+
+    def _unitweights(self, cell):
+        weights = jarray.array([1.0] * len(self.values[cell]), 'd')
+        self.weights[cell] = weights
+        return weights
+
+    def add(self, v, w=1.0, cell=0):
+        '''
+        Add a value to a cell.
+        '''
+        m = self.counts[cell]
+        values = self.values[cell]
+        if values is None or m == len(values):
+            values = self._grow(cell, m)
+        values[m] = v
+        weights = self.weights[cell]
+        if weights is None and w != 1.0:
+            weights = self._unitweights(cell)
+        if not weights is None:
+            weights[m] = w
+        self.counts[cell] = m + 1
+        if m + 1 == self._limit:
+            self.compress(cell)
+
+    def merge(self, other, cell=0):
+        '''
+        Merge the centroids of a cell of another sketch into the cell of this one.
+        '''
+        for v, w in other._pairs(cell):
+            self.add(v, w, cell)
+
+    def _pairs(self, cell):
+        m = self.counts[cell]
+        if m == 0:
+            return []
+        weights = self.weights[cell]
+        if weights is None:
+            return sorted(zip(self.values[cell][:m], [1.0] * m))
+        return sorted(zip(self.values[cell][:m], weights[:m]))
+
+    def compress(self, cell=0):
+        '''
+        Compress the centroids of a cell into at most ``capacity`` equal weight centroids.
+        '''
+        pairs = self._pairs(cell)
+        total = sum([w for v, w in pairs])
+        target = total / self.capacity
+        values = self.values[cell]
+        weights = self.weights[cell]
+        if weights is None:
+            weights = self._unitweights(cell)
+        k = 0
+        sv = 0.0
+        sw = 0.0
+        for v, w in pairs:
+            if sw > 0 and sw + w > target:
+                values[k] = sv / sw
+                weights[k] = sw
+                k += 1
+                sv = 0.0
+                sw = 0.0
+            sv += v * w
+            sw += w
+        if sw > 0:
+            values[k] = sv / sw
+            weights[k] = sw
+            k += 1
+        self.counts[cell] = k
+
+    def quantile(self, q, cell=0):
+        '''
+        Get approximate quantile of a cell.
+
+        :param q: (*float*) Quantile in [0, 1].
+        :param cell: (*int*) Cell index. Default is ``0``.
+
+        :returns: (*float*) Quantile value.
+        '''
+        n = self.counts[cell]
+        if n == 0:
+            return nan
+        pairs = self._pairs(cell)
+        if n == 1:
+            return pairs[0][0]
+        #Rank of each centroid center
+        ranks = []
+        c = 0.0
+        for v, w in pairs:
+            ranks.append(c + w * 0.5)
+            c += w
+        r = q * c
+        if r <= ranks[0]:
+            return pairs[0][0]
+        if r >= ranks[-1]:
+            return pairs[-1][0]
+        for i in xrange(1, n):
+            if r <= ranks[i]:
+                f = (r - ranks[i - 1]) / (ranks[i] - ranks[i - 1])
+                return pairs[i - 1][0] + f * (pairs[i][0] - pairs[i - 1][0])
+        return pairs[-1][0]
+
+class _Cells(object):
+    '''
+    Running statistics of all grid cells of a group.
+    '''
+    def __init__(self, n, capacity=None):
+        self.n = jarray.zeros(n, 'd')
+        self.sum = jarray.zeros(n, 'd')
+        self.mean = jarray.zeros(n, 'd')
+        self.m2 = jarray.zeros(n, 'd')
+        self.min = jarray.array([Double.POSITIVE_INFINITY] * n, 'd')
+        self.max = jarray.array([Double.NEGATIVE_INFINITY] * n, 'd')
+        if capacity is None:
+            self.sketches = None
+        else:
+            self.sketches = QuantileSketch(capacity, n)
+
+    def update(self, data, start, end):
+        cn = self.n
+        cs = self.sum
+        cm = self.mean
+        cm2 = self.m2
+        cmin = self.min
+        cmax = self.max
+        sketches = self.sketches
+        for i in xrange(start, end):
+            x = data[i]
+            if x != x:
+                continue
+            cn[i] += 1
+            cs[i] += x
+            d = x - cm[i]
+            cm[i] += d / cn[i]
+            cm2[i] += d * (x - cm[i])
+            if x < cmin[i]:
+                cmin[i] = x
+            if x > cmax[i]:
+                cmax[i] = x
+            if not sketches is None:
+                sketches.add(x, 1.0, i)
+
+    def merge(self, other, start, end):
+        for i in xrange(start, end):
+            nb = other.n[i]
+            if nb == 0:
+                continue
+            na = self.n[i]
+            n = na + nb
+            d = other.mean[i] - self.mean[i]
+            self.mean[i] += d * nb / n
+            self.m2[i] += other.m2[i] + d * d * na * nb / n
+            self.n[i] = n
+            self.sum[i] += other.sum[i]
+            self.min[i] = min(self.min[i], other.min[i])
+            self.max[i] = max(self.max[i], other.max[i])
+            if not self.sketches is None:
+                self.sketches.merge(other.sketches, i)
+
+    def stat(self, name, i):
+        n = self.n[i]
+        if name == 'count':
+            return n
+        if n == 0:
+            return nan
+        if name == 'sum':
+            return self.sum[i]
+        if name == 'mean':
+            return self.mean[i]
+        if name == 'var':
+            return self.m2[i] / (n - 1) if n > 1 else nan
+        if name == 'std':
+            return math.sqrt(self.m2[i] / (n - 1)) if n > 1 else nan
+        if name == 'min':
+            return self.min[i]
+        if name == 'max':
+            return self.max[i]
+        return self.sketches.quantile(name, i)
+
+def _percentile(name):
+    '''
+    Get quantile of a percentile statistic name like ``p90``, ``None`` if the name is not a
+    percentile.
+    '''
+    if isinstance(name, basestring) and name.startswith('p'):
+        try:
+            return float(name[1:]) / 100.
+        except ValueError:
+            pass
+    return None
+
+class Climatology(object):
+    '''
+    Streaming climatology accumulator. Time slabs are added one at a time, running sums, Welford
+    moments and approximate quantile sketches are kept for each grid cell of each period, so
+    multi-year climatologies never need all data in memory. Accumulators of parallel workers
+    can be merged.
+
+    :param freq: (*string*) Period frequency ['dayofyear' | 'month' | 'season' | 'year' | 'all'].
+        The days of year are counted in a leap year calendar, i.e. March 1 is always the day 61
+        and February 29 is a period of its own. Default is ``dayofyear``.
+    :param stats: (*list*) Statistics [count | sum | mean | var | std | min | max | pNN], ``pNN``
+        is the NN-th percentile like ``p90``. Default is ``['mean', 'std']``.
+    :param capacity: (*int*) Centroid number of the quantile sketches. A sketch takes 8 bytes per
+        added value of a grid cell and period, at most ``(2 * capacity + 1) * 16`` bytes. Default
+        is ``100``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+    '''
+    def __init__(self, freq='dayofyear', stats=['mean', 'std'], capacity=100, nthreads=None):
+        if not freq in _FREQS:
+            raise ValueError('Not supported frequency: ' + freq)
+        for s in stats:
+            if not s in _MOMENTS and _percentile(s) is None:
+                raise ValueError('Not supported statistic: ' + str(s))
+        self.freq = freq
+        self.stats = list(stats)
+        self.capacity = capacity
+        self.nthreads = nthreads
+        self._key = _FREQS[freq]
+        self._quantile = any([not _percentile(s) is None for s in stats])
+        self.groups = {}
+        self.shape = None
+        self.dims = None
+        self.fill_value = nan
+        self.proj = None
+
+    def __repr__(self):
+        return 'Climatology(freq=%s, stats=%s, groups=%i)' % (self.freq, self.stats, len(self.groups))
+
+    def _cells(self, key):
+        cells = self.groups.get(key)
+        if cells is None:
+            n = 1
+            for s in self.shape:
+                n *= s
+            cells = _Cells(n, self.capacity if self._quantile else None)
+            self.groups[key] = cells
+        return cells
+
+    def _chunks(self):
+        n = 1
+        for s in self.shape:
+            n *= s
+        return miutil.chunks(n, self.nthreads)
+
+    def add(self, data, time):
+        '''
+        Add a time slab.
+
+        :param data: (*array_like*) Data slab of one time, i.e. a 2-D (lat, lon) array, or a
+            number of a time series.
+        :param time: (*datetime*) Time of the slab.
+        '''
+        if not isinstance(data, MIArray):
+            if self.shape is None:
+                self.shape = []
+            elif self.shape != []:
+                raise ValueError('The slab shape is not consistent with the climatology!')
+            cells = self._cells(self._key(time))
+            cells.update(jarray.array([float(data)], 'd'), 0, 1)
+            return
+        if self.shape is None:
+            self.shape = list(data.shape)
+            if isinstance(data, DimArray):
+                self.dims = list(data.dims)
+                self.fill_value = data.fill_value
+                self.proj = data.proj
+        elif list(data.shape) != self.shape:
+            raise ValueError('The slab shape is not consistent with the climatology!')
+        values = miutil.jdoubles(data.asarray())
+        cells = self._cells(self._key(time))
+        miutil.parallel_map(lambda se: cells.update(values, se[0], se[1]), self._chunks(), self.nthreads)
+
+    def update(self, variable, sidx=0, eidx=None):
+        '''
+        Add the time slabs of a variable one by one, the leading dimension of the variable must
+        be time.
+
+        :param variable: (*DimVariable, TDimVariable or DimArray*) The variable.
+        :param sidx: (*int*) Start time index. Default is ``0``.
+        :param eidx: (*int*) End time index (exclusive). Default is ``None``, the time number.
+        '''
+        tdim = variable.dims[0]
+        times = miutil.nums2dates(list(tdim.getDimValue()))
+        if eidx is None:
+            eidx = len(times)
+        if variable.ndim == 1 and self.dims is None:
+            self.dims = []
+            self.fill_value = getattr(variable, 'fill_value', nan)
+        rest = (slice(None),) * (variable.ndim - 1)
+        for t in range(sidx, eidx):
+            self.add(variable[(t,) + rest], times[t])
+
+    def merge(self, other):
+        '''
+        Merge another climatology accumulator, i.e. the result of a parallel worker.
+
+        :param other: (*Climatology*) Other accumulator with same frequency and slab shape.
+        '''
+        if other.freq != self.freq:
+            raise ValueError('The climatology frequencies are different!')
+        if other.shape is None:
+            return
+        if self.shape is None:
+            self.shape = other.shape
+            self.dims = other.dims
+            self.fill_value = other.fill_value
+            self.proj = other.proj
+        elif other.shape != self.shape:
+            raise ValueError('The climatology shapes are different!')
+        for key, ocells in other.groups.items():
+            cells = self._cells(key)
+            miutil.parallel_map(lambda se: cells.merge(ocells, se[0], se[1]), self._chunks(), self.nthreads)
+
+    def result(self, stat):
+        '''
+        Get the result of a statistic.
+
+        :param stat: (*string*) Statistic name.
+
+        :returns: (*DimArray*) Result array with a leading period dimension.
+        '''
+        q = _percentile(stat)
+        if q is None and not stat in _MOMENTS:
+            raise ValueError('Not supported statistic: ' + str(stat))
+        if not q is None and not self._quantile:
+            raise ValueError('No quantile sketches in the climatology, add a percentile to stats!')
+        keys = sorted(self.groups.keys())
+        n = 1
+        for s in self.shape:
+            n *= s
+        name = stat if q is None else q
+        r = jarray.zeros(len(keys) * n, 'd')
+        for k, key in enumerate(keys):
+            cells = self.groups[key]
+            def block(se):
+                for i in xrange(se[0], se[1]):
+                    r[k * n + i] = cells.stat(name, i)
+            miutil.parallel_map(block, self._chunks(), self.nthreads)
+        a = MIArray(miutil.fromjdoubles(r, [len(keys)] + self.shape))
+        if self.dims is None:
+            return a
+        gdim = Dimension(DimensionType.Other)
+        gdim.setDimValues(keys)
+        gdim.setShortName(self.freq)
+        return DimArray(a, [gdim] + self.dims, self.fill_value, self.proj)
+
+    def results(self):
+        '''
+        Get the results of all statistics.
+
+        :returns: (*dict*) Statistic name and result array.
+        '''
+        return dict((s, self.result(s)) for s in self.stats)
+
+    def __getitem__(self, stat):
+        return self.result(stat)
+
+def climatology(source, varname=None, freq='dayofyear', stats=['mean', 'std'], capacity=100,
+    nthreads=None):
+    '''
+    Calculate climatology of a variable in a streaming way. For ``DimDataFiles`` the files are
+    added one after another into a single accumulator, the grid cells of each slab are updated in
+    parallel.
+
+    :param source: (*DimDataFiles, DimVariable or TDimVariable*) Data source.
+    :param varname: (*string*) Variable name, only for ``DimDataFiles``.
+    :param freq: (*string*) Period frequency ['dayofyear' | 'month' | 'season' | 'year' | 'all'].
+        Default is ``dayofyear``.
+    :param stats: (*list*) Statistics [count | sum | mean | var | std | min | max | pNN]. Default is
+        ``['mean', 'std']``.
+    :param capacity: (*int*) Centroid number of the quantile sketches. Default is ``100``.
+    :param nthreads: (*int*) Thread number. Default is ``None``, means the processor number.
+
+    :returns: (*Climatology*) Climatology accumulator with all time slabs added.
+    '''
+    r = Climatology(freq, stats, capacity, nthreads)
+    if varname is None:
+        r.update(source)
+        return r
+    for df in source:
+        r.update(df[varname])
+    return r
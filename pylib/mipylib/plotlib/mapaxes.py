@@ -26,11 +26,51 @@ from mipylib.numeric.dimarray import DimArray
 from mipylib.numeric.miarray import MIArray
 from mipylib.geolib.milayer import MILayer
 import mipylib.geolib.migeo as migeo
+from mipylib.geolib.simplify import get_pyramid, simplifiable
 import plotutil
 import mipylib.numeric.minum as minum
 import mipylib.migl as migl
 import mipylib.miutil as miutil
 
+##############################################
+class _MapPlot(MapPlot):
+    '''
+    Map plot which selects the levels of the simplified layers when it is drawn, from the
+    draw extent and the device pixel width, so the levels follow zooming, extent setting and
+    the output resolution.
+    '''
+    def __init__(self, mapview):
+        MapPlot.__init__(self, mapview)
+        self.simplified = []
+        
+    def add_simplified(self, layer, pyramid):
+        self.simplified.append([layer, pyramid, None])
+        
+    def select_levels(self, pixels):
+        '''
+        Select the levels of the simplified layers.
+        
+        :param pixels: (*float*) Device pixel number of the draw extent width.
+        '''
+        width = self.getDrawExtent().getWidth()
+        if width <= 0 or pixels <= 0:
+            return
+        proj = self.getProjInfo().toProj4String()
+        for item in self.simplified:
+            layer, pyramid, level = item
+            #The pyramid is in the layer coordinates, a reprojected layer keeps its level
+            if layer.getProjInfo().toProj4String() != proj:
+                continue
+            i = pyramid.select(width, pixels)
+            if i != level:
+                pyramid.apply(layer, i)
+                item[2] = i
+        
+    def draw(self, g, area):
+        if self.simplified:
+            self.select_levels(area.getWidth() * abs(g.getTransform().getScaleX()))
+        MapPlot.draw(self, g, area)
+        
 ##############################################        
 class MapAxes(Axes):
     '''
@@ -78,7 +118,7 @@ class MapAxes(Axes):
                 projinfo = ProjectionInfo(projstr)   
                 
             mapview = MapView(projinfo)     
-            self.axes = MapPlot(mapview)
+            self.axes = _MapPlot(mapview)
         else:
             self.axes = axes
         self.axestype = 'map'
@@ -92,16 +132,38 @@ class MapAxes(Axes):
         '''
         return self.proj.isLonLat()
             
-    def add_layer(self, layer, zorder=None, select=None):
+    def add_layer(self, layer, zorder=None, select=None, simplify=False, pixels=1000):
         '''
         Add a map layer
         
         :param layer: (*MapLayer*) The map layer.
         :param zorder: (*int*) Layer z order.
         :param select: (*boolean*) Select layer or not.
+        :param simplify: (*boolean or string*) Draw a line or polygon layer with the coarsest visually
+            lossless level of its cached simplification pyramid. The level is selected from the view
+            extent and pixel width each time the map is drawn. The simplification method ['dp' | 'vw']
+            can be given as a string. Default is ``False``.
+        :param pixels: (*int*) Pixel number of the layer extent width to select the simplification
+            level once, only used if the layer is reprojected to the map or the axes was not created
+            as map axes. Default is ``1000``.
+            
+        :returns: (*MapLayer*) The added layer.
         '''
         if isinstance(layer, MILayer):
             layer = layer.layer
+        if simplify and layer.getLayerType() == LayerTypes.VectorLayer and simplifiable(layer):
+            method = simplify if isinstance(simplify, basestring) else 'dp'
+            pyramid = get_pyramid(layer, method)
+            slayer = layer.clone()
+            slayer.setLegendScheme(layer.getLegendScheme())
+            slayer.setVisible(layer.isVisible())
+            if isinstance(self.axes, _MapPlot) and \
+                layer.getProjInfo().toProj4String() == self.axes.getProjInfo().toProj4String():
+                self.axes.add_simplified(slayer, pyramid)
+            else:
+                extent = layer.getExtent()
+                pyramid.apply(slayer, pyramid.select(max(extent.getWidth(), extent.getHeight()), pixels))
+            layer = slayer
         if zorder is None:
             self.axes.addLayer(layer)
         else:
@@ -109,6 +171,7 @@ class MapAxes(Axes):
         if not select is None:
             if select:
                 self.axes.setSelectedLayer(layer)
+        return layer
             
     def set_active_layer(self, layer):
         '''
@@ -256,6 +319,8 @@ class MapAxes(Axes):
             visible = kwargs.pop('visible', True)
             layer.setVisible(visible)
             order = kwargs.pop('order', None)
+            simplify = kwargs.pop('simplify', False)
+            pixels = kwargs.pop('pixels', 1000)
             if layer.getLayerType() == LayerTypes.ImageLayer:
                 if order is None:
                     self.add_layer(layer)
@@ -277,10 +342,7 @@ class MapAxes(Axes):
                         layer.getLegendScheme().getLegendBreaks().set(0, lb)
                 else:
                     layer.setLegendScheme(ls)
-                if order is None:
-                    self.add_layer(layer)
-                else:
-                    self.add_layer(layer, order)
+                layer = self.add_layer(layer, order, simplify=simplify, pixels=pixels)
                 #Labels        
                 labelfield = kwargs.pop('labelfield', None)
                 if not labelfield is None: